@@ -1,24 +1,31 @@
 import csv
-import os
-from pathlib import Path
-import random
 
-from constants.constant import admin_credentials, food_database, five_digit_low, five_digit_high, resources
+from constants.constant import admin_credentials, menu_page_size
+from utils.food_id_allocator import FoodIdExhaustedError
+from utils.food_record import validate_number
+from utils.login_throttle import LOCAL_SOURCE, LoginThrottledError, login_keys, login_throttle
+from utils.metrics import instrumented
+from utils.paths import resource_path
+from utils.pricing import validate_reprice
+from utils.storage import get_storage
 
 
 class AdminFunctions:
     """
     Class that provides admin functionality for the Food Delivery App.
     """
-    root = Path(__file__).parent.parent
-    admin_csv_path = os.path.join(root, resources, admin_credentials)
-    food_csv_path = os.path.join(root, resources, food_database)
+    admin_csv_path = resource_path(admin_credentials)
 
-    def __init__(self):
+    def __init__(self, storage=None):
         """
-        Initializes the AdminFunctions class.
+        Initializes the AdminFunctions class without reading the admin CSV file; it is read on the first login.
+
+        Args:
+            storage: The storage holding the food items; defaults to the configured shared storage.
+
         """
-        self.users = self.load_users()
+        self.storage = get_storage() if storage is None else storage
+        self.passwords = None
 
     def admin(self, app):
         """
@@ -27,6 +34,9 @@ class AdminFunctions:
         Args:
             app: The FoodDeliveryApp instance.
 
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
         """
         print("***Admin login screen***")
         print("1. Login")
@@ -38,17 +48,22 @@ class AdminFunctions:
             user_id = input("Enter your user ID: ")
             password = input("Enter your password: ")
 
-            if self.verify_user(user_id, password):
+            try:
+                verified = self.verify_user(user_id, password)
+            except LoginThrottledError as error:
+                print(error)
+                return self.admin, app
+            if verified:
                 print("Login successful!")
-                self.admin_authority(app)
+                return self.admin_authority, app
             else:
                 print("Invalid user ID or password. Please try again.")
-                self.admin(app)
+                return self.admin, app
         elif choice == "2":
-            app.welcome_screen()
+            return (app.welcome_screen,)
         else:
             print("Invalid choice. Please try again.")
-            self.admin(app)
+            return self.admin, app
 
     def load_users(self):
         """
@@ -66,22 +81,34 @@ class AdminFunctions:
                 users.append({'user_id': row[0], 'password': row[1]})
         return users
 
-    def verify_user(self, user_id, password):
+    @instrumented("admin.verify_user")
+    def verify_user(self, user_id, password, source=LOCAL_SOURCE):
         """
-        Verifies if the provided user ID and password match an admin user.
+        Verifies if the provided user ID and password match an admin user, using a lookup by user ID.
+
+        Attempts for a user ID or from a source with too many recent failures are refused before the admin file is
+        read.
 
         Args:
             user_id: The user ID to verify.
             password: The password to verify.
+            source: The address the attempt comes from.
 
         Returns:
             True if the user is verified, False otherwise.
 
+        Raises:
+            LoginThrottledError: If the user ID or the source has no attempts left.
+
         """
-        for user in self.users:
-            if user['user_id'] == user_id and user['password'] == password:
-                return True
-        return False
+        keys = login_keys("admin", user_id, source)
+        login_throttle.check(keys)
+        if self.passwords is None:
+            self.passwords = {user['user_id']: user['password'] for user in self.load_users()}
+        verified = user_id in self.passwords and self.passwords[user_id] == password
+        if not verified:
+            login_throttle.record_failure(keys)
+        return verified
 
     def admin_authority(self, app):
         """
@@ -90,29 +117,44 @@ class AdminFunctions:
         Args:
             app: The FoodDeliveryApp instance.
 
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
         """
         print("***Admin login features***")
         print("1. Add new food items")
         print("2. Edit food items")
         print("3. View the list of all food items")
         print("4. Remove a food item from the menu")
-        print("5. Go back")
+        print("5. Bulk import food items from a CSV or JSONL file")
+        print("6. Export all food items to a CSV or JSONL file")
+        print("7. View sales analytics")
+        print("8. Change the discount or price of all food items in a price range")
+        print("9. Go back")
 
         choice = input("Please enter your choice: ")
 
         if choice == "1":
-            self.add_food_item(app)
+            return self.add_food_item, app
         elif choice == "2":
-            self.edit_food_item(app)
+            return self.edit_food_item, app
         elif choice == "3":
-            self.view_food_items(app)
+            return self.view_food_items, app
         elif choice == "4":
-            self.remove_food_item(app)
+            return self.remove_food_item, app
         elif choice == "5":
-            self.admin(app)
+            return self.import_food_items, app
+        elif choice == "6":
+            return self.export_food_items, app
+        elif choice == "7":
+            return self.view_sales_analytics, app
+        elif choice == "8":
+            return self.reprice_food_items, app
+        elif choice == "9":
+            return self.admin, app
         else:
             print("Invalid choice. Please try again.")
-            self.admin_authority(app)
+            return self.admin_authority, app
 
     def add_food_item(self, app):
         """
@@ -121,9 +163,11 @@ class AdminFunctions:
         Args:
             app: The FoodDeliveryApp instance.
 
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
         """
         print("**Add new food item**")
-        food_id = self.generate_food_id()
 
         name = input("Enter the name of the food item: ")
         quantity = input("Enter the quantity of the food item (For eg, 100ml, 250gm, 4pieces etc): ")
@@ -131,38 +175,61 @@ class AdminFunctions:
         discount = input("Enter the discount for the food item in %: ")
         stock = input("Enter the stock amount of the food item: ")
 
+        try:
+            self.create_food_item({
+                "Name": name,
+                "Quantity": quantity,
+                "Price": price,
+                "Discount": discount,
+                "Stock": stock
+            })
+        except (FoodIdExhaustedError, ValueError) as error:
+            print(error)
+            print()
+            return self.admin_authority, app
+        print("Food item added successfully!")
+        print()
+        return self.admin_authority, app
+
+    @instrumented("admin.create_food_item")
+    def create_food_item(self, details):
+        """
+        Adds a new food item to the menu without prompting.
+
+        Args:
+            details: The food item's Name, Quantity, Price, Discount and Stock.
+
+        Returns:
+            The saved food item, including its generated FoodID.
+
+        Raises:
+            ValueError: If the price, discount or stock is not valid.
+
+        """
+        details = self.checked_food_item(details)
         food_item = {
-            "FoodID": food_id,
-            "Name": name,
-            "Quantity": quantity,
-            "Price": price,
-            "Discount": discount,
-            "Stock": stock
+            "FoodID": self.generate_food_id(),
+            "Name": details["Name"],
+            "Quantity": details["Quantity"],
+            "Price": details["Price"],
+            "Discount": details["Discount"],
+            "Stock": details["Stock"]
         }
         self.save_food_item(food_item)
-        print("Food item added successfully!")
-        print()
-        self.admin_authority(app)
+        return food_item
 
     def generate_food_id(self):
         """
-        Generates a unique food ID for a new food item.
+        Generates a unique food ID for a new food item from the storage's food ID sequence.
 
         Returns:
             A unique food ID.
 
-        """
-        with open(self.food_csv_path, 'r') as file:
-            reader = csv.reader(file)
-            next(reader)
-            existing_ids = {row[0] for row in reader}
-
-        while True:
-            food_id = random.randint(five_digit_low, five_digit_high)
-            if str(food_id) not in existing_ids:
-                break
+        Raises:
+            FoodIdExhaustedError: If every food ID of the configured width has been allocated.
 
-        return food_id
+        """
+        return self.storage.allocate_food_ids(1)[0]
 
     def save_food_item(self, food_item):
         """
@@ -172,16 +239,7 @@ class AdminFunctions:
             food_item: The food item to save.
 
         """
-        with open(self.food_csv_path, 'a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                food_item['FoodID'],
-                food_item['Name'],
-                food_item['Quantity'],
-                food_item['Price'],
-                food_item['Discount'],
-                food_item['Stock']
-            ])
+        self.storage.add_food(self.food_item_to_record(food_item))
 
     def edit_food_item(self, app):
         """
@@ -190,9 +248,12 @@ class AdminFunctions:
         Args:
             app: The FoodDeliveryApp instance.
 
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
         """
         print("**Edit food item**")
-        food_id = input("Enter the FoodID of the food item to edit: ")
+        food_id = self.find_food_id("Enter the FoodID or name of the food item to edit: ")
 
         if self.food_item_exists(food_id):
             existing_food_item = self.get_food_item(food_id)
@@ -204,31 +265,37 @@ class AdminFunctions:
 
             updated_food_item = self.prompt_new_food_details(existing_food_item)
 
-            self.update_food_item(updated_food_item)
-
-            print("Food item updated successfully!")
+            try:
+                self.update_food_item(updated_food_item)
+                print("Food item updated successfully!")
+            except ValueError as error:
+                print(error)
         else:
             print("Food item does not exist.")
         print()
-        self.admin_authority(app)
+        return self.admin_authority, app
 
-    def view_food_items(self, app):
+    def view_food_items(self, app, cursor=None):
         """
-        Displays all food items in the menu.
+        Displays the food items in the menu one page at a time, ordered by price.
 
         Args:
             app: The FoodDeliveryApp instance.
+            cursor: The cursor of the page to show, or None for the first page.
+
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
 
         """
         print("View all food items")
-        with open(self.food_csv_path, 'r') as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip the header row
-            for row in reader:
-                food_item = self.row_to_food_item(row)
-                self.display_food_item(food_item)
-                print()
-        self.admin_authority(app)
+        records, next_cursor = self.storage.page_foods(cursor, menu_page_size)
+        for record in records:
+            food_item = self.record_to_food_item(record)
+            self.display_food_item(food_item)
+            print()
+        if next_cursor is not None and input("Enter 'n' for the next page (or press Enter to go back): ").lower() == "n":
+            return self.view_food_items, app, next_cursor
+        return self.admin_authority, app
 
     def remove_food_item(self, app):
         """
@@ -237,9 +304,12 @@ class AdminFunctions:
         Args:
             app: The FoodDeliveryApp instance.
 
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
         """
         print("Remove food item")
-        food_id = input("Enter the FoodID of the food item to remove: ")
+        food_id = self.find_food_id("Enter the FoodID or name of the food item to remove: ")
 
         if self.food_item_exists(food_id):
             self.delete_food_item(food_id)
@@ -247,7 +317,147 @@ class AdminFunctions:
         else:
             print("Food item does not exist.")
         print()
-        self.admin_authority(app)
+        return self.admin_authority, app
+
+    def import_food_items(self, app):
+        """
+        Imports food items in bulk from a CSV or JSONL file.
+
+        Args:
+            app: The FoodDeliveryApp instance.
+
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
+        """
+        print("Bulk import food items")
+        path = input("Enter the path of the CSV or JSONL file to import: ")
+        from utils.menu_transfer import import_menu, print_import_report
+        try:
+            print_import_report(import_menu(path, self.storage))
+        except (OSError, ValueError, csv.Error, FoodIdExhaustedError) as error:
+            print(f"Import failed, no food items were imported: {error}")
+        print()
+        return self.admin_authority, app
+
+    def export_food_items(self, app):
+        """
+        Exports all food items to a CSV or JSONL file.
+
+        Args:
+            app: The FoodDeliveryApp instance.
+
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
+        """
+        print("Export food items")
+        path = input("Enter the path of the CSV or JSONL file to write: ")
+        from utils.menu_transfer import export_menu, print_export_report
+        try:
+            print_export_report(export_menu(path, self.storage), path)
+        except OSError as error:
+            print(f"Export failed: {error}")
+        print()
+        return self.admin_authority, app
+
+    def view_sales_analytics(self, app):
+        """
+        Displays revenue per item, orders per day and the items whose total sales exceed a threshold.
+
+        Args:
+            app: The FoodDeliveryApp instance.
+
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
+        """
+        print("**Sales analytics**")
+        threshold = input("Show items with total sales over INR (or press Enter for 0): ").strip()
+        if threshold and not threshold.isdigit():
+            print("Invalid amount. Please enter a whole number.")
+            print()
+            return self.admin_authority, app
+
+        from utils.sales_analytics import print_sales_report, sales_report
+        print_sales_report(sales_report(self.storage, int(threshold or 0)), self.storage)
+        print()
+        return self.admin_authority, app
+
+    def reprice_food_items(self, app):
+        """
+        Sets the discount or changes the price of every food item in a price range at once.
+
+        Args:
+            app: The FoodDeliveryApp instance.
+
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
+
+        """
+        print("**Bulk repricing**")
+        answers = [
+            input("Enter the minimum current price (or press Enter for none): ").strip(),
+            input("Enter the maximum current price (or press Enter for none): ").strip(),
+            input("Enter the new discount in % (or press Enter to keep the discounts): ").strip(),
+            input("Enter the price change in %, e.g. 10 or -10 (or press Enter to keep the prices): ").strip()
+        ]
+        if any(answer and not answer.lstrip("-").isdigit() for answer in answers):
+            print("Invalid number. Please enter whole numbers.")
+            print()
+            return self.admin_authority, app
+
+        min_price, max_price, discount, price_change = [int(answer) if answer else None for answer in answers]
+        error = validate_reprice(discount, price_change)
+        if error:
+            print(error)
+        else:
+            count = self.reprice(min_price, max_price, discount, price_change)
+            print(f"Repriced {count} food item(s).")
+        print()
+        return self.admin_authority, app
+
+    @instrumented("admin.reprice")
+    def reprice(self, min_price=None, max_price=None, discount=None, price_change=None):
+        """
+        Sets the discount or changes the price of every food item in a price range without prompting.
+
+        Args:
+            min_price: The lowest current price to include, or None.
+            max_price: The highest current price to include, or None.
+            discount: The discount to set in percent, or None to keep each item's discount.
+            price_change: The percentage to change each price by, or None to keep the prices.
+
+        Returns:
+            The number of food items changed.
+
+        """
+        return self.storage.reprice(min_price, max_price, discount, price_change)
+
+    def find_food_id(self, prompt):
+        """
+        Asks for a FoodID or a name. A name is looked up in the search index and the admin picks one of the matches.
+
+        Args:
+            prompt: The prompt to show.
+
+        Returns:
+            The chosen FoodID, or the text entered if it is neither a FoodID nor matches any name.
+
+        """
+        text = input(prompt)
+        if self.food_item_exists(text):
+            return text
+        matches = self.storage.search_foods(text, menu_page_size)
+        if not matches:
+            return text
+
+        for index, record in enumerate(matches, start=1):
+            print(f"{index}. {record['name']} (FoodID {record['food_id']}) [INR {record['price']}]")
+        choice = input("Enter the index of the food item (or enter '0' to cancel): ")
+        if choice.isdigit() and 0 < int(choice) <= len(matches):
+            return matches[int(choice) - 1]['food_id']
+        return text
 
     def food_item_exists(self, food_id):
         """
@@ -260,14 +470,9 @@ class AdminFunctions:
             True if the food item exists, False otherwise.
 
         """
-        with open(self.food_csv_path, 'r') as file:
-            reader = csv.reader(file)
-            next(reader)
-            for row in reader:
-                if row[0] == food_id:
-                    return True
-        return False
+        return self.storage.food_exists(food_id)
 
+    @instrumented("admin.get_food_item")
     def get_food_item(self, food_id):
         """
         Retrieves a food item from the menu using the given ID.
@@ -279,13 +484,10 @@ class AdminFunctions:
             The food item as a dictionary, or None if not found.
 
         """
-        with open(self.food_csv_path, 'r') as file:
-            reader = csv.reader(file)
-            next(reader)
-            for row in reader:
-                if row[0] == food_id:
-                    return self.row_to_food_item(row)
-        return None
+        record = self.storage.get_food(food_id)
+        if record is None:
+            return None
+        return self.record_to_food_item(record)
 
     def row_to_food_item(self, row):
         """
@@ -307,6 +509,66 @@ class AdminFunctions:
             "Stock": row[5]
         }
 
+    def record_to_food_item(self, record):
+        """
+        Converts a food catalog record, keyed by the CSV column names, to a food item dictionary.
+
+        Args:
+            record: The food catalog record.
+
+        Returns:
+            The food item as a dictionary.
+
+        """
+        return self.row_to_food_item([
+            record['food_id'],
+            record['name'],
+            record['quantity'],
+            record['price'],
+            record['discount'],
+            record['stock']
+        ])
+
+    def food_item_to_record(self, food_item):
+        """
+        Converts a food item dictionary to a food catalog record keyed by the CSV column names.
+
+        Args:
+            food_item: The food item as a dictionary.
+
+        Returns:
+            The food catalog record.
+
+        """
+        return {
+            "food_id": str(food_item["FoodID"]),
+            "name": food_item["Name"],
+            "quantity": food_item["Quantity"],
+            "price": food_item["Price"],
+            "discount": food_item["Discount"],
+            "stock": food_item["Stock"]
+        }
+
+    def checked_food_item(self, food_item):
+        """
+        Validates the price, discount and stock of a food item.
+
+        Args:
+            food_item: The food item as a dictionary.
+
+        Returns:
+            A copy of the food item with the price, discount and stock as they are stored.
+
+        Raises:
+            ValueError: If the price or stock is not a whole non-negative number, or the discount not between 0 and
+                100.
+
+        """
+        checked = dict(food_item)
+        for field in ("Price", "Discount", "Stock"):
+            checked[field] = str(validate_number(field.lower(), food_item[field]))
+        return checked
+
     def display_food_item(self, food_item):
         """
         Displays the details of a food item.
@@ -351,6 +613,7 @@ class AdminFunctions:
 
         return updated_food_item
 
+    @instrumented("admin.update_food_item")
     def update_food_item(self, updated_food_item):
         """
         Updates an existing food item in the menu.
@@ -358,26 +621,18 @@ class AdminFunctions:
         Args:
             updated_food_item: The updated food item.
 
+        Returns:
+            The food item as saved.
+
+        Raises:
+            ValueError: If the price, discount or stock is not valid.
+
         """
-        temp_csv_path = os.path.join(self.root, "temp_food.csv")
-        with open(self.food_csv_path, 'r') as file, open(temp_csv_path, 'w', newline='') as temp_file:
-            reader = csv.reader(file)
-            writer = csv.writer(temp_file)
-            writer.writerow(next(reader))
-            for row in reader:
-                if row[0] == updated_food_item["FoodID"]:
-                    writer.writerow([
-                        updated_food_item["FoodID"],
-                        updated_food_item["Name"],
-                        updated_food_item["Quantity"],
-                        updated_food_item["Price"],
-                        updated_food_item["Discount"],
-                        updated_food_item["Stock"]
-                    ])
-                else:
-                    writer.writerow(row)
-        os.replace(temp_csv_path, self.food_csv_path)
+        updated_food_item = self.checked_food_item(updated_food_item)
+        self.storage.update_food(self.food_item_to_record(updated_food_item))
+        return updated_food_item
 
+    @instrumented("admin.delete_food_item")
     def delete_food_item(self, food_id):
         """
         Deletes a food item from the menu.
@@ -386,15 +641,21 @@ class AdminFunctions:
             food_id: The FoodID of the food item to delete.
 
         """
-        temp_csv_path = os.path.join(self.root, "temp_food.csv")
-        with open(self.food_csv_path, 'r') as file, open(temp_csv_path, 'w', newline='') as temp_file:
-            reader = csv.reader(file)
-            writer = csv.writer(temp_file)
-            writer.writerow(next(reader))
-            for row in reader:
-                if row[0] != food_id:
-                    writer.writerow(row)
-        os.replace(temp_csv_path, self.food_csv_path)
+        self.storage.delete_food(food_id)
+
+
+admin_functions = None
 
 
-admin_functions = AdminFunctions()
+def get_admin_functions():
+    """
+    Returns the shared AdminFunctions, creating it on first use of the admin path.
+
+    Returns:
+        The AdminFunctions instance.
+
+    """
+    global admin_functions
+    if admin_functions is None:
+        admin_functions = AdminFunctions()
+    return admin_functions
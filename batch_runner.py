@@ -0,0 +1,331 @@
+import argparse
+import json
+import sys
+import time
+import traceback
+
+from utils.admin_functions import get_admin_functions
+from utils.food_id_allocator import FoodIdExhaustedError
+from utils.login_throttle import LoginThrottledError
+from utils.request_fields import read_cart, text_fields
+from utils.user_functions import get_user_functions
+
+FOOD_FIELDS = ["Name", "Quantity", "Price", "Discount", "Stock"]
+CHECKPOINT_INTERVAL = 1000
+
+
+class BatchError(Exception):
+    """
+    Error that makes a single batch command fail; the message is written to its result line.
+    """
+
+
+class BatchRunner:
+    """
+    Non-interactive runner that executes commands read from a JSONL stream against the admin and user logic.
+
+    Each input line is a JSON object with a "command" field and the command's arguments, using the field names of
+    the HTTP service. An optional "id" is copied to the result. The commands are:
+
+        {"command": "register", "full_name", "phone_number", "email", "address", "password"}
+        {"command": "login", "email", "password"}
+        {"command": "logout", "email"}
+        {"command": "order", "email", "food_id", "quantity"} or {"command": "order", "email", "items": [...]}
+        {"command": "admin_login", "user_id", "password"}
+        {"command": "add_food", "Name", "Quantity", "Price", "Discount", "Stock"}
+        {"command": "edit_food", "food_id", and any of the add_food fields}
+        {"command": "remove_food", "food_id"}
+
+    Like the interactive app, orders need a prior login of that email in the same batch and the food commands a
+    prior admin login. Commands run in order inside one storage batch. The food file is rewritten and the order
+    lines are appended once per checkpoint rather than once per order, together so that recorded orders never
+    outlive the stock they took, and result lines are only written once the changes they report have been
+    persisted.
+    """
+    def __init__(self, admin=None, user=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+        """
+        Initializes the runner.
+
+        Args:
+            admin: The AdminFunctions instance; defaults to the shared one.
+            user: The UserFunctions instance; defaults to the shared one.
+            checkpoint_interval: The number of commands between two writes of the delayed changes.
+
+        """
+        self.admin = get_admin_functions() if admin is None else admin
+        self.user = get_user_functions() if user is None else user
+        self.checkpoint_interval = checkpoint_interval
+        self.logged_in = set()
+        self.admin_logged_in = False
+        self.handlers = {
+            "register": self.register,
+            "login": self.login,
+            "logout": self.logout,
+            "order": self.order,
+            "admin_login": self.admin_login,
+            "add_food": self.add_food,
+            "edit_food": self.edit_food,
+            "remove_food": self.remove_food
+        }
+
+    def run(self, lines, output):
+        """
+        Executes every command of a JSONL stream and writes one JSON result line per command.
+
+        Args:
+            lines: An iterable of JSONL lines; blank lines are skipped.
+            output: The text file the result lines are written to.
+
+        Returns:
+            A dictionary with the number of commands, the number that failed and the elapsed seconds.
+
+        """
+        storage = self.user.storage
+        summary = {"commands": 0, "failed": 0}
+        pending = []
+        start = time.perf_counter()
+        with storage.batch():
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                result = self.execute(line)
+                result["line"] = line_number
+                summary["commands"] += 1
+                summary["failed"] += not result["ok"]
+                pending.append(json.dumps(result))
+                if len(pending) >= self.checkpoint_interval:
+                    self.checkpoint(storage, pending, output)
+            self.checkpoint(storage, pending, output)
+        summary["seconds"] = time.perf_counter() - start
+        return summary
+
+    def checkpoint(self, storage, pending, output):
+        """
+        Persists the delayed changes, then writes the result lines of the commands that made them.
+
+        Args:
+            storage: The storage being batched.
+            pending: The JSON result lines not yet written; the list is emptied.
+            output: The text file the result lines are written to.
+
+        """
+        storage.flush()
+        if pending:
+            output.write("\n".join(pending) + "\n")
+            output.flush()
+            pending.clear()
+
+    def execute(self, line):
+        """
+        Parses and executes one command.
+
+        Args:
+            line: The JSON text of the command.
+
+        Returns:
+            The result dictionary, with "ok" and either the command's output or an "error" message. Invalid
+            arguments and unexpected errors only fail this command; unexpected errors are also printed to stderr.
+
+        """
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "Invalid JSON."}
+        if not isinstance(command, dict):
+            return {"ok": False, "error": "A command must be a JSON object."}
+
+        result = {"command": command.get("command")}
+        if "id" in command:
+            result["id"] = command["id"]
+        name = command.get("command")
+        handler = self.handlers.get(name) if isinstance(name, str) else None
+        try:
+            if handler is None:
+                raise BatchError(f"Unknown command: {name}")
+            result.update(handler(command) or {})
+            result["ok"] = True
+        except (BatchError, ValueError) as error:
+            result.update(ok=False, error=str(error))
+        except Exception:
+            traceback.print_exc()
+            result.update(ok=False, error="Internal error.")
+        return result
+
+    def register(self, command):
+        """
+        Registers a new user.
+
+        Args:
+            command: The register command.
+
+        """
+        text_fields(command, ["full_name", "phone_number", "email", "address", "password"])
+        error = self.user.register({
+            "Full Name": command.get("full_name", ""),
+            "Phone Number": command.get("phone_number", ""),
+            "Email": command.get("email", ""),
+            "Address": command.get("address", ""),
+            "Password": command.get("password", "")
+        })
+        if error:
+            raise BatchError(error)
+
+    def login(self, command):
+        """
+        Logs a user in for the following order commands.
+
+        Args:
+            command: The login command.
+
+        """
+        text_fields(command, ["email", "password"])
+        email = command.get("email", "")
+        try:
+            verified = self.user.verify_user(email, command.get("password", ""))
+        except LoginThrottledError as error:
+            raise BatchError(str(error))
+        if not verified:
+            raise BatchError("Invalid email or password.")
+        self.logged_in.add(email)
+
+    def logout(self, command):
+        """
+        Logs a user out.
+
+        Args:
+            command: The logout command.
+
+        """
+        text_fields(command, ["email"])
+        self.logged_in.discard(command.get("email", ""))
+
+    def order(self, command):
+        """
+        Places an order for a logged-in user.
+
+        Args:
+            command: The order command, with either a food_id and quantity or a list of items.
+
+        Returns:
+            A dictionary with the recorded order lines.
+
+        """
+        text_fields(command, ["email"])
+        email = command.get("email", "")
+        if email not in self.logged_in:
+            raise BatchError("Login required.")
+        orders, error = self.user.submit_cart(email, read_cart(command))
+        if error:
+            raise BatchError(error)
+        return {"orders": orders}
+
+    def admin_login(self, command):
+        """
+        Logs the admin in for the following food commands.
+
+        Args:
+            command: The admin_login command.
+
+        """
+        text_fields(command, ["user_id", "password"])
+        try:
+            verified = self.admin.verify_user(command.get("user_id", ""), command.get("password", ""))
+        except LoginThrottledError as error:
+            raise BatchError(str(error))
+        if not verified:
+            raise BatchError("Invalid user ID or password.")
+        self.admin_logged_in = True
+
+    def require_admin(self):
+        """
+        Checks that the admin has logged in.
+
+        Raises:
+            BatchError: If there was no successful admin_login.
+
+        """
+        if not self.admin_logged_in:
+            raise BatchError("Admin login required.")
+
+    def add_food(self, command):
+        """
+        Adds a food item.
+
+        Args:
+            command: The add_food command.
+
+        Returns:
+            A dictionary with the saved food item, including its generated FoodID.
+
+        """
+        self.require_admin()
+        missing = [field for field in FOOD_FIELDS if field not in command]
+        if missing:
+            raise BatchError(f"Missing fields: {', '.join(missing)}")
+        try:
+            food_item = self.admin.create_food_item({field: str(command[field]) for field in FOOD_FIELDS})
+        except FoodIdExhaustedError as error:
+            raise BatchError(str(error))
+        return {"item": food_item}
+
+    def edit_food(self, command):
+        """
+        Changes some fields of a food item.
+
+        Args:
+            command: The edit_food command.
+
+        Returns:
+            A dictionary with the updated food item.
+
+        """
+        self.require_admin()
+        food_item = self.admin.get_food_item(str(command.get("food_id", "")))
+        if food_item is None:
+            raise BatchError("Food item does not exist.")
+        food_item.update({field: str(command[field]) for field in FOOD_FIELDS if field in command})
+        food_item = self.admin.update_food_item(food_item)
+        return {"item": food_item}
+
+    def remove_food(self, command):
+        """
+        Removes a food item.
+
+        Args:
+            command: The remove_food command.
+
+        """
+        self.require_admin()
+        food_id = str(command.get("food_id", ""))
+        if self.admin.get_food_item(food_id) is None:
+            raise BatchError("Food item does not exist.")
+        self.admin.delete_food_item(food_id)
+
+
+def main():
+    """
+    Command line entry point for the batch runner.
+    """
+    parser = argparse.ArgumentParser(description="Execute admin and user commands from a JSONL file.")
+    parser.add_argument("commands", help="JSONL file of commands, or - for standard input.")
+    parser.add_argument("results", help="JSONL file to write one result per command to, or - for standard output.")
+    parser.add_argument("--checkpoint", type=int, default=CHECKPOINT_INTERVAL,
+                        help="Commands between two writes of the delayed changes.")
+    args = parser.parse_args()
+
+    commands = sys.stdin if args.commands == "-" else open(args.commands, 'r')
+    results = sys.stdout if args.results == "-" else open(args.results, 'w')
+    try:
+        summary = BatchRunner(checkpoint_interval=max(1, args.checkpoint)).run(commands, results)
+    finally:
+        if commands is not sys.stdin:
+            commands.close()
+        if results is not sys.stdout:
+            results.close()
+    rate = summary["commands"] / summary["seconds"] if summary["seconds"] else 0
+    print(f"Executed {summary['commands']} commands ({summary['failed']} failed) in {summary['seconds']:.2f}s, "
+          f"{rate:.0f} commands/s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from constants.constant import food_database, order_database, sqlite_database, user_database
+from utils.admin_functions import AdminFunctions
+from utils.datagen import DATASET_FILE, food_id, user_email, user_password
+from utils.food_catalog import FoodCatalog
+from utils.order_log import OrderLog
+from utils.paths import root
+from utils.storage import CsvStorage
+from utils.user_functions import UserFunctions
+from utils.user_index import UserIndex
+
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_MS = 0.05
+
+
+def open_storage(backend, directory):
+    """
+    Opens a storage over a dataset directory.
+
+    Args:
+        backend: "csv" or "sqlite".
+        directory: The directory holding the dataset.
+
+    Returns:
+        The Storage instance.
+
+    """
+    if backend == "sqlite":
+        from utils.sqlite_storage import SqliteStorage, migrate_csv_to_sqlite
+        db_path = os.path.join(directory, sqlite_database)
+        if not os.path.exists(db_path):
+            migrate_csv_to_sqlite(directory, db_path)
+        return SqliteStorage(db_path)
+    return CsvStorage(FoodCatalog(os.path.join(directory, food_database)),
+                      UserIndex(os.path.join(directory, user_database)),
+                      OrderLog(os.path.join(directory, order_database)))
+
+
+def time_calls(function, arguments):
+    """
+    Calls a function once for each set of arguments and times every call.
+
+    Args:
+        function: The function to benchmark.
+        arguments: A list of argument tuples, one per call.
+
+    Returns:
+        A dictionary with the first call's time and the mean, median, 95th percentile and maximum time of the
+        remaining calls, in milliseconds.
+
+    """
+    times = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    warm = sorted(times[1:] or times)
+    return {
+        "calls": len(times),
+        "first_ms": round(times[0], 4),
+        "mean_ms": round(statistics.mean(warm), 4),
+        "p50_ms": round(warm[len(warm) // 2], 4),
+        "p95_ms": round(warm[min(len(warm) - 1, int(len(warm) * 0.95))], 4),
+        "max_ms": round(warm[-1], 4)
+    }
+
+
+def time_startup(repeat):
+    """
+    Times cold starts of the console app, each in a fresh interpreter started from the project root.
+
+    Args:
+        repeat: The number of starts to time.
+
+    Returns:
+        A dictionary mapping "startup.import_main" (importing the app) and "startup.welcome_screen" (starting it,
+        showing the welcome screen and choosing Exit) to their timings; both include the interpreter start.
+
+    """
+    def run(args, stdin=None):
+        subprocess.run([sys.executable] + args, cwd=root, input=stdin, stdout=subprocess.DEVNULL, check=True,
+                       text=True)
+
+    return {
+        "startup.import_main": time_calls(run, [(["-c", "import main"],)] * repeat),
+        "startup.welcome_screen": time_calls(run, [(["main.py"], "3\n")] * repeat)
+    }
+
+
+def run_benchmarks(directory, backend="csv", repeat=20, seed=0):
+    """
+    Times the app's cold start and every admin and user operation against a private copy of a generated dataset.
+
+    The dataset is copied first because orders, profile updates and the admin CRUD operations change it, and a
+    baseline is only comparable if every run starts from the same data. The first call of each operation is
+    reported separately, since it pays for loading caches and indexes.
+
+    Args:
+        directory: The dataset directory written by utils.datagen.
+        backend: "csv" or "sqlite".
+        repeat: The number of calls per operation.
+        seed: The random seed used to pick users and food items.
+
+    Returns:
+        A dictionary with the dataset description, the environment and the timings of every operation.
+
+    """
+    with open(os.path.join(directory, DATASET_FILE), 'r') as file:
+        dataset = json.load(file)
+    rng = random.Random(seed)
+    work_directory = tempfile.mkdtemp(prefix="food-app-benchmark-")
+    try:
+        shutil.copytree(directory, work_directory, dirs_exist_ok=True)
+        storage = open_storage(backend, work_directory)
+        user = UserFunctions(storage)
+        admin = AdminFunctions(storage)
+        users = [rng.randrange(dataset["users"]) for _ in range(repeat)]
+        foods = [food_id(rng.randrange(dataset["foods"])) for _ in range(repeat)]
+        details = {"Name": "Benchmark Thali", "Quantity": "1 plate", "Price": "150", "Discount": "0",
+                   "Stock": "1000000"}
+
+        results = time_startup(repeat)
+        results["user.verify_user"] = time_calls(
+            user.verify_user, [(user_email(number), user_password(number)) for number in users])
+        results["user.load_food_items"] = time_calls(user.load_food_items, [()] * repeat)
+        results["user.load_food_page"] = time_calls(user.load_food_page, [()] * repeat)
+        results["user.search_food_items"] = time_calls(
+            user.search_food_items, [(query,) for query in repeat_values(["biryani", "panner tika", "garlic n"],
+                                                                         repeat)])
+        results["user.submit_cart"] = time_calls(
+            user.submit_cart, [(user_email(number), {food: 1}) for number, food in zip(users, foods)])
+        results["user.add_order_to_history"] = time_calls(
+            user.add_order_to_history, [(storage.get_food(food), user_email(number)) for number, food in
+                                        zip(users, foods)])
+        results["user.get_order_history"] = time_calls(
+            user.get_order_history, [(user_email(number),) for number in users])
+        results["user.update_user_profile"] = time_calls(
+            user.update_user_profile, [(user_email(number), {"Address": f"{number} Benchmark Road"})
+                                       for number in users])
+
+        created = []
+        results["admin.create_food_item"] = time_calls(
+            lambda: created.append(admin.create_food_item(details)), [()] * repeat)
+        results["admin.get_food_item"] = time_calls(admin.get_food_item, [(food,) for food in foods])
+        results["admin.update_food_item"] = time_calls(
+            admin.update_food_item, [(dict(food_item, Price="175"),) for food_item in created])
+        results["admin.delete_food_item"] = time_calls(
+            admin.delete_food_item, [(food_item["FoodID"],) for food_item in created])
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    return {
+        "dataset": dataset,
+        "backend": backend,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results
+    }
+
+
+def repeat_values(values, count):
+    """
+    Repeats a list of values until there are count of them.
+
+    Args:
+        values: The values to repeat.
+        count: The number of values wanted.
+
+    Returns:
+        A list of count values.
+
+    """
+    return [values[index % len(values)] for index in range(count)]
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares a benchmark report with a saved baseline, operation by operation, using the median time.
+
+    An operation only counts as regressed if it is both slower than the tolerance allows and at least
+    MIN_REGRESSION_MS slower, so timer noise on sub-millisecond operations is not reported.
+
+    Args:
+        report: The current report.
+        baseline: The baseline report.
+        tolerance: The allowed slowdown as a fraction, e.g. 0.25 for 25%.
+
+    Returns:
+        A list of (operation, baseline ms, current ms, ratio, regressed) tuples.
+
+    """
+    rows = []
+    for operation, timing in report["results"].items():
+        previous = baseline["results"].get(operation)
+        if previous is None:
+            continue
+        ratio = timing["p50_ms"] / previous["p50_ms"] if previous["p50_ms"] else float("inf")
+        regressed = ratio > 1 + tolerance and timing["p50_ms"] - previous["p50_ms"] > MIN_REGRESSION_MS
+        rows.append((operation, previous["p50_ms"], timing["p50_ms"], ratio, regressed))
+    return rows
+
+
+def print_report(report):
+    """
+    Prints the timings of a benchmark report as a table.
+
+    Args:
+        report: The dictionary returned by run_benchmarks.
+
+    """
+    dataset = report["dataset"]
+    print(f"{report['backend']} backend, {dataset['users']} users, {dataset['foods']} food items, "
+          f"{dataset['orders']} order lines, {report['repeat']} calls per operation")
+    print(f"{'operation':<28}{'first ms':>11}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}")
+    for operation, timing in report["results"].items():
+        print(f"{operation:<28}{timing['first_ms']:>11.3f}{timing['p50_ms']:>11.3f}{timing['p95_ms']:>11.3f}"
+              f"{timing['max_ms']:>11.3f}")
+
+
+def print_comparison(rows, tolerance):
+    """
+    Prints the comparison with a baseline.
+
+    Args:
+        rows: The result of compare.
+        tolerance: The allowed slowdown as a fraction.
+
+    """
+    print(f"{'operation':<28}{'baseline ms':>13}{'current ms':>13}{'ratio':>8}")
+    for operation, previous, current, ratio, regressed in rows:
+        flag = f"  REGRESSION (> {tolerance:.0%} slower)" if regressed else ""
+        print(f"{operation:<28}{previous:>13.3f}{current:>13.3f}{ratio:>8.2f}{flag}")
+
+
+def main():
+    """
+    Command line entry point for the benchmark suite.
+    """
+    parser = argparse.ArgumentParser(description="Time every admin and user operation on a generated dataset.")
+    parser.add_argument("directory", help="Dataset directory written by python -m utils.datagen.")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per operation.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Save the results as a JSON baseline.")
+    parser.add_argument("--compare", help="Compare the results with a saved JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed median slowdown before an operation counts as a regression.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.directory, args.backend, max(2, args.repeat), args.seed)
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {args.save}.")
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        sizes = ("users", "foods", "orders", "legacy_orders", "seed")
+        if (baseline["backend"] != report["backend"] or
+                any(baseline["dataset"].get(size) != report["dataset"].get(size) for size in sizes)):
+            print("Warning: the baseline was recorded with a different backend or dataset.")
+        rows = compare(report, baseline, args.tolerance)
+        print_comparison(rows, args.tolerance)
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+import argparse
+import mmap
+import os
+import struct
+
+from constants.constant import catalog_snapshot, food_database
+from utils.food_record import FoodRecord
+from utils.paths import resource_path
+
+MAGIC = b"FOODSNP1"
+HEADER = struct.Struct("<8sIIqQQ")
+INDEX = struct.Struct("<I")
+PRICE_OFFSET = 16
+STOCK_OFFSET = 32
+
+
+def record_struct(id_size):
+    """
+    Returns the layout of one record of a snapshot.
+
+    A record holds the food_id, padded with NUL bytes to id_size, the offset and length of the name and quantity
+    in the string area, then price, discount and stock as 64-bit integers. id_size is a multiple of 8, so the
+    integers are aligned and the stock can be updated in place with a single aligned write.
+
+    Args:
+        id_size: The space reserved for a food_id, in bytes.
+
+    Returns:
+        The struct.Struct of a record.
+
+    """
+    return struct.Struct(f"<{id_size}sIIIIqqq")
+
+
+def lower_bound(count, key_at, target):
+    """
+    Binary search for the first position whose key is not less than the target.
+
+    Args:
+        count: The number of positions.
+        key_at: A function returning the key of a position; keys must be sorted ascending.
+        target: The key to search for.
+
+    Returns:
+        The position, from 0 to count.
+
+    """
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if key_at(middle) < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def upper_bound(count, key_at, target):
+    """
+    Binary search for the first position whose key is greater than the target.
+
+    Args:
+        count: The number of positions.
+        key_at: A function returning the key of a position; keys must be sorted ascending.
+        target: The key to search for.
+
+    Returns:
+        The position, from 0 to count.
+
+    """
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if target < key_at(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def write_snapshot(path, records, source_signature):
+    """
+    Compiles food items into a snapshot file and atomically replaces the previous snapshot with it.
+
+    The file holds a header, the fixed-size records in catalog order, the record numbers sorted by food_id, the
+    record numbers sorted by (price, food_id), and the names and quantities. Readers that still have the old file
+    mapped keep reading it until they notice the new one.
+
+    Args:
+        path: The path of the snapshot file.
+        records: The FoodRecords, in catalog order.
+        source_signature: The signature of the food CSV file the records were read from, as returned by
+            FoodCatalog.file_signature.
+
+    """
+    encoded_ids = [record.food_id.encode('utf-8') for record in records]
+    id_size = max([8] + [len(food_id) for food_id in encoded_ids])
+    id_size += -id_size % 8
+    record_layout = record_struct(id_size)
+    count = len(records)
+    strings_start = HEADER.size + count * (record_layout.size + 2 * INDEX.size)
+
+    strings = bytearray()
+    body = bytearray()
+    for food_id, record in zip(encoded_ids, records):
+        name = record.name.encode('utf-8')
+        quantity = record.quantity.encode('utf-8')
+        name_offset = strings_start + len(strings)
+        strings += name
+        quantity_offset = strings_start + len(strings)
+        strings += quantity
+        body += record_layout.pack(food_id, name_offset, len(name), quantity_offset, len(quantity), record.price,
+                                   record.discount, record.stock)
+    numbers = range(count)
+    for order in (sorted(numbers, key=lambda number: encoded_ids[number]),
+                  sorted(numbers, key=lambda number: (records[number].price, records[number].food_id))):
+        body += struct.pack(f"<{count}I", *order)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, count, id_size, *source_signature))
+        file.write(body)
+        file.write(strings)
+    os.replace(temp_path, path)
+
+
+def update_stocks(path, records, previous_signature, source_signature):
+    """
+    Writes new stock values into the existing snapshot in place, without rewriting it.
+
+    Processes that have the snapshot mapped share the changed pages, so they see the new stock immediately.
+
+    Args:
+        path: The path of the snapshot file.
+        records: The FoodRecords whose stock changed.
+        previous_signature: The signature of the food CSV file the snapshot must describe for the update to apply.
+        source_signature: The signature of the food CSV file that now includes the new stock values.
+
+    Returns:
+        True if the snapshot was updated, False if it is missing, describes another version of the food file or
+        lacks one of the records, in which case it must be rewritten.
+
+    """
+    try:
+        file = open(path, 'r+b')
+    except FileNotFoundError:
+        return False
+    with file, mmap.mmap(file.fileno(), 0) as view:
+        snapshot = SnapshotView(view)
+        if snapshot.source_signature != tuple(previous_signature):
+            return False
+        positions = [snapshot.find(record.food_id) for record in records]
+        if None in positions:
+            return False
+        for position, record in zip(positions, records):
+            struct.pack_into("<q", view, snapshot.record_offset(position) + snapshot.id_size + STOCK_OFFSET,
+                             record.stock)
+        struct.pack_into("<qQQ", view, HEADER.size - 24, *source_signature)
+    return True
+
+
+class SnapshotView:
+    """
+    Read access to the records of one mapped snapshot file, decoding only the fields that are asked for.
+    """
+    def __init__(self, view):
+        """
+        Reads the header of a mapped snapshot.
+
+        Args:
+            view: The mmap of the snapshot file.
+
+        Raises:
+            ValueError: If the file is not a food catalog snapshot.
+
+        """
+        magic, self.count, self.id_size, *_ = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a food catalog snapshot.")
+        self.view = view
+        self.record_layout = record_struct(self.id_size)
+        self.id_order_start = HEADER.size + self.count * self.record_layout.size
+        self.price_order_start = self.id_order_start + self.count * INDEX.size
+
+    @property
+    def source_signature(self):
+        """
+        The signature of the food CSV file the snapshot describes, read from the header on every use because
+        update_stocks rewrites it in place.
+        """
+        return tuple(struct.unpack_from("<qQQ", self.view, HEADER.size - 24))
+
+    def record_offset(self, number):
+        """
+        Returns the file offset of a record.
+
+        Args:
+            number: The record number, in catalog order.
+
+        Returns:
+            The byte offset.
+
+        """
+        return HEADER.size + number * self.record_layout.size
+
+    def food_id_at(self, number):
+        """
+        Returns the encoded, NUL-padded food_id of a record without decoding the rest of it.
+
+        Args:
+            number: The record number.
+
+        Returns:
+            The food_id bytes.
+
+        """
+        offset = self.record_offset(number)
+        return self.view[offset:offset + self.id_size]
+
+    def by_id(self, position):
+        """
+        Returns the number of the record at a position of the food_id order.
+        """
+        return INDEX.unpack_from(self.view, self.id_order_start + position * INDEX.size)[0]
+
+    def by_price(self, position):
+        """
+        Returns the number of the record at a position of the (price, food_id) order.
+        """
+        return INDEX.unpack_from(self.view, self.price_order_start + position * INDEX.size)[0]
+
+    def price_key(self, position):
+        """
+        Returns the (price, food_id) key of the record at a position of the price order.
+        """
+        number = self.by_price(position)
+        offset = self.record_offset(number) + self.id_size + PRICE_OFFSET
+        return struct.unpack_from("<q", self.view, offset)[0], self.food_id_at(number).rstrip(b"\0").decode('utf-8')
+
+    def find(self, food_id):
+        """
+        Looks up a food_id with a binary search of the food_id order.
+
+        Args:
+            food_id: The food_id to look up.
+
+        Returns:
+            The record number, or None if the food_id is not in the snapshot.
+
+        """
+        target = str(food_id).encode('utf-8')
+        if len(target) > self.id_size:
+            return None
+        target = target.ljust(self.id_size, b"\0")
+        position = lower_bound(self.count, lambda index: self.food_id_at(self.by_id(index)), target)
+        if position < self.count and self.food_id_at(self.by_id(position)) == target:
+            return self.by_id(position)
+        return None
+
+    def record(self, number):
+        """
+        Decodes one record.
+
+        Args:
+            number: The record number.
+
+        Returns:
+            The FoodRecord.
+
+        """
+        food_id, name_offset, name_length, quantity_offset, quantity_length, price, discount, stock = \
+            self.record_layout.unpack_from(self.view, self.record_offset(number))
+        return FoodRecord(food_id.rstrip(b"\0").decode('utf-8'),
+                          self.view[name_offset:name_offset + name_length].decode('utf-8'),
+                          self.view[quantity_offset:quantity_offset + quantity_length].decode('utf-8'),
+                          price, discount, stock)
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped, read-only view of the binary catalog snapshot written by FoodCatalog.
+
+    The file is mapped rather than read, so all processes on a machine share one copy of it in the page cache and
+    a process only touches the pages its lookups need. Lookups by food_id and by price are binary searches over
+    sorted record numbers stored in the file, and records are decoded one at a time, on demand. When the snapshot
+    is replaced, the view maps the new file on its next use.
+    """
+    def __init__(self, path):
+        """
+        Initializes the view without opening the file.
+
+        Args:
+            path: The path of the snapshot file.
+
+        """
+        self.path = path
+        self.inode = None
+        self.view = None
+
+    def current(self, source_signature):
+        """
+        Returns the mapped snapshot if it was compiled from the given version of the food CSV file.
+
+        Args:
+            source_signature: The current signature of the food CSV file.
+
+        Returns:
+            The SnapshotView, or None if there is no snapshot or it describes another version of the file.
+
+        """
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+        if inode != self.inode:
+            with open(self.path, 'rb') as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = SnapshotView(mapped)
+            self.inode = inode
+        if self.view.source_signature != tuple(source_signature):
+            return None
+        return self.view
+
+
+def iter_records(snapshot):
+    """
+    Decodes every record of a snapshot in catalog order.
+
+    Args:
+        snapshot: The SnapshotView.
+
+    Yields:
+        Each FoodRecord.
+
+    """
+    for number in range(snapshot.count):
+        yield snapshot.record(number)
+
+
+def page(snapshot, cursor_key=None, limit=10, min_price=None, max_price=None, in_stock=False):
+    """
+    Returns one page of food items ordered by price, with the same results as FoodCatalog.page.
+
+    Args:
+        snapshot: The SnapshotView.
+        cursor_key: The (price, food_id) key of the last item of the previous page, or None.
+        limit: The maximum number of items on the page.
+        min_price: The lowest price to include, or None.
+        max_price: The highest price to include, or None.
+        in_stock: Whether to include only items with stock left.
+
+    Returns:
+        A tuple (items, key of the last visited position); the key is None when there are no more items.
+
+    """
+    position = lower_bound(snapshot.count, snapshot.price_key, (min_price, "")) if min_price is not None else 0
+    if cursor_key is not None:
+        position = max(position, upper_bound(snapshot.count, snapshot.price_key, cursor_key))
+
+    items = []
+    while position < snapshot.count and len(items) < limit:
+        key = snapshot.price_key(position)
+        if max_price is not None and key[0] > max_price:
+            return items, None
+        record = snapshot.record(snapshot.by_price(position))
+        if not in_stock or record.stock > 0:
+            items.append(record)
+        position += 1
+    if position >= snapshot.count or (max_price is not None and snapshot.price_key(position)[0] > max_price):
+        return items, None
+    return items, snapshot.price_key(position - 1)
+
+
+def main():
+    """
+    Command line entry point that compiles the snapshot from the food CSV file.
+    """
+    parser = argparse.ArgumentParser(description="Compile the food CSV file into the memory-mapped catalog "
+                                                 "snapshot.")
+    parser.add_argument("--source", default=resource_path(food_database), help="The food CSV file.")
+    parser.add_argument("--output", default=resource_path(catalog_snapshot), help="The snapshot file to write.")
+    args = parser.parse_args()
+
+    from utils.food_catalog import FoodCatalog
+    catalog = FoodCatalog(args.source)
+    records = catalog.all_items()
+    write_snapshot(args.output, records, catalog.signature)
+    print(f"Wrote {len(records)} food items to {args.output} ({os.path.getsize(args.output)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import bisect
+import os
+
+from constants.constant import catalog_change_limit
+
+ADD = "add"
+EDIT = "edit"
+STOCK = "stock"
+REMOVE = "remove"
+RESET = "reset"
+
+
+class ChangeLog:
+    """
+    Append-only log of the changes made to the food catalog, one numbered line per changed food item.
+
+    The number of the last line is the catalog version. Every line holds its version, the kind of change (add,
+    edit, stock, remove, or reset when the changed items were not recorded) and the food_id. The log is only
+    appended to under the catalog's lock, after the food file has been written, so a reader that sees a version
+    finds the changes of that version in the food file.
+
+    Processes read only the lines appended since their last read. Once the log holds more than
+    catalog_change_limit lines, the writer replaces it with its newer half; clients that fall behind the oldest
+    kept version reload the whole catalog instead.
+    """
+    def __init__(self, path, limit=catalog_change_limit):
+        """
+        Initializes the log without reading the file.
+
+        Args:
+            path: Path to the change log file; it is created on the first change.
+            limit: The number of lines that makes the writer drop the older half of the log.
+
+        """
+        self.path = path
+        self.limit = max(2, limit)
+        self.entries = []
+        self.offset = 0
+        self.inode = None
+
+    def read(self):
+        """
+        Reads the lines appended since the last read, starting over if the log was replaced.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.entries, self.offset, self.inode = [], 0, None
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.entries, self.offset, self.inode = [], 0, stat.st_ino
+        if stat.st_size == self.offset:
+            return
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(stat.st_size - self.offset)
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.decode('utf-8').splitlines():
+            version, kind, food_id = line.split(",", 2)
+            self.entries.append((int(version), kind, food_id))
+        self.offset += len(data)
+
+    def version(self):
+        """
+        Returns the current catalog version.
+
+        Returns:
+            The version of the last change, or 0 if nothing was changed yet.
+
+        """
+        self.read()
+        return self.entries[-1][0] if self.entries else 0
+
+    def append(self, changes):
+        """
+        Appends changes to the log, numbering them after the current version. Must be called with the catalog's
+        lock held.
+
+        Args:
+            changes: A list of (kind, food_id) pairs, in the order they were made.
+
+        Returns:
+            The new catalog version.
+
+        """
+        version = self.version()
+        entries = [(version + number, kind, food_id) for number, (kind, food_id) in enumerate(changes, start=1)]
+        data = "".join(f"{entry[0]},{entry[1]},{entry[2]}\n" for entry in entries).encode('utf-8')
+        with open(self.path, 'ab') as file:
+            file.write(data)
+            stat = os.fstat(file.fileno())
+        if stat.st_ino != self.inode or stat.st_size != self.offset + len(data):
+            self.read()
+        else:
+            self.entries.extend(entries)
+            self.offset += len(data)
+        if len(self.entries) > self.limit:
+            self.compact()
+        return self.entries[-1][0]
+
+    def compact(self):
+        """
+        Replaces the log with its newer half. Must be called with the catalog's lock held.
+        """
+        self.entries = self.entries[len(self.entries) - self.limit // 2:]
+        data = "".join(f"{entry[0]},{entry[1]},{entry[2]}\n" for entry in self.entries).encode('utf-8')
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, self.path)
+        self.inode = os.stat(self.path).st_ino
+        self.offset = len(data)
+
+    def since(self, version):
+        """
+        Returns the changes made after a version.
+
+        Args:
+            version: The catalog version the client has.
+
+        Returns:
+            A tuple (current version, list of (kind, food_id) pairs in order), or None if the log no longer reaches
+            back to the version or the version is unknown.
+
+        """
+        self.read()
+        current = self.entries[-1][0] if self.entries else 0
+        if version > current or (self.entries and version < self.entries[0][0] - 1) or \
+                (not self.entries and version != 0):
+            return None
+        start = bisect.bisect_left(self.entries, (version + 1,))
+        return current, [(kind, food_id) for _, kind, food_id in self.entries[start:]]
+
+
+def summarize(version, changes, lookup):
+    """
+    Turns a list of changes into the food items a client has to add, replace or drop.
+
+    An item added and removed again after the client's version is left out, and an item changed several times is
+    reported once, with its current values.
+
+    Args:
+        version: The catalog version the changes lead to.
+        changes: A list of (kind, food_id) pairs, in the order they were made.
+        lookup: A function returning the current FoodRecord of a food_id, or None if it no longer exists.
+
+    Returns:
+        A dictionary with the "version", the "added" and "edited" FoodRecords and the "removed" food_ids, or None
+        if the changes include a reset and the client must reload the whole catalog.
+
+    """
+    first_kinds = {}
+    for kind, food_id in changes:
+        if kind == RESET:
+            return None
+        first_kinds.setdefault(food_id, kind)
+
+    summary = {"version": version, "added": [], "edited": [], "removed": []}
+    for food_id, kind in first_kinds.items():
+        record = lookup(food_id)
+        if record is None:
+            if kind != ADD:
+                summary["removed"].append(food_id)
+        else:
+            summary["added" if kind == ADD else "edited"].append(record)
+    return summary
@@ -1,6 +1,25 @@
 admin_credentials = "admin_database.csv"
 food_database = "food_database.csv"
-five_digit_low = 10000
-five_digit_high = 99999
+food_id_width = 5
+menu_page_size = 10
 user_database = "user_database.csv"
-resources = "resources"
\ No newline at end of file
+resources = "resources"
+order_database = "order_log.csv"
+storage_backend = "csv"
+sqlite_database = "food_app.db"
+food_id_sequence = "food_id_sequence.txt"
+metrics_enabled = False
+metrics_dump = "metrics.prom"
+user_layout = "single"
+user_shard_directory = "user_shards"
+group_commit_window_ms = 5
+group_commit_max_orders = 100
+catalog_snapshot = "food_catalog.snapshot"
+catalog_snapshot_enabled = False
+catalog_change_limit = 10000
+login_attempts = 5
+login_refill_seconds = 30
+login_throttle_size = 10000
+session_lifetime_seconds = 3600
+session_limit = 10000
+legacy_order_rejects = "legacy_order_rejects.csv"
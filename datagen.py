@@ -0,0 +1,256 @@
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import random
+import time
+import uuid
+
+from constants.constant import (admin_credentials, food_database, food_id_sequence, food_id_width, order_database,
+                                user_database)
+from utils.food_record import FOOD_FIELDS
+from utils.order_log import ORDER_FIELDS
+
+USER_FIELDS = ["Full Name", "Phone Number", "Email", "Address", "Password", "Order History"]
+DATASET_FILE = "dataset.json"
+CHUNK_SIZE = 10000
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Kavya", "Rohan", "Ananya", "Vivaan", "Meera", "Arjun", "Saanvi"]
+LAST_NAMES = ["Sharma", "Iyer", "Patel", "Reddy", "Nair", "Gupta", "Das", "Khan", "Singh", "Menon"]
+CITIES = ["Bengaluru", "Chennai", "Mumbai", "Pune", "Hyderabad", "Kochi", "Delhi", "Kolkata"]
+FLAVOURS = ["Spicy", "Crispy", "Butter", "Garlic", "Paneer", "Chicken", "Masala", "Tandoori", "Veg", "Mutton",
+            "Cheese", "Smoked", "Honey", "Lemon", "Schezwan", "Malai"]
+DISHES = ["Biryani", "Naan", "Pizza", "Burger", "Noodles", "Dosa", "Idli", "Curry", "Wrap", "Kebab", "Salad",
+          "Soup", "Fried Rice", "Roll", "Tikka", "Pulao"]
+PORTIONS = ["1 plate", "2 pieces", "4 pieces", "250gm", "500gm", "300ml", "1 bowl", "6 pieces"]
+
+
+def user_email(number):
+    """
+    Returns the email of a generated user.
+
+    Args:
+        number: The number of the user, starting at 0.
+
+    Returns:
+        The email address.
+
+    """
+    return f"user{number}@example.com"
+
+
+def user_password(number):
+    """
+    Returns the password of a generated user.
+
+    Args:
+        number: The number of the user, starting at 0.
+
+    Returns:
+        The password.
+
+    """
+    return f"Password{number}"
+
+
+def food_id(number):
+    """
+    Returns the food_id of a generated food item.
+
+    Args:
+        number: The number of the food item, starting at 0.
+
+    Returns:
+        The food_id, using the configured food ID width.
+
+    """
+    return str(10 ** (food_id_width - 1) + number)
+
+
+def write_rows(path, fieldnames, rows):
+    """
+    Writes a CSV file with a header from a stream of rows, in chunks.
+
+    Args:
+        path: The file to write.
+        fieldnames: The header row.
+        rows: An iterable of rows, each a list of values.
+
+    """
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(fieldnames)
+        while True:
+            chunk = list(itertools.islice(rows, CHUNK_SIZE))
+            if not chunk:
+                return
+            writer.writerows(chunk)
+
+
+def generate_users(count, rng, legacy_orders, foods):
+    """
+    Generates user rows in the user database format.
+
+    Args:
+        count: The number of users.
+        rng: The random.Random to use.
+        legacy_orders: The number of legacy "Order History" entries per user.
+        foods: The number of generated food items, used for legacy entries.
+
+    Yields:
+        Each user row.
+
+    """
+    start = datetime.datetime(2023, 1, 1)
+    for number in range(count):
+        history = ""
+        for _ in range(legacy_orders):
+            dish = rng.randrange(foods)
+            ordered_at = start + datetime.timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            history += (f"\n Food: {food_name(dish)} - INR {food_price(dish)} - "
+                        f"Order date: {ordered_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        yield [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+               str(rng.randrange(6000000000, 9999999999)),
+               user_email(number),
+               f"{rng.randrange(1, 999)} {rng.choice(['MG Road', 'Park Street', 'Anna Salai', 'Link Road'])}, "
+               f"{rng.choice(CITIES)}",
+               user_password(number),
+               history]
+
+
+def food_name(number):
+    """
+    Returns the name of a generated food item; names repeat like on a real menu, with a number to tell them apart.
+
+    Args:
+        number: The number of the food item, starting at 0.
+
+    Returns:
+        The name.
+
+    """
+    return f"{FLAVOURS[number % len(FLAVOURS)]} {DISHES[number // len(FLAVOURS) % len(DISHES)]} {number}"
+
+
+def food_price(number):
+    """
+    Returns the price of a generated food item.
+
+    Args:
+        number: The number of the food item, starting at 0.
+
+    Returns:
+        The price in INR.
+
+    """
+    return 40 + (number * 37) % 460
+
+
+def generate_foods(count, rng):
+    """
+    Generates food rows in the food database format.
+
+    Args:
+        count: The number of food items.
+        rng: The random.Random to use.
+
+    Yields:
+        Each food row.
+
+    """
+    for number in range(count):
+        yield [food_id(number), food_name(number), rng.choice(PORTIONS), str(food_price(number)),
+               str(rng.choice([0, 0, 5, 10, 15])), str(rng.randrange(0, 200))]
+
+
+def generate_orders(count, rng, users, foods):
+    """
+    Generates order log rows; every order has one to three lines sharing an order ID and timestamp.
+
+    Args:
+        count: The number of order lines.
+        rng: The random.Random to use.
+        users: The number of generated users.
+        foods: The number of generated food items.
+
+    Yields:
+        Each order log row, in ORDER_FIELDS order.
+
+    """
+    start = datetime.datetime(2024, 1, 1)
+    lines = 0
+    while lines < count:
+        order_id = uuid.UUID(int=rng.getrandbits(128)).hex
+        email = user_email(rng.randrange(users))
+        timestamp = (start + datetime.timedelta(seconds=rng.randrange(730 * 24 * 3600))).strftime("%Y-%m-%d %H:%M:%S")
+        for dish in rng.sample(range(foods), min(foods, rng.randint(1, 3), count - lines)):
+            yield [order_id, email, food_id(dish), rng.randint(1, 4), food_price(dish), timestamp]
+            lines += 1
+
+
+def generate_dataset(directory, users, foods, orders, legacy_orders=0, seed=0):
+    """
+    Writes a complete synthetic dataset in the app's CSV formats, streaming every file.
+
+    Args:
+        directory: The directory to write into; it is created if needed.
+        users: The number of users.
+        foods: The number of food items.
+        orders: The number of order lines.
+        legacy_orders: The number of legacy "Order History" entries per user.
+        seed: The random seed; the same arguments and seed always produce the same dataset.
+
+    Returns:
+        The dataset description that is also saved as dataset.json.
+
+    """
+    if foods > 9 * 10 ** (food_id_width - 1):
+        raise ValueError(f"{foods} food items do not fit in {food_id_width}-digit food IDs. "
+                         f"Increase food_id_width in constants/constant.py.")
+    if foods < 1 or users < 1:
+        raise ValueError("A dataset needs at least one user and one food item.")
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+
+    write_rows(os.path.join(directory, admin_credentials), ["Login", "Password"], iter([["Admin", "Admin@123"]]))
+    write_rows(os.path.join(directory, food_database), FOOD_FIELDS, generate_foods(foods, rng))
+    write_rows(os.path.join(directory, user_database), USER_FIELDS,
+               generate_users(users, rng, legacy_orders, foods))
+    write_rows(os.path.join(directory, order_database), ORDER_FIELDS, generate_orders(orders, rng, users, foods))
+    with open(os.path.join(directory, food_id_sequence), 'w') as file:
+        file.write(food_id(foods))
+
+    dataset = {"users": users, "foods": foods, "orders": orders, "legacy_orders": legacy_orders, "seed": seed,
+               "food_id_width": food_id_width, "seconds": round(time.perf_counter() - start, 3)}
+    with open(os.path.join(directory, DATASET_FILE), 'w') as file:
+        json.dump(dataset, file, indent=2)
+    return dataset
+
+
+def main():
+    """
+    Command line entry point for the synthetic data generator.
+    """
+    parser = argparse.ArgumentParser(description="Generate synthetic users, food items and orders in the app's "
+                                                 "CSV formats.")
+    parser.add_argument("directory", help="Directory to write the dataset into.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--foods", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000, help="Number of order lines in the order log.")
+    parser.add_argument("--legacy-orders", type=int, default=0,
+                        help="Legacy \"Order History\" entries per user.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        dataset = generate_dataset(args.directory, args.users, args.foods, args.orders, args.legacy_orders, args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Generated {dataset['users']} users, {dataset['foods']} food items and {dataset['orders']} order lines "
+          f"in {args.directory} in {dataset['seconds']:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive lock shared by threads and processes, held on a sidecar lock file.
+
+    The lock is re-entrant within a thread. The lock file also stores a write generation counter. A writer bumps it
+    while holding the lock, so other processes can tell that their cached copy of the protected file is stale even
+    when its modification time and size did not change.
+    """
+    def __init__(self, lock_path):
+        """
+        Initializes the lock without opening the lock file.
+
+        Args:
+            lock_path: Path to the lock file; it is created on first use.
+
+        """
+        self.lock_path = lock_path
+        self.thread_lock = threading.RLock()
+        self.file = None
+        self.depth = 0
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.file = open(self.lock_path, 'a+b')
+                if fcntl is not None:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+                else:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.file.close()
+            self.file = None
+        self.thread_lock.release()
+
+    def generation(self):
+        """
+        Reads the write generation counter. The lock must be held.
+
+        Returns:
+            The current generation, 0 if nothing was written under the lock yet.
+
+        """
+        self.file.seek(0)
+        content = self.file.read().strip()
+        return int(content) if content else 0
+
+    def bump_generation(self):
+        """
+        Increments the write generation counter. The lock must be held.
+
+        Returns:
+            The new generation.
+
+        """
+        generation = self.generation() + 1
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(str(generation).encode())
+        self.file.flush()
+        return generation
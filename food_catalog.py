@@ -0,0 +1,693 @@
+import bisect
+import contextlib
+import csv
+import operator
+import os
+
+from constants.constant import catalog_snapshot, catalog_snapshot_enabled, food_database
+from utils import catalog_snapshot as snapshots
+from utils.change_log import ADD, EDIT, REMOVE, RESET, STOCK, ChangeLog, summarize
+from utils.file_lock import FileLock
+from utils.food_record import FOOD_FIELDS, FoodRecord
+from utils.menu_search import MenuSearchIndex
+from utils.metrics import metrics
+from utils.paths import resource_path
+from utils.pricing import effective_price, repriced
+
+
+def index_key(record):
+    """
+    Returns the sort key of a food item in the price index.
+
+    Args:
+        record: The FoodRecord.
+
+    Returns:
+        A (price, food_id) tuple.
+
+    """
+    return record.price, record.food_id
+
+
+def encode_cursor(key):
+    """
+    Encodes a price index key as an opaque page cursor.
+
+    Args:
+        key: A (price, food_id) tuple.
+
+    Returns:
+        The cursor string.
+
+    """
+    return f"{key[0]}:{key[1]}"
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a page cursor back into a price index key.
+
+    Args:
+        cursor: The cursor string.
+
+    Returns:
+        A (price, food_id) tuple.
+
+    """
+    price, _, food_id = str(cursor).partition(":")
+    return int(price), food_id
+
+
+class FoodCatalog:
+    """
+    In-memory cache of the food database, shared by the admin and user functions.
+
+    The CSV file is parsed once into FoodRecords, kept in a dictionary keyed by food_id. Every read checks the
+    file's modification time, size and inode and reloads the cache only when the file was changed outside this
+    process.
+    Writes made through the catalog update the cache in place, so they never trigger a reload.
+
+    All writes hold a cross-process lock on the food file and re-validate the cache against the lock's write
+    generation first, so concurrent writers never overwrite each other's changes. Every write is also recorded in a
+    change log next to the food file, whose length is the catalog version, so clients can fetch only the items
+    changed since the version they have.
+
+    With a snapshot path, every write also keeps a memory-mapped binary snapshot of the catalog up to date: admin
+    changes rewrite it atomically and orders update the stock in place. Lookups, listings and menu pages are served
+    from the snapshot whenever it describes the current CSV file, so reader processes share one copy of the catalog
+    instead of each parsing their own.
+    """
+    def __init__(self, csv_path, snapshot_path=None):
+        """
+        Initializes the catalog without reading the file; it is loaded on first use.
+
+        Args:
+            csv_path: Path to the food CSV file.
+            snapshot_path: Path to the binary catalog snapshot, or None to keep no snapshot.
+
+        """
+        self.csv_path = csv_path
+        self.fieldnames = []
+        self.items = {}
+        self.signature = None
+        self.lock = FileLock(csv_path + ".lock")
+        self.generation = None
+        self.price_index = None
+        self.search_index = None
+        self.price_table = None
+        self.deferred = 0
+        self.dirty = False
+        self.snapshot_path = snapshot_path
+        self.snapshot = None if snapshot_path is None else snapshots.CatalogSnapshot(snapshot_path)
+        self.change_log = ChangeLog(csv_path + ".changes")
+        self.pending_changes = []
+
+    def file_signature(self):
+        """
+        Returns the signature used to detect changes to the food CSV file.
+
+        Returns:
+            A tuple of the file's modification time in nanoseconds, its size in bytes and its inode.
+
+        """
+        stat = os.stat(self.csv_path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def refresh(self):
+        """
+        Reloads the cache if the food CSV file changed since it was last read or written.
+        """
+        if self.signature != self.file_signature():
+            self.reload()
+
+    def refresh_for_write(self):
+        """
+        Reloads the cache if the food CSV file changed, including writes by other processes that left its
+        modification time and size unchanged. Must be called with the lock held.
+        """
+        generation = self.lock.generation()
+        if generation != self.generation or self.signature != self.file_signature():
+            self.reload()
+        self.generation = generation
+
+    def reload(self):
+        """
+        Parses the whole food CSV file into the cache.
+        """
+        with open(self.csv_path, 'r', newline='') as file:
+            stat = os.fstat(file.fileno())
+            reader = csv.reader(file)
+            self.fieldnames = next(reader, FOOD_FIELDS)
+            columns = operator.itemgetter(*[self.fieldnames.index(field) for field in FOOD_FIELDS])
+            records = (FoodRecord(*columns(row)) for row in reader if row)
+            self.items = {record.food_id: record for record in records}
+        self.signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        metrics.count_io(read=stat.st_size)
+        self.price_index = None
+        self.search_index = None
+        self.price_table = None
+
+    def mapped_snapshot(self):
+        """
+        Returns the snapshot if reads can be served from it: it describes the current version of the CSV file and
+        this process holds no deferred updates that are not written yet. A process that had to load the CSV file
+        while the snapshot was behind goes back to it as soon as it has caught up.
+
+        Returns:
+            The SnapshotView, or None.
+
+        """
+        if self.snapshot is None or self.deferred or self.dirty:
+            return None
+        return self.snapshot.current(self.file_signature())
+
+    def all_items(self):
+        """
+        Returns all food items in file order.
+
+        Returns:
+            A list of the cached FoodRecords.
+
+        """
+        snapshot = self.mapped_snapshot()
+        if snapshot is not None:
+            return list(snapshots.iter_records(snapshot))
+        self.refresh()
+        return list(self.items.values())
+
+    def get(self, food_id):
+        """
+        Retrieves a cached food item by its ID.
+
+        Args:
+            food_id: The food_id of the food item.
+
+        Returns:
+            The cached FoodRecord, or None if not found.
+
+        """
+        snapshot = self.mapped_snapshot()
+        if snapshot is not None:
+            number = snapshot.find(food_id)
+            return None if number is None else snapshot.record(number)
+        self.refresh()
+        return self.items.get(str(food_id))
+
+    def contains(self, food_id):
+        """
+        Checks if a food item with the given ID exists.
+
+        Args:
+            food_id: The food_id to check.
+
+        Returns:
+            True if the food item exists, False otherwise.
+
+        """
+        snapshot = self.mapped_snapshot()
+        if snapshot is not None:
+            return snapshot.find(food_id) is not None
+        self.refresh()
+        return str(food_id) in self.items
+
+    def ids(self):
+        """
+        Returns the set of food IDs currently in the catalog.
+
+        Returns:
+            A set of food_id strings.
+
+        """
+        self.refresh()
+        return set(self.items)
+
+    def sorted_index(self):
+        """
+        Returns the (price, food_id) index of the catalog, sorted ascending, building it on first use.
+
+        Returns:
+            A sorted list of (price, food_id) keys.
+
+        """
+        self.refresh()
+        if self.price_index is None:
+            self.price_index = sorted(index_key(record) for record in self.items.values())
+        return self.price_index
+
+    def name_index(self):
+        """
+        Returns the name search index of the catalog, building it on first use.
+
+        Returns:
+            The MenuSearchIndex.
+
+        """
+        self.refresh()
+        if self.search_index is None:
+            self.search_index = MenuSearchIndex()
+            for record in self.items.values():
+                self.search_index.add(record.food_id, record.name)
+        return self.search_index
+
+    def effective_prices(self):
+        """
+        Returns the discounted unit price of every food item, computing the table on first use.
+
+        The table is kept up to date by every write made through the catalog, so pricing a cart is a dictionary
+        lookup per item.
+
+        Returns:
+            A dictionary mapping each food_id to its effective unit price in INR.
+
+        """
+        self.refresh()
+        if self.price_table is None:
+            self.price_table = {record.food_id: effective_price(record.price, record.discount)
+                                for record in self.items.values()}
+        return self.price_table
+
+    def search(self, query, limit=10):
+        """
+        Returns the food items whose names best match a query, using the name search index.
+
+        Args:
+            query: The search text.
+            limit: The maximum number of results.
+
+        Returns:
+            The list of matching FoodRecords, best match first.
+
+        """
+        return [self.items[food_id] for food_id in self.name_index().search(query, limit)]
+
+    def index_add(self, record):
+        """
+        Adds a food item to the sorted price index, the name search index and the effective price table, if they
+        have been built.
+
+        Args:
+            record: The FoodRecord.
+
+        """
+        if self.price_index is not None:
+            bisect.insort(self.price_index, index_key(record))
+        if self.search_index is not None:
+            self.search_index.add(record.food_id, record.name)
+        if self.price_table is not None:
+            self.price_table[record.food_id] = effective_price(record.price, record.discount)
+
+    def index_discard(self, record):
+        """
+        Removes a food item from the sorted price index, the name search index and the effective price table, if
+        they have been built.
+
+        Args:
+            record: The FoodRecord.
+
+        """
+        if self.search_index is not None:
+            self.search_index.remove(record.food_id)
+        if self.price_table is not None:
+            self.price_table.pop(record.food_id, None)
+        if self.price_index is not None:
+            key = index_key(record)
+            position = bisect.bisect_left(self.price_index, key)
+            if position < len(self.price_index) and self.price_index[position] == key:
+                del self.price_index[position]
+
+    def page(self, cursor=None, limit=10, min_price=None, max_price=None, in_stock=False):
+        """
+        Returns one page of food items ordered by price, using the sorted price index.
+
+        The page starts with a binary search, so its cost does not depend on the catalog size. Only items skipped by
+        the in-stock filter are visited in addition to the page itself.
+
+        Args:
+            cursor: The cursor returned with the previous page, or None for the first page.
+            limit: The maximum number of items on the page.
+            min_price: The lowest price to include, or None.
+            max_price: The highest price to include, or None.
+            in_stock: Whether to include only items with stock left.
+
+        Returns:
+            A tuple (items, next cursor); the cursor is None when there are no more items.
+
+        """
+        snapshot = self.mapped_snapshot()
+        if snapshot is not None:
+            items, key = snapshots.page(snapshot, None if cursor is None else decode_cursor(cursor), limit, min_price,
+                                        max_price, in_stock)
+            return items, None if key is None else encode_cursor(key)
+
+        index = self.sorted_index()
+        position = bisect.bisect_left(index, (min_price, "")) if min_price is not None else 0
+        if cursor is not None:
+            position = max(position, bisect.bisect_right(index, decode_cursor(cursor)))
+
+        items = []
+        while position < len(index) and len(items) < limit:
+            price, food_id = index[position]
+            if max_price is not None and price > max_price:
+                return items, None
+            record = self.items[food_id]
+            if not in_stock or record.stock > 0:
+                items.append(record)
+            position += 1
+        if position >= len(index) or (max_price is not None and index[position][0] > max_price):
+            return items, None
+        return items, encode_cursor(index[position - 1])
+
+    def append(self, record):
+        """
+        Appends a new food item to the CSV file and adds it to the cache. Inside deferred_writes the item is only
+        added to the cache and written, and its change published, with the other deferred updates.
+
+        Args:
+            record: The food item dictionary, keyed by the CSV column names.
+
+        """
+        record = FoodRecord.from_dict(record)
+        with self.lock:
+            self.refresh_for_write()
+            if not self.deferred:
+                with open(self.csv_path, 'a', newline='') as file:
+                    start = file.tell()
+                    writer = csv.DictWriter(file, fieldnames=self.fieldnames)
+                    writer.writerow(record)
+                    metrics.count_io(written=file.tell() - start)
+            self.items[record.food_id] = record
+            self.index_add(record)
+            self.note_changes(ADD, [record.food_id])
+            if self.deferred:
+                self.dirty = True
+                return
+            previous_signature, self.signature = self.signature, self.file_signature()
+            self.generation = self.lock.bump_generation()
+            self.publish_changes(previous_signature)
+
+    def append_many(self, records):
+        """
+        Appends food items streamed from an iterable to the CSV file in a single pass, holding the lock once.
+
+        The records are not kept in memory; the cache is invalidated instead and reloaded on the next read. Either
+        every record is appended or none is: if writing fails or the iterable raises, the file is truncated back to
+        its previous size before the error is passed on.
+
+        Args:
+            records: An iterable of food item dictionaries, keyed by the CSV column names.
+
+        Returns:
+            The number of food items appended.
+
+        """
+        count = 0
+        with self.lock:
+            self.flush()
+            self.refresh_for_write()
+            start = None
+            try:
+                with open(self.csv_path, 'a', newline='') as file:
+                    start = file.tell()
+                    writer = csv.DictWriter(file, fieldnames=self.fieldnames)
+                    for record in records:
+                        writer.writerow(record)
+                        count += 1
+                    metrics.count_io(written=file.tell() - start)
+            except BaseException:
+                if start is not None:
+                    with open(self.csv_path, 'r+b') as file:
+                        file.truncate(start)
+                raise
+            finally:
+                self.invalidate()
+                self.generation = self.lock.bump_generation()
+                self.note_changes(RESET, [""])
+                if self.snapshot_path is not None:
+                    self.reload()
+                self.publish_changes(None)
+        return count
+
+    def replace(self, record):
+        """
+        Replaces an existing food item and rewrites the CSV file from the cache.
+
+        Args:
+            record: The updated food item dictionary, keyed by the CSV column names.
+
+        Returns:
+            True if the food item existed and was replaced, False otherwise.
+
+        """
+        record = FoodRecord.from_dict(record)
+        with self.lock:
+            self.refresh_for_write()
+            if record.food_id not in self.items:
+                return False
+            self.index_discard(self.items[record.food_id])
+            self.items[record.food_id] = record
+            self.index_add(record)
+            self.note_changes(EDIT, [record.food_id])
+            self.write()
+        return True
+
+    def remove(self, food_id):
+        """
+        Removes a food item and rewrites the CSV file from the cache.
+
+        Args:
+            food_id: The food_id of the food item to remove.
+
+        Returns:
+            True if the food item existed and was removed, False otherwise.
+
+        """
+        with self.lock:
+            self.refresh_for_write()
+            record = self.items.pop(str(food_id), None)
+            if record is None:
+                return False
+            self.index_discard(record)
+            self.note_changes(REMOVE, [record.food_id])
+            self.write()
+        return True
+
+    def decrement_stocks(self, quantities):
+        """
+        Atomically takes the given quantities out of several food items' stock if all of them are available.
+
+        The checks and the single rewrite happen under the lock against the latest file contents, so concurrent
+        orders can neither oversell nor lose each other's decrements. Nothing is written if any item falls short.
+
+        Args:
+            quantities: A dictionary mapping each food_id to the number of units to take.
+
+        Returns:
+            A tuple (updated items, shortages). On success, updated items maps each food_id to its updated
+            FoodRecord and shortages is empty. Otherwise updated items is None and shortages maps each
+            food_id that cannot be served to its available stock.
+
+        """
+        with self.lock:
+            self.refresh_for_write()
+            updated_items = {}
+            shortages = {}
+            for food_id, quantity in quantities.items():
+                record = self.items.get(str(food_id))
+                stock = record.stock if record else 0
+                if record is None or stock < quantity:
+                    shortages[str(food_id)] = stock
+                else:
+                    updated_items[str(food_id)] = record.copy(stock=stock - quantity)
+            if shortages:
+                return None, shortages
+            self.items.update(updated_items)
+            self.note_changes(STOCK, updated_items)
+            self.write()
+        return updated_items, {}
+
+    def reprice(self, min_price=None, max_price=None, discount=None, price_change=None):
+        """
+        Sets the discount or changes the price of every food item in a price range, with a single rewrite.
+
+        The items in the range are found with a binary search of the sorted price index, so only they are visited.
+
+        Args:
+            min_price: The lowest current price to include, or None.
+            max_price: The highest current price to include, or None.
+            discount: The discount to set in percent, or None to keep each item's discount.
+            price_change: The percentage to change each price by, e.g. -10, or None to keep the prices.
+
+        Returns:
+            The number of food items changed.
+
+        """
+        with self.lock:
+            self.refresh_for_write()
+            index = self.sorted_index()
+            start = bisect.bisect_left(index, (min_price, "")) if min_price is not None else 0
+            end = bisect.bisect_right(index, (max_price, chr(0x10FFFF))) if max_price is not None else len(index)
+            changed = []
+            for _, food_id in index[start:end]:
+                record = self.items[food_id]
+                price, new_discount = repriced(record.price, record.discount, discount, price_change)
+                if (price, new_discount) != (record.price, record.discount):
+                    self.items[food_id] = record.copy(price=price, discount=new_discount)
+                    if self.price_table is not None:
+                        self.price_table[food_id] = effective_price(price, new_discount)
+                    changed.append(food_id)
+            if changed:
+                if price_change is not None:
+                    self.price_index = None
+                self.note_changes(EDIT, changed)
+                self.write()
+        return len(changed)
+
+    @contextlib.contextmanager
+    def deferred_writes(self):
+        """
+        Holds the lock for a block of updates and rewrites the CSV file once, when the block ends, instead of after
+        every update.
+
+        The cache is updated as usual, so reads inside the block see every change. Other processes wait for the
+        lock until the block ends or flush is called. If the outermost block raises, the updates that were not
+        flushed yet are discarded instead of written, and the cache is reloaded from the file on its next use.
+        """
+        with self.lock:
+            self.deferred += 1
+            try:
+                yield self
+            except BaseException:
+                self.deferred -= 1
+                if self.deferred == 0 and self.dirty:
+                    self.invalidate()
+                raise
+            self.deferred -= 1
+            if self.deferred == 0:
+                self.flush()
+
+    def invalidate(self):
+        """
+        Drops the cache and every unwritten update, so the next read reloads the CSV file. Must be called with the
+        lock held.
+        """
+        self.items = {}
+        self.signature = None
+        self.price_index = None
+        self.search_index = None
+        self.price_table = None
+        self.dirty = False
+        self.pending_changes = []
+
+    def flush(self, sync=False):
+        """
+        Writes the updates deferred by deferred_writes to the CSV file now.
+
+        Args:
+            sync: Whether to fsync the new file before it replaces the old one.
+
+        """
+        with self.lock:
+            if self.dirty:
+                self.write_file(sync)
+
+    def write(self):
+        """
+        Persists the cache after an update, or marks it for the end of the deferred_writes block. Must be called with
+        the lock held.
+        """
+        if self.deferred:
+            self.dirty = True
+        else:
+            self.write_file()
+
+    def write_file(self, sync=False):
+        """
+        Writes the cache to a temporary file and atomically replaces the food CSV file with it. Must be called with
+        the lock held.
+
+        Args:
+            sync: Whether to fsync the temporary file before it replaces the food CSV file.
+
+        """
+        temp_csv_path = self.csv_path + ".tmp"
+        with open(temp_csv_path, 'w', newline='') as temp_file:
+            writer = csv.writer(temp_file)
+            writer.writerow(self.fieldnames)
+            writer.writerows(map(operator.attrgetter(*self.fieldnames), self.items.values()))
+            metrics.count_io(written=temp_file.tell())
+            if sync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_csv_path, self.csv_path)
+        previous_signature, self.signature = self.signature, self.file_signature()
+        self.generation = self.lock.bump_generation()
+        self.dirty = False
+        self.publish_changes(previous_signature)
+
+    def note_changes(self, kind, food_ids):
+        """
+        Records changes to be published with the next write of the CSV file.
+
+        Args:
+            kind: The kind of change, one of the change_log kinds.
+            food_ids: The food_ids of the changed items.
+
+        """
+        self.pending_changes.extend((kind, food_id) for food_id in food_ids)
+
+    def publish_changes(self, previous_signature):
+        """
+        Appends the changes written to the CSV file to the change log and brings the snapshot up to date, updating
+        the stock in place if nothing else changed and rewriting it otherwise. Must be called with the lock held,
+        after the CSV file was written. The snapshot is built from the cache and stamped with the file's signature,
+        so while the cache holds deferred updates that are not in the file yet, nothing is published and the
+        changes stay pending until write_file.
+
+        Args:
+            previous_signature: The signature of the CSV file before the write, or None if unknown.
+
+        """
+        if self.dirty:
+            return
+        changes, self.pending_changes = self.pending_changes, []
+        if changes:
+            self.change_log.append(changes)
+        if self.snapshot_path is None:
+            return
+        if previous_signature is not None and all(kind == STOCK for kind, _ in changes):
+            records = [self.items[food_id] for food_id in dict.fromkeys(food_id for _, food_id in changes)
+                       if food_id in self.items]
+            if snapshots.update_stocks(self.snapshot_path, records, previous_signature, self.signature):
+                return
+        snapshots.write_snapshot(self.snapshot_path, list(self.items.values()), self.signature)
+
+    def version(self):
+        """
+        Returns the catalog version, which every write published to the CSV file increases.
+
+        Returns:
+            The version, 0 if the catalog was never changed through the app.
+
+        """
+        return self.change_log.version()
+
+    def changes_since(self, version):
+        """
+        Returns the food items added, edited and removed since a catalog version, reading only the new changes.
+
+        Args:
+            version: The catalog version the client has.
+
+        Returns:
+            A dictionary with the new "version", the "added" and "edited" FoodRecords and the "removed" food_ids,
+            or None if the changes are no longer known and the client must reload the whole catalog.
+
+        """
+        changes = self.change_log.since(version)
+        if changes is None:
+            return None
+        return summarize(changes[0], changes[1], self.get)
+
+
+food_catalog = FoodCatalog(resource_path(food_database),
+                           resource_path(catalog_snapshot) if catalog_snapshot_enabled else None)
@@ -0,0 +1,134 @@
+import os
+
+from utils.file_lock import FileLock
+
+
+class FoodIdExhaustedError(Exception):
+    """
+    Raised when every food ID of the configured width has been allocated.
+    """
+
+
+def free_food_ids(existing_ids, width, next_id=None):
+    """
+    Finds the largest block of consecutive unused food IDs of the width, the lowest one on a tie. Older catalogs
+    have random IDs spread over the whole width, so the block above the highest ID can be much smaller than the
+    free blocks between them.
+
+    Args:
+        existing_ids: The food IDs already in use.
+        width: The number of digits of a food ID.
+        next_id: The next ID of the current sequence, if any. The IDs below it in its block were allocated already
+            and are treated as used, since they may not be saved yet.
+
+    Returns:
+        The range of free IDs; empty if every ID is in use.
+
+    """
+    lowest_id = 10 ** (width - 1)
+    used_ids = sorted({int(food_id) for food_id in existing_ids
+                       if str(food_id).isdigit() and lowest_id <= int(food_id) < 10 ** width})
+    best = range(lowest_id, lowest_id)
+    start = lowest_id
+    for food_id in used_ids + [10 ** width]:
+        if next_id is not None and start < next_id <= food_id:
+            start = next_id
+        if food_id - start > len(best):
+            best = range(start, food_id)
+        start = food_id + 1
+    return best
+
+
+def next_food_ids(sequence, count, existing_ids, width):
+    """
+    Takes a block of food IDs from a sequence. A sequence hands out the IDs of one free block in order; when the
+    block has fewer than count IDs left, the sequence moves to the largest free block of the width.
+
+    Args:
+        sequence: The (next ID, limit) of the sequence, the limit being the first ID past its block, or None for a
+            new sequence.
+        count: The number of IDs to allocate.
+        existing_ids: Callable returning the food IDs in use; only called to find a new block.
+        width: The number of digits of a food ID.
+
+    Returns:
+        A tuple (allocated IDs, sequence), with the range of allocated IDs and the sequence to store for the next
+        allocation.
+
+    Raises:
+        FoodIdExhaustedError: If no free block has count IDs.
+
+    """
+    next_id, limit = sequence if sequence is not None else (None, None)
+    if next_id is None or next_id + count > limit:
+        block = free_food_ids(existing_ids(), width, next_id)
+        if len(block) < count:
+            raise FoodIdExhaustedError(
+                f"Cannot allocate {count} food ID(s): the largest block of unused {width}-digit IDs has only "
+                f"{len(block)} left. Increase food_id_width in constants/constant.py.")
+        next_id, limit = block.start, block.stop
+    food_ids = range(next_id, next_id + count)
+    return food_ids, (food_ids.stop, limit)
+
+
+def read_sequence(sequence_path, width):
+    """
+    Reads a food ID sequence file: the next ID and the limit of its block, separated by a space. Files holding only
+    the next ID, as written by earlier versions, run up to the highest ID of the width.
+
+    Args:
+        sequence_path: Path to the sequence file.
+        width: The number of digits of a food ID.
+
+    Returns:
+        The (next ID, limit) of the sequence, or None if the file does not exist.
+
+    """
+    if not os.path.exists(sequence_path):
+        return None
+    with open(sequence_path, 'r') as file:
+        values = [int(value) for value in file.read().split()]
+    return values[0], values[1] if len(values) > 1 else 10 ** width
+
+
+class FoodIdAllocator:
+    """
+    Allocates food IDs from a persisted sequence, in O(1) and without scanning the food database.
+
+    The next free ID and the end of its free block are kept in a small sequence file, updated under a cross-process
+    lock. The catalog's IDs are only read to find a free block, when the sequence starts or its block runs out, so
+    sequential IDs never collide with the older random ones.
+    """
+    def __init__(self, sequence_path, width):
+        """
+        Initializes the allocator without reading the sequence file.
+
+        Args:
+            sequence_path: Path to the sequence file; it is created on first allocation.
+            width: The number of digits of a food ID.
+
+        """
+        self.sequence_path = sequence_path
+        self.width = width
+        self.lock = FileLock(sequence_path + ".lock")
+
+    def allocate(self, count, existing_ids):
+        """
+        Allocates a block of consecutive unused food IDs.
+
+        Args:
+            count: The number of IDs to allocate.
+            existing_ids: Callable returning the food IDs in use; only called to find a new free block.
+
+        Returns:
+            The range of allocated IDs.
+
+        """
+        with self.lock:
+            food_ids, sequence = next_food_ids(read_sequence(self.sequence_path, self.width), count, existing_ids,
+                                               self.width)
+            temp_path = self.sequence_path + ".tmp"
+            with open(temp_path, 'w') as file:
+                file.write(f"{sequence[0]} {sequence[1]}")
+            os.replace(temp_path, self.sequence_path)
+        return food_ids
@@ -0,0 +1,195 @@
+FOOD_FIELDS = ["food_id", "name", "quantity", "price", "discount", "stock"]
+NUMERIC_FIELDS = frozenset(["price", "discount", "stock"])
+FIELD_KEYS = dict.fromkeys(FOOD_FIELDS).keys()
+
+
+def parse_number(value):
+    """
+    Parses the digits of a numeric catalog field, ignoring any other characters.
+
+    Args:
+        value: The field value, e.g. "240" or "35 pcs".
+
+    Returns:
+        The number, or 0 if the value has no digits.
+
+    """
+    return int(''.join(filter(str.isdigit, str(value))) or 0)
+
+
+def to_number(value):
+    """
+    Converts a stored price, discount or stock to an integer, with a fast path for clean numbers.
+
+    Args:
+        value: The stored value, as text or a number.
+
+    Returns:
+        The integer value.
+
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return parse_number(value)
+
+
+def validate_number(field, value):
+    """
+    Checks a price, discount or stock entered for a food item: a whole non-negative number, and a discount of at
+    most 100.
+
+    Args:
+        field: The field, "price", "discount" or "stock".
+        value: The entered value, as text or a number.
+
+    Returns:
+        The number.
+
+    Raises:
+        ValueError: If the value is not valid.
+
+    """
+    text = str(value).strip()
+    if not (text.isascii() and text.isdigit()):
+        raise ValueError(f"{field} must be a whole number")
+    number = int(text)
+    if field == "discount" and number > 100:
+        raise ValueError("discount must be between 0 and 100")
+    return number
+
+
+class FoodRecord:
+    """
+    Compact, typed form of a food item, used for the food items held in memory.
+
+    Price, discount and stock are parsed to integers once, when the record is created, and the record has no
+    per-instance dictionary, so a large catalog takes a fraction of the memory of plain dictionaries.
+
+    A record can also be read like the food item dictionaries of the Storage interface: record['price'] and
+    dict(record) return the values as CSV text, keyed by the food_database.csv column names. Code that needs the
+    numbers reads the attributes instead, e.g. record.stock. Records are not modified in place; copy returns a
+    changed record.
+    """
+    __slots__ = ("food_id", "name", "quantity", "price", "discount", "stock")
+
+    def __init__(self, food_id, name, quantity, price, discount, stock):
+        """
+        Initializes the record, converting the numeric fields to integers.
+
+        Args:
+            food_id: The food_id.
+            name: The food item's name.
+            quantity: The portion description, e.g. "250gm".
+            price: The price, as text or a number.
+            discount: The discount in percent, as text or a number.
+            stock: The stock, as text or a number.
+
+        """
+        self.food_id = str(food_id)
+        self.name = name
+        self.quantity = quantity
+        self.price = to_number(price)
+        self.discount = to_number(discount)
+        self.stock = to_number(stock)
+
+    @classmethod
+    def from_dict(cls, record):
+        """
+        Creates a record from a food item dictionary keyed by the CSV column names.
+
+        Args:
+            record: The food item dictionary, or another FoodRecord.
+
+        Returns:
+            The FoodRecord.
+
+        """
+        return cls(record['food_id'], record['name'], record['quantity'], record['price'], record['discount'],
+                   record['stock'])
+
+    def copy(self, **changes):
+        """
+        Returns a copy of the record with some fields changed.
+
+        Args:
+            **changes: The fields to change and their new values.
+
+        Returns:
+            The new FoodRecord.
+
+        """
+        values = {field: getattr(self, field) for field in FOOD_FIELDS}
+        values.update(changes)
+        return FoodRecord(**values)
+
+    def to_dict(self):
+        """
+        Converts the record to a food item dictionary with the values as CSV text.
+
+        Returns:
+            The food item dictionary.
+
+        """
+        return {field: self[field] for field in FOOD_FIELDS}
+
+    def keys(self):
+        """
+        Returns the CSV column names, so that dict(record) and csv.DictWriter accept the record.
+
+        Returns:
+            A keys view of the column names.
+
+        """
+        return FIELD_KEYS
+
+    def __getitem__(self, field):
+        """
+        Returns a field as CSV text.
+
+        Args:
+            field: The CSV column name.
+
+        Returns:
+            The value as a string.
+
+        Raises:
+            KeyError: If the field is not a food item column.
+
+        """
+        if field not in self.__slots__:
+            raise KeyError(field)
+        value = getattr(self, field)
+        return str(value) if field in NUMERIC_FIELDS else value
+
+    def get(self, field, default=None):
+        """
+        Returns a field as CSV text, or a default if the field is not a food item column.
+
+        Args:
+            field: The CSV column name.
+            default: The value returned for an unknown field.
+
+        Returns:
+            The value as a string, or the default.
+
+        """
+        return self[field] if field in self.__slots__ else default
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def __iter__(self):
+        return iter(FOOD_FIELDS)
+
+    def __len__(self):
+        return len(FOOD_FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, FoodRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FOOD_FIELDS)
+
+    def __repr__(self):
+        return (f"FoodRecord(food_id={self.food_id!r}, name={self.name!r}, quantity={self.quantity!r}, "
+                f"price={self.price}, discount={self.discount}, stock={self.stock})")
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from constants.constant import group_commit_max_orders, group_commit_window_ms
+from utils.metrics import instrumented
+
+
+class GroupCommitter:
+    """
+    Collects orders placed close together and commits them to storage as one write batch.
+
+    The first order of a batch starts a timer. The batch is committed when the window has passed or when it holds
+    max_orders orders, whichever comes first, with a single call to the storage's commit_orders, so a burst of
+    orders shares one rewrite of the food file and one sync instead of paying for them per order. Every order is
+    still validated against the stock on its own and its caller gets its own result.
+
+    Batches are committed one at a time, in arrival order, on the given executor. Pass the executor that already
+    runs the other storage calls to keep all storage access on one thread.
+    """
+    def __init__(self, storage, window_ms=group_commit_window_ms, max_orders=group_commit_max_orders,
+                 executor=None):
+        """
+        Initializes the committer.
+
+        Args:
+            storage: The storage the orders are committed to.
+            window_ms: The longest time in milliseconds an order waits for others to join its batch.
+            max_orders: The number of orders that commits a batch without waiting for the window to end.
+            executor: The single-threaded executor that runs the commits; defaults to a private one.
+
+        """
+        self.storage = storage
+        self.window = window_ms / 1000
+        self.max_orders = max(1, max_orders)
+        self.owns_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="group-commit") \
+            if executor is None else executor
+        self.lock = threading.Lock()
+        self.pending = []
+        self.timer = None
+
+    def submit(self, email, quantities, timestamp):
+        """
+        Adds an order to the current batch without waiting for it to be committed.
+
+        Args:
+            email: The email of the user placing the order.
+            quantities: A dictionary mapping each food_id to the number of units ordered.
+            timestamp: The order time, formatted as "%Y-%m-%d %H:%M:%S".
+
+        Returns:
+            A Future resolving to the (orders, shortages) result of Storage.commit_order, or raising the error
+            that made the whole batch fail.
+
+        """
+        future = Future()
+        with self.lock:
+            self.pending.append(((email, quantities, timestamp), future))
+            if len(self.pending) >= self.max_orders:
+                self.dispatch_pending()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.window, self.dispatch)
+                self.timer.daemon = True
+                self.timer.start()
+        return future
+
+    def commit_order(self, email, quantities, timestamp):
+        """
+        Adds an order to the current batch and waits until the batch has been committed.
+
+        Takes the same arguments and returns the same result as Storage.commit_order, so a committer can be used in
+        place of the storage by callers running on many threads.
+        """
+        return self.submit(email, quantities, timestamp).result()
+
+    def dispatch(self):
+        """
+        Hands the current batch to the executor, ending its window early.
+        """
+        with self.lock:
+            self.dispatch_pending()
+
+    def dispatch_pending(self):
+        """
+        Hands the current batch to the executor and starts a new one. Must be called with the lock held.
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            self.executor.submit(self.commit_batch, batch)
+
+    @instrumented("storage.group_commit")
+    def commit_batch(self, batch):
+        """
+        Commits a batch of orders and resolves the future of each.
+
+        Args:
+            batch: A list of ((email, quantities, timestamp), future) pairs.
+
+        """
+        try:
+            results = self.storage.commit_orders([request for request, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            raise
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def close(self):
+        """
+        Commits the pending orders and, if the committer created its executor, waits for it to finish.
+        """
+        self.dispatch()
+        if self.owns_executor:
+            self.executor.shutdown(wait=True)
+
+
+def place_orders(commit_order, requests, clients):
+    """
+    Places orders from several threads at once and times each order.
+
+    Args:
+        commit_order: The function committing one order, taking (email, quantities, timestamp).
+        requests: The orders to place, as (email, quantities, timestamp) tuples.
+        clients: The number of threads placing orders.
+
+    Returns:
+        A tuple (elapsed seconds, list of order latencies in seconds, number of orders accepted).
+
+    """
+    latencies = []
+    accepted = []
+    lock = threading.Lock()
+
+    def client(share):
+        for request in share:
+            start = time.perf_counter()
+            orders, _ = commit_order(*request)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                accepted.append(orders is not None)
+
+    threads = [threading.Thread(target=client, args=(requests[number::clients],)) for number in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, sum(accepted)
+
+
+def order_throughput(directory, backend="csv", orders=2000, clients=50, window_ms=group_commit_window_ms,
+                     max_orders=group_commit_max_orders, seed=0):
+    """
+    Measures order throughput with one commit per order and with group commit, each on a fresh copy of a dataset.
+
+    Both runs place the same single-item orders from the same number of concurrent clients, and both run the storage
+    calls on a single thread, as the HTTP service does.
+
+    Args:
+        directory: The dataset directory written by utils.datagen.
+        backend: "csv" or "sqlite".
+        orders: The number of orders to place in each run.
+        clients: The number of threads placing orders.
+        window_ms: The group commit window in milliseconds.
+        max_orders: The group commit batch size limit.
+        seed: The random seed used to pick users and food items.
+
+    Returns:
+        A dictionary mapping "per_order" and "group_commit" to the orders per second, the median and 99th
+        percentile latency in milliseconds and the number of orders accepted.
+
+    """
+    from utils.benchmark import open_storage
+    from utils.datagen import DATASET_FILE, food_id, user_email
+
+    with open(os.path.join(directory, DATASET_FILE), 'r') as file:
+        dataset = json.load(file)
+    rng = random.Random(seed)
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    requests = [(user_email(rng.randrange(dataset["users"])), {food_id(rng.randrange(dataset["foods"])): 1},
+                 timestamp) for _ in range(orders)]
+
+    report = {}
+    for mode in ("per_order", "group_commit"):
+        work_directory = tempfile.mkdtemp(prefix="food-app-group-commit-")
+        try:
+            shutil.copytree(directory, work_directory, dirs_exist_ok=True)
+            storage = open_storage(backend, work_directory)
+            storage.food_ids()
+            if mode == "per_order":
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    elapsed, latencies, accepted = place_orders(
+                        lambda *request: executor.submit(storage.commit_order, *request).result(), requests, clients)
+            else:
+                committer = GroupCommitter(storage, window_ms, max_orders)
+                try:
+                    elapsed, latencies, accepted = place_orders(committer.commit_order, requests, clients)
+                finally:
+                    committer.close()
+        finally:
+            shutil.rmtree(work_directory, ignore_errors=True)
+        latencies.sort()
+        report[mode] = {
+            "orders_per_second": len(latencies) / elapsed,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+            "accepted": accepted
+        }
+    return report
+
+
+def main():
+    """
+    Command line entry point for the group commit throughput benchmark.
+    """
+    parser = argparse.ArgumentParser(description="Compare order throughput with and without group commit on a "
+                                                 "generated dataset.")
+    parser.add_argument("directory", help="Dataset directory written by python -m utils.datagen.")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--orders", type=int, default=2000, help="Orders placed in each run.")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients placing orders.")
+    parser.add_argument("--window-ms", type=float, default=group_commit_window_ms, help="Group commit window.")
+    parser.add_argument("--max-orders", type=int, default=group_commit_max_orders,
+                        help="Orders that end a group commit window early.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = order_throughput(args.directory, args.backend, max(1, args.orders), max(1, args.clients),
+                              args.window_ms, args.max_orders, args.seed)
+    print(f"{args.backend} backend, {args.orders} orders from {args.clients} concurrent clients")
+    print(f"{'mode':<16}{'orders/s':>11}{'p50 ms':>11}{'p99 ms':>11}{'accepted':>10}")
+    for mode, result in report.items():
+        print(f"{mode:<16}{result['orders_per_second']:>11.1f}{result['p50_ms']:>11.2f}{result['p99_ms']:>11.2f}"
+              f"{result['accepted']:>10}")
+    speedup = report["group_commit"]["orders_per_second"] / report["per_order"]["orders_per_second"]
+    print(f"Group commit: {speedup:.1f}x the throughput of one commit per order.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+import argparse
+import csv
+import datetime
+import os
+import re
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from constants.constant import legacy_order_rejects, user_database
+from utils.paths import resource_path
+from utils.user_index import iter_record_offsets, parse_raw_record, read_raw_record
+
+REJECT_FIELDS = ["offset", "email", "entry", "reason"]
+HISTORY_COLUMN = "Order History"
+EMAIL_COLUMN = "Email"
+LEGACY_ORDER_PREFIX = "legacy-"
+CHUNK_BYTES = 8 * 1024 * 1024
+BLOCK_BYTES = 1024 * 1024
+ENTRY_PATTERN = re.compile(r"\s*Food:\s*(?P<name>.*\S)\s+-\s+INR\s+(?P<price>\d+)\s+-\s+Order date:\s*"
+                           r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})(?:\.\d{1,6})?\s*")
+
+
+class LegacyEntryError(ValueError):
+    """
+    Raised when a line of a legacy order history cannot be parsed into an order.
+    """
+
+
+def parse_entry(line):
+    """
+    Parses one line of a legacy "Order History" column, such as " Food: Truffle - INR 900 - Order date:
+    2023-06-30 01:37:06".
+
+    Leading and trailing whitespace is ignored. Fractional seconds are accepted and dropped, so the timestamp has
+    the same format as the order log's.
+
+    Args:
+        line: The line, without its line break.
+
+    Returns:
+        A tuple (food name, price in INR as an integer, order time as a datetime).
+
+    Raises:
+        LegacyEntryError: If the line is not a legacy order or its order date does not exist.
+
+    """
+    match = ENTRY_PATTERN.fullmatch(line)
+    if match is None:
+        raise LegacyEntryError("Not a legacy order entry.")
+    try:
+        timestamp = datetime.datetime(*map(int, match.groups()[2:]))
+    except ValueError:
+        raise LegacyEntryError("Invalid order date.") from None
+    return match.group("name"), int(match.group("price")), timestamp
+
+
+def history_lines(history):
+    """
+    Splits a legacy "Order History" column into its entries, dropping blank lines.
+
+    The position of an entry in this list is the number its migrated order is tagged with.
+
+    Args:
+        history: The column value, or None.
+
+    Returns:
+        The list of non-blank lines.
+
+    """
+    return [line for line in (history or "").splitlines() if line.strip()]
+
+
+def parse_history(history):
+    """
+    Parses every entry of a legacy "Order History" column.
+
+    Args:
+        history: The column value.
+
+    Yields:
+        A tuple (entry number, line, parsed entry or None, error message or None) for each non-blank line.
+
+    """
+    for number, line in enumerate(history_lines(history)):
+        try:
+            yield number, line, parse_entry(line), None
+        except LegacyEntryError as error:
+            yield number, line, None, str(error)
+
+
+def legacy_order_id(number):
+    """
+    Returns a new order ID for a migrated legacy entry.
+
+    Args:
+        number: The entry number, as counted by history_lines.
+
+    Returns:
+        The order ID, which starts with LEGACY_ORDER_PREFIX and the entry number.
+
+    """
+    return f"{LEGACY_ORDER_PREFIX}{number}-{uuid.uuid4().hex}"
+
+
+def legacy_entry_number(order_id):
+    """
+    Returns the entry number a migrated order was created from.
+
+    Args:
+        order_id: The order ID.
+
+    Returns:
+        The entry number, or None if the order was not migrated from the legacy history.
+
+    """
+    if not order_id.startswith(LEGACY_ORDER_PREFIX):
+        return None
+    number, _, _ = order_id[len(LEGACY_ORDER_PREFIX):].partition("-")
+    return int(number) if number.isdigit() else None
+
+
+def count_legacy_entries(histories):
+    """
+    Counts the entries of legacy "Order History" columns, taking only the first row with a history for each email,
+    as migrate_history does.
+
+    Args:
+        histories: An iterable of (email, column value) pairs, in user order.
+
+    Returns:
+        The number of entries.
+
+    """
+    emails = set()
+    count = 0
+    for email, history in histories:
+        lines = history_lines(history)
+        if lines and email not in emails:
+            emails.add(email)
+            count += len(lines)
+    return count
+
+
+def iter_histories(csv_path):
+    """
+    Streams the email and "Order History" column of every user of a user CSV file.
+
+    Args:
+        csv_path: Path to the user CSV file.
+
+    Yields:
+        An (email, column value) pair per user record that has both columns; nothing if the file does not exist
+        or has no such columns.
+
+    """
+    if not os.path.exists(csv_path):
+        return
+    records = iter_record_offsets(csv_path)
+    header = next(records)
+    if EMAIL_COLUMN not in header or HISTORY_COLUMN not in header:
+        return
+    email_index, history_index = header.index(EMAIL_COLUMN), header.index(HISTORY_COLUMN)
+    for _, fields in records:
+        if len(fields) > max(email_index, history_index):
+            yield fields[email_index], fields[history_index]
+
+
+def read_header(csv_path):
+    """
+    Reads the header of a user CSV file.
+
+    Args:
+        csv_path: Path to the user CSV file.
+
+    Returns:
+        A tuple (header fields, byte offset of the first data record).
+
+    """
+    with open(csv_path, 'rb') as file:
+        header = parse_raw_record(read_raw_record(file))
+        return header, file.tell()
+
+
+def chunk_ranges(csv_path, start, chunk_bytes=CHUNK_BYTES):
+    """
+    Splits the data records of a CSV file into byte ranges of about chunk_bytes that each start and end on a
+    record boundary.
+
+    A record ends at the first line break after which the number of quote characters read since the start of the
+    file is even, so only the quotes have to be counted; the blocks between boundaries are counted with
+    bytes.count and never parsed. The file is read once, a block at a time.
+
+    Args:
+        csv_path: Path to the CSV file.
+        start: The byte offset of the first data record.
+        chunk_bytes: The size a range grows to before it is ended at the next record boundary.
+
+    Yields:
+        Each (start, end) byte range, in file order.
+
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as file:
+        while start < size:
+            target = min(start + max(1, chunk_bytes), size)
+            file.seek(start)
+            quotes = 0
+            while file.tell() < target:
+                quotes += file.read(min(BLOCK_BYTES, target - file.tell())).count(b'"')
+            while True:
+                line = file.readline()
+                quotes += line.count(b'"')
+                if not line or (line.endswith(b"\n") and quotes % 2 == 0):
+                    break
+            end = file.tell()
+            yield start, end
+            start = end
+
+
+def migrate_range(csv_path, start, end, email_index, history_index):
+    """
+    Parses the legacy order histories of the user records in one byte range of a user CSV file.
+
+    Runs in a worker process; the result holds only this range's entries, so its size is bounded by the range.
+
+    Args:
+        csv_path: Path to the user CSV file.
+        start: The byte offset of the first record of the range.
+        end: The byte offset just past the last record of the range.
+        email_index: The position of the "Email" column.
+        history_index: The position of the "Order History" column.
+
+    Returns:
+        A tuple (number of user records, users, reject rows). users holds an (offset, email, entries) tuple for
+        every user with parsed entries, each entry being (entry number, line, food name, price, timestamp). Reject
+        rows are in REJECT_FIELDS order.
+
+    """
+    count = 0
+    users = []
+    rejects = []
+    with open(csv_path, 'rb') as file:
+        file.seek(start)
+        while file.tell() < end:
+            offset = file.tell()
+            raw = read_raw_record(file)
+            if not raw.strip():
+                continue
+            count += 1
+            try:
+                fields = parse_raw_record(raw)
+            except (UnicodeDecodeError, csv.Error):
+                rejects.append([offset, "", raw.decode('utf-8', 'replace').strip(), "Unreadable user record."])
+                continue
+            if len(fields) <= max(email_index, history_index):
+                email = fields[email_index] if len(fields) > email_index else ""
+                rejects.append([offset, email, ",".join(fields), "Missing columns."])
+                continue
+            email = fields[email_index]
+            entries = []
+            for number, line, entry, error in parse_history(fields[history_index]):
+                if entry is None:
+                    rejects.append([offset, email, line.strip(), error])
+                else:
+                    name, price, timestamp = entry
+                    entries.append((number, line, name, price, timestamp.isoformat(sep=" ")))
+            if entries:
+                users.append((offset, email, entries))
+    return count, users, rejects
+
+
+def food_ids_by_name(storage):
+    """
+    Maps the names of the food items in the catalog to their food_ids, ignoring case and surrounding whitespace.
+
+    Args:
+        storage: The storage holding the catalog.
+
+    Returns:
+        A dictionary mapping each normalized name to the food_id of the first item with that name.
+
+    """
+    food_ids = {}
+    for record in storage.iter_foods():
+        food_ids.setdefault(record.name.strip().lower(), record.food_id)
+    return food_ids
+
+
+def is_migrated(storage, email):
+    """
+    Checks whether the legacy history of a user was already migrated into the order log.
+
+    Args:
+        storage: The storage holding the order log.
+        email: The email of the user.
+
+    Returns:
+        True if the user has an order migrated from the legacy history.
+
+    """
+    return any(legacy_entry_number(order["order_id"]) is not None for order in storage.orders_for(email))
+
+
+def migrate_history(csv_paths, storage, rejects_path, workers=1, chunk_bytes=CHUNK_BYTES):
+    """
+    Streams user CSV files and adds the orders of their legacy "Order History" column to the order log.
+
+    Every file is split into byte ranges on record boundaries and the ranges are parsed by a pool of worker
+    processes. At most two ranges per worker are in flight, and the results are added to the storage in file
+    order as soon as they arrive, one batch per range, so the migration's own memory use depends on chunk_bytes and
+    workers, not on the size of the files; the storage keeps its usual index of the order log.
+
+    Every legacy entry becomes a one-unit order of the catalog item with the same name, at the legacy price. Its
+    order ID starts with LEGACY_ORDER_PREFIX and the entry's number, so the order history knows which entries were
+    migrated. Users that already have migrated orders are skipped, so an interrupted migration can be run again.
+    Only the first row of an email is migrated, as only that row's history is shown to the user. Entries that are
+    not valid legacy orders or name no catalog item are written to the rejects file with the offset of their
+    user record; they stay in the legacy column. The rejects file replaces the previous one once the migration
+    has finished.
+
+    Args:
+        csv_paths: The paths of the user CSV files.
+        storage: The storage receiving the orders.
+        rejects_path: Path of the CSV file receiving the entries that were not migrated, in REJECT_FIELDS order.
+        workers: The number of worker processes; 1 parses in the calling process.
+        chunk_bytes: The approximate size of the byte range handed to a worker at a time.
+
+    Returns:
+        A dictionary with the number of "users", migrated "orders", "skipped" users that were already migrated,
+        "rejects", and the "bytes" of the user files.
+
+    Raises:
+        ValueError: If a file has no "Email" or "Order History" column.
+
+    """
+    sources = []
+    for csv_path in csv_paths:
+        header, start = read_header(csv_path)
+        if EMAIL_COLUMN not in header or HISTORY_COLUMN not in header:
+            raise ValueError(f"{csv_path} has no {EMAIL_COLUMN} or {HISTORY_COLUMN} column.")
+        sources.append((csv_path, start, header.index(EMAIL_COLUMN), header.index(HISTORY_COLUMN)))
+    food_ids = food_ids_by_name(storage)
+    summary = {"users": 0, "orders": 0, "skipped": 0, "rejects": 0,
+               "bytes": sum(os.path.getsize(csv_path) for csv_path in csv_paths)}
+
+    temp_path = rejects_path + ".tmp"
+    with open(temp_path, 'w', newline='', encoding='utf-8') as rejects_file:
+        reject_writer = csv.writer(rejects_file)
+        reject_writer.writerow(REJECT_FIELDS)
+
+        def add(result):
+            count, users, rejects = result
+            orders = []
+            emails = set()
+            for offset, email, entries in users:
+                migrated = email in emails or is_migrated(storage, email)
+                emails.add(email)
+                for number, line, name, price, timestamp in entries:
+                    food_id = food_ids.get(name.strip().lower())
+                    if food_id is None:
+                        rejects.append([offset, email, line.strip(), "Unknown food item."])
+                    elif not migrated:
+                        orders.append({"order_id": legacy_order_id(number), "email": email, "food_id": food_id,
+                                       "quantity": 1, "unit_price": price, "timestamp": timestamp})
+                summary["skipped"] += migrated
+            if orders:
+                storage.add_orders(orders)
+            rejects.sort(key=lambda reject: reject[0])
+            reject_writer.writerows(rejects)
+            summary["users"] += count
+            summary["orders"] += len(orders)
+            summary["rejects"] += len(rejects)
+
+        ranges = ((csv_path, range_start, range_end, email_index, history_index)
+                  for csv_path, start, email_index, history_index in sources
+                  for range_start, range_end in chunk_ranges(csv_path, start, chunk_bytes))
+        if workers <= 1:
+            for task in ranges:
+                add(migrate_range(*task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for task in ranges:
+                    if len(pending) >= 2 * workers:
+                        add(pending.popleft().result())
+                    pending.append(executor.submit(migrate_range, *task))
+                while pending:
+                    add(pending.popleft().result())
+    os.replace(temp_path, rejects_path)
+    return summary
+
+
+def main():
+    """
+    Command line entry point that migrates the legacy order histories of the user database into the order log.
+    """
+    parser = argparse.ArgumentParser(description="Add the orders of the legacy Order History column of the user "
+                                                 "database to the order log.")
+    parser.add_argument("--source", nargs="+",
+                        help="The user CSV files; defaults to those of the CSV storage, or to the user CSV file "
+                             "the SQLite database was migrated from.")
+    parser.add_argument("--rejects", default=resource_path(legacy_order_rejects),
+                        help="The CSV file receiving the entries that were not migrated.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1024 * 1024),
+                        help="Megabytes of a user file handed to a worker at a time.")
+    args = parser.parse_args()
+
+    from utils.storage import CsvStorage, get_storage
+    storage = get_storage()
+    sources = args.source or (storage.users.paths() if isinstance(storage, CsvStorage)
+                              else [resource_path(user_database)])
+    start = time.perf_counter()
+    try:
+        summary = migrate_history(sources, storage, args.rejects, max(1, args.workers),
+                                  max(1, int(args.chunk_mb * 1024 * 1024)))
+    except ValueError as error:
+        raise SystemExit(str(error))
+    elapsed = time.perf_counter() - start
+    print(f"Added {summary['orders']} legacy orders of {summary['users']} users to the order log in {elapsed:.2f}s "
+          f"({summary['bytes'] / (1024 * 1024) / max(elapsed, 1e-9):.1f} MB/s).")
+    if summary["skipped"]:
+        print(f"Skipped {summary['skipped']} users whose legacy orders were already migrated.")
+    if summary["rejects"]:
+        print(f"{summary['rejects']} entries were not migrated; see {args.rejects}.")
+
+
+if __name__ == "__main__":
+    main()
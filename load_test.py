@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+
+class HttpClient:
+    """
+    Minimal keep-alive HTTP/1.1 JSON client for load testing the service.
+    """
+    def __init__(self, host, port):
+        """
+        Initializes the client without connecting.
+
+        Args:
+            host: The service host.
+            port: The service port.
+
+        """
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.token = None
+
+    async def connect(self):
+        """
+        Opens the connection to the service.
+        """
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        """
+        Sends one request and reads its response.
+
+        Args:
+            method: The HTTP method.
+            path: The request path.
+            body: The JSON body to send, if any.
+
+        Returns:
+            A tuple of (status code, parsed JSON response).
+
+        """
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if self.token:
+            headers += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(headers.encode("latin-1") + b"\r\n" + payload)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_client(args, latencies, errors):
+    """
+    Runs one simulated customer: logs in, browses the menu and places orders, then logs out.
+
+    Args:
+        args: The parsed command line arguments.
+        latencies: List collecting the latency of every request in seconds.
+        errors: List collecting the status code of every failed request.
+
+    """
+    client = HttpClient(args.host, args.port)
+    await client.connect()
+    try:
+        status, response = await client.request("POST", "/login", {"email": args.email, "password": args.password})
+        if status != 200:
+            raise SystemExit(f"Login failed: {response}")
+        client.token = response["token"]
+        status, response = await client.request("GET", "/menu")
+        food_ids = [item["food_id"] for item in response["items"]]
+
+        for _ in range(args.requests):
+            if food_ids and random.random() < args.order_ratio:
+                request = ("POST", "/orders", {"food_id": random.choice(food_ids), "quantity": 1})
+            else:
+                request = ("GET", "/menu", None)
+            start = time.perf_counter()
+            status, _ = await client.request(*request)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400 and status != 409:
+                errors.append(status)
+        await client.request("POST", "/logout")
+    finally:
+        await client.close()
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns a percentile of already sorted values using the nearest-rank method.
+
+    Args:
+        sorted_values: The values, sorted ascending.
+        fraction: The percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        The percentile value.
+
+    """
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run(args):
+    """
+    Runs all simulated customers concurrently and prints the latency report.
+
+    Args:
+        args: The parsed command line arguments.
+
+    """
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(args, latencies, errors) for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests:   {len(latencies)} from {args.clients} concurrent clients in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/sec")
+    print(f"Latency:    p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"mean {statistics.mean(latencies) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print(f"Errors:     {len(errors)}")
+
+
+def main():
+    """
+    Command line entry point for the local load test client.
+    """
+    parser = argparse.ArgumentParser(description="Load test the Food Delivery App service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clients", type=int, default=50, help="Number of concurrent clients.")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client after login.")
+    parser.add_argument("--order-ratio", type=float, default=0.0,
+                        help="Fraction of requests that place an order instead of loading the menu.")
+    parser.add_argument("--email", required=True, help="Email of an existing user to log in as.")
+    parser.add_argument("--password", required=True, help="Password of that user.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
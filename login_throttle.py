@@ -0,0 +1,127 @@
+import collections
+import math
+import threading
+import time
+
+from constants.constant import login_attempts, login_refill_seconds, login_throttle_size
+
+LOCAL_SOURCE = "local"
+
+
+class LoginThrottledError(Exception):
+    """
+    Raised when a login is refused because its account or source used up its failed attempts.
+    """
+    def __init__(self, retry_after):
+        """
+        Initializes the error.
+
+        Args:
+            retry_after: The number of seconds until the next attempt is allowed.
+
+        """
+        self.retry_after = math.ceil(retry_after)
+        super().__init__(f"Too many failed login attempts. Please try again in {self.retry_after} seconds.")
+
+
+class LoginThrottle:
+    """
+    Token buckets that limit failed logins per account and per source.
+
+    Every key (an account or a source address) may fail capacity times in a row; each failure takes a token from
+    the key's bucket, and tokens come back one every refill_seconds. A login is refused while any of its keys has
+    no token left, which is checked in memory before the credentials are looked up, so refused attempts never read
+    the user files.
+
+    Only keys with failures are stored, in an LRU dictionary of at most max_keys entries. When it is full the key
+    that failed least recently is dropped, which is equivalent to refilling its bucket, so memory stays bounded
+    however many accounts an attacker tries, while an active attacker's source keeps being refreshed.
+    """
+    def __init__(self, capacity=login_attempts, refill_seconds=login_refill_seconds, max_keys=login_throttle_size,
+                 clock=time.monotonic):
+        """
+        Initializes an empty throttle.
+
+        Args:
+            capacity: The number of failed attempts a key may make in a row.
+            refill_seconds: The number of seconds after which a key gets one attempt back.
+            max_keys: The maximum number of keys remembered.
+            clock: The function returning the current time in seconds.
+
+        """
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self.max_keys = max(1, max_keys)
+        self.clock = clock
+        self.buckets = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def tokens(self, key, now):
+        """
+        Returns the tokens a key has at a given time. Must be called with the lock held.
+
+        Args:
+            key: The bucket key.
+            now: The current time.
+
+        Returns:
+            The number of tokens, possibly fractional.
+
+        """
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return self.capacity
+        tokens, updated = bucket
+        return min(self.capacity, tokens + (now - updated) / self.refill_seconds)
+
+    def check(self, keys):
+        """
+        Checks whether a login attempt is allowed, without taking a token.
+
+        Args:
+            keys: The keys of the attempt, e.g. its account and its source.
+
+        Raises:
+            LoginThrottledError: If one of the keys has no token left.
+
+        """
+        with self.lock:
+            now = self.clock()
+            wait = max((1 - self.tokens(key, now)) * self.refill_seconds for key in keys)
+        if wait > 0:
+            raise LoginThrottledError(wait)
+
+    def record_failure(self, keys):
+        """
+        Takes a token from the bucket of every key of a failed login attempt.
+
+        Args:
+            keys: The keys of the attempt.
+
+        """
+        with self.lock:
+            now = self.clock()
+            for key in keys:
+                self.buckets[key] = (max(0, self.tokens(key, now) - 1), now)
+                self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+
+
+def login_keys(kind, identity, source):
+    """
+    Returns the throttle keys of a login attempt.
+
+    Args:
+        kind: "user" or "admin".
+        identity: The email or admin user ID, compared case-insensitively.
+        source: The address the attempt comes from.
+
+    Returns:
+        A tuple of the account key and the source key.
+
+    """
+    return (kind, str(identity).strip().lower()), ("source", source)
+
+
+login_throttle = LoginThrottle()
@@ -1,10 +1,14 @@
-from utils.admin_functions import admin_functions
-from utils.user_functions import user_functions
+from constants.constant import metrics_dump
+from utils.metrics import metrics
+from utils.paths import resource_path
 
 
 class FoodDeliveryApp:
     """
     A simple Food Delivery App that allows users to place orders and admins to manage the food items.
+
+    The admin and user modules are imported on first use of their login screens, so the welcome screen appears
+    without touching the data files.
     """
 
     def __init__(self):
@@ -16,6 +20,9 @@ class FoodDeliveryApp:
     def welcome_screen(self):
         """
         Displays the welcome screen of the app and prompts the user to choose an option.
+
+        Returns:
+            The next screen to show, as a (method, *args) tuple.
         """
         print("Welcome to the Food Delivery App!")
         print("1. Admin Login")
@@ -25,38 +32,61 @@ class FoodDeliveryApp:
         choice = input("Please enter your choice: ")
 
         if choice == "1":
-            self.admin_login()
+            return (self.admin_login,)
         elif choice == "2":
-            self.user_login()
+            return (self.user_login,)
         elif choice == "3":
-            self.exit_program()
+            return (self.exit_program,)
         else:
             print("Invalid choice. Please try again.")
-            self.welcome_screen()
+            return (self.welcome_screen,)
 
     def admin_login(self):
         """
         Prompts the admin to log in or register.
+
+        Returns:
+            The admin login screen.
         """
-        admin_functions.admin(self)
+        from utils.admin_functions import get_admin_functions
+        return get_admin_functions().admin, self
 
     def user_login(self):
         """
         Prompts the user to log in or register.
+
+        Returns:
+            The user login screen.
         """
-        user_functions.user(self)
+        from utils.user_functions import get_user_functions
+        return get_user_functions().user, self
 
     def exit_program(self):
         """
-        Exits the program.
+        Exits the program, saving a metrics snapshot first if metrics are enabled.
+
+        Returns:
+            None, which ends the screen loop.
         """
+        if metrics.enabled:
+            metrics_path = resource_path(metrics_dump)
+            with open(metrics_path, 'w') as file:
+                file.write(metrics.to_prometheus())
+            print(f"Metrics saved to {metrics_path}.")
         print("Exiting the program. Goodbye!")
+        return None
 
     def run(self):
         """
-        Runs the Food Delivery App by displaying the welcome screen.
+        Runs the Food Delivery App as a state machine, starting from the welcome screen.
+
+        Every screen returns the next screen as a (method, *args) tuple instead of calling it, so this single loop
+        drives the whole session with a constant stack depth however many actions are performed.
         """
-        self.welcome_screen()
+        screen = (self.welcome_screen,)
+        while screen is not None:
+            handler, *args = screen
+            screen = handler(*args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+import bisect
+import heapq
+import re
+from collections import Counter
+
+PREFIX_EXPANSIONS = 50
+FUZZY_CANDIDATES = 200
+MIN_FUZZY_LENGTH = 3
+MAX_QUERY_TERMS = 8
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+TYPO_SCORE = 0.6
+
+
+def tokenize(text):
+    """
+    Splits a food name or query into lower-case words.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        The list of words.
+
+    """
+    return re.findall(r"[a-z0-9]+", str(text).lower())
+
+
+def trigrams(token):
+    """
+    Returns the trigrams of a word, padded so that its first and last letters get their own trigrams.
+
+    Args:
+        token: The word.
+
+    Returns:
+        The set of trigrams.
+
+    """
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(first, second, max_distance):
+    """
+    Computes the Damerau-Levenshtein distance between two words, giving up once it exceeds a bound.
+
+    Args:
+        first: The first word.
+        second: The second word.
+        max_distance: The largest distance of interest.
+
+    Returns:
+        The distance, or max_distance + 1 if it is larger than max_distance.
+
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    before_previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        previous_row, row = row, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+        before_previous_row = previous_row
+    return row[-1]
+
+
+class MenuSearchIndex:
+    """
+    In-memory name search index over the menu, with prefix and typo-tolerant matching.
+
+    Every word of a food name is kept in a posting map (word -> food IDs), a sorted word list for prefix lookups and
+    a trigram map (trigram -> words) for finding words within a small edit distance of a misspelled query. Items are
+    added and removed one at a time, so the index follows edits without being rebuilt.
+
+    Ranking scores every matching item once per query word and keeps only the best items with a bounded heap, so
+    results are never fully sorted.
+    """
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        self.names = {}
+        self.postings = {}
+        self.trigram_words = {}
+        self.sorted_words = None
+
+    def add(self, food_id, name):
+        """
+        Adds a food item to the index, replacing any earlier entry with the same food_id.
+
+        Args:
+            food_id: The food_id of the food item.
+            name: The name of the food item.
+
+        """
+        food_id = str(food_id)
+        if food_id in self.names:
+            self.remove(food_id)
+        self.names[food_id] = name
+        for word in set(tokenize(name)):
+            food_ids = self.postings.get(word)
+            if food_ids is None:
+                food_ids = self.postings[word] = set()
+                for trigram in trigrams(word):
+                    self.trigram_words.setdefault(trigram, set()).add(word)
+                if self.sorted_words is not None:
+                    bisect.insort(self.sorted_words, word)
+            food_ids.add(food_id)
+
+    def remove(self, food_id):
+        """
+        Removes a food item from the index, if it is there.
+
+        Args:
+            food_id: The food_id of the food item.
+
+        """
+        name = self.names.pop(str(food_id), None)
+        if name is None:
+            return
+        for word in set(tokenize(name)):
+            food_ids = self.postings[word]
+            food_ids.discard(str(food_id))
+            if food_ids:
+                continue
+            del self.postings[word]
+            for trigram in trigrams(word):
+                words = self.trigram_words[trigram]
+                words.discard(word)
+                if not words:
+                    del self.trigram_words[trigram]
+            if self.sorted_words is not None:
+                del self.sorted_words[bisect.bisect_left(self.sorted_words, word)]
+
+    def matching_words(self, term):
+        """
+        Finds the indexed words that match one query word, exactly, as a prefix or with a typo.
+
+        Args:
+            term: The query word.
+
+        Returns:
+            A dictionary mapping each matching word to its score.
+
+        """
+        if self.sorted_words is None:
+            self.sorted_words = sorted(self.postings)
+        matches = {}
+        position = bisect.bisect_left(self.sorted_words, term)
+        while position < len(self.sorted_words) and len(matches) < PREFIX_EXPANSIONS:
+            word = self.sorted_words[position]
+            if not word.startswith(term):
+                break
+            matches[word] = EXACT_SCORE if word == term else PREFIX_SCORE
+            position += 1
+
+        if len(term) >= MIN_FUZZY_LENGTH:
+            max_distance = 1 if len(term) < 7 else 2
+            term_trigrams = trigrams(term)
+            shared = Counter()
+            for trigram in term_trigrams:
+                shared.update(self.trigram_words.get(trigram, ()))
+            for word, _ in shared.most_common(FUZZY_CANDIDATES):
+                if word not in matches:
+                    distance = edit_distance(term, word, max_distance)
+                    if distance <= max_distance:
+                        matches[word] = TYPO_SCORE / distance
+        return matches
+
+    def term_tiers(self, term):
+        """
+        Groups the food items matching one query word by the score of their best matching word.
+
+        Args:
+            term: The query word.
+
+        Returns:
+            A list of (score, food IDs, words) tuples with disjoint food ID sets, best score first.
+
+        """
+        words_by_score = {}
+        for word, score in self.matching_words(term).items():
+            words_by_score.setdefault(score, []).append(word)
+        tiers = []
+        matched = set()
+        for score in sorted(words_by_score, reverse=True):
+            words = words_by_score[score]
+            food_ids = set().union(*[self.postings[word] for word in words]) - matched
+            if food_ids:
+                tiers.append((score, food_ids, words))
+                matched |= food_ids
+        return tiers
+
+    def search(self, query, limit=10):
+        """
+        Returns the food items whose names best match a query.
+
+        Items matching more query words rank first, then items with better matches (exact, then prefix, then
+        typo), then shorter names. Every matching item is scored once per query word, so the cost grows with the
+        number of words and matches, not with the combinations of match qualities. Only the first MAX_QUERY_TERMS
+        distinct words of the query are used.
+
+        Args:
+            query: The search text.
+            limit: The maximum number of results.
+
+        Returns:
+            The list of matching food_ids, best match first.
+
+        """
+        terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        matched_terms = Counter()
+        scores = Counter()
+        for term in terms:
+            for score, food_ids, _ in self.term_tiers(term):
+                for food_id in food_ids:
+                    matched_terms[food_id] += 1
+                    scores[food_id] += score
+        return heapq.nsmallest(limit, matched_terms, key=lambda food_id: (
+            -matched_terms[food_id], -round(scores[food_id], 6), self.rank_key(food_id)))
+
+    def rank_key(self, food_id):
+        """
+        Orders equally good matches: shorter names first, then by food_id.
+
+        Args:
+            food_id: The food_id of the food item.
+
+        Returns:
+            The sort key.
+
+        """
+        return len(self.names[food_id]), food_id
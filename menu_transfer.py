@@ -0,0 +1,215 @@
+import argparse
+import csv
+import itertools
+import json
+import time
+
+from utils.food_record import validate_number
+from utils.storage import get_storage
+
+IMPORT_FIELDS = ["name", "quantity", "price", "discount", "stock"]
+EXPORT_FIELDS = ["food_id"] + IMPORT_FIELDS
+MAX_REPORTED_ERRORS = 20
+
+
+def is_jsonl(path):
+    """
+    Checks whether a file should be read or written as JSON lines rather than CSV.
+
+    Args:
+        path: The file path.
+
+    Returns:
+        True for .jsonl and .json files, False otherwise.
+
+    """
+    return path.lower().endswith((".jsonl", ".json"))
+
+
+def read_items(path):
+    """
+    Streams the food items of a CSV or JSONL file, with lower-cased field names.
+
+    Args:
+        path: The file to read.
+
+    Yields:
+        Each item as a dictionary; JSON lines that are not objects are yielded as None.
+
+    """
+    with open(path, 'r', newline='') as file:
+        if is_jsonl(path):
+            for line in file:
+                if line.strip():
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        item = None
+                    yield {str(key).lower(): value for key, value in item.items()} if isinstance(item, dict) else None
+        else:
+            for row in csv.DictReader(file):
+                yield {str(key).lower(): value for key, value in row.items()}
+
+
+def validate_item(item):
+    """
+    Validates one imported food item.
+
+    Args:
+        item: The item dictionary, or None if the line could not be parsed.
+
+    Returns:
+        An error message, or None if the item is valid.
+
+    """
+    if item is None:
+        return "not a valid JSON object"
+    missing = [field for field in IMPORT_FIELDS if item.get(field) in (None, "")]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    for field in ("price", "discount", "stock"):
+        try:
+            validate_number(field, item[field])
+        except ValueError as error:
+            return str(error)
+    return None
+
+
+def import_menu(path, storage=None, batch_size=1000):
+    """
+    Imports food items from a CSV or JSONL file in bounded memory.
+
+    Rows are streamed and validated in batches. Each batch gets its IDs from one allocation, which skips the IDs of
+    the earlier batches since they are not saved yet, and every valid row is written in a single pass over the food
+    database. Invalid rows are skipped and reported. A file that cannot be
+    read to the end imports nothing: the rows written so far are rolled back and the error is raised.
+
+    Args:
+        path: The CSV or JSONL file to import; it needs name, quantity, price, discount and stock fields.
+        storage: The storage to import into.
+        batch_size: The number of rows validated and allocated together.
+
+    Returns:
+        A dictionary with the imported and rejected row counts, the first error messages, the elapsed seconds
+        and the rows per second.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not valid UTF-8, or a food ID would be allocated twice.
+        csv.Error: If the CSV file is malformed.
+        FoodIdExhaustedError: If not enough food IDs are left.
+
+    """
+    storage = get_storage() if storage is None else storage
+    report = {"imported": 0, "rejected": 0, "errors": []}
+
+    def records():
+        rows = enumerate(read_items(path), start=1)
+        allocated = []
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return
+            valid_items = []
+            for row_number, item in batch:
+                error = validate_item(item)
+                if error:
+                    report["rejected"] += 1
+                    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                        report["errors"].append(f"Row {row_number}: {error}")
+                else:
+                    valid_items.append(item)
+            if valid_items:
+                food_ids = storage.allocate_food_ids(len(valid_items), allocated)
+                if any(food_ids.start < block.stop and block.start < food_ids.stop for block in allocated):
+                    raise ValueError(f"Food IDs {food_ids.start}-{food_ids.stop - 1} were allocated twice.")
+                allocated.append(food_ids)
+                for food_id, item in zip(food_ids, valid_items):
+                    record = {field: str(item[field]).strip() for field in IMPORT_FIELDS}
+                    record["food_id"] = str(food_id)
+                    yield record
+
+    start = time.perf_counter()
+    report["imported"] = storage.add_foods(records())
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_sec"] = (report["imported"] + report["rejected"]) / report["seconds"] if report["seconds"] else 0
+    return report
+
+
+def export_menu(path, storage=None):
+    """
+    Exports every food item to a CSV or JSONL file, streaming from the storage.
+
+    Args:
+        path: The CSV or JSONL file to write.
+        storage: The storage to export from.
+
+    Returns:
+        A dictionary with the exported row count, the elapsed seconds and the rows per second.
+
+    """
+    storage = get_storage() if storage is None else storage
+    start = time.perf_counter()
+    exported = 0
+    with open(path, 'w', newline='') as file:
+        if is_jsonl(path):
+            for record in storage.iter_foods():
+                file.write(json.dumps({field: record[field] for field in EXPORT_FIELDS}) + "\n")
+                exported += 1
+        else:
+            writer = csv.DictWriter(file, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for record in storage.iter_foods():
+                writer.writerow(record)
+                exported += 1
+    seconds = time.perf_counter() - start
+    return {"exported": exported, "seconds": seconds, "rows_per_sec": exported / seconds if seconds else 0}
+
+
+def print_import_report(report):
+    """
+    Prints the result of an import.
+
+    Args:
+        report: The dictionary returned by import_menu.
+
+    """
+    print(f"Imported {report['imported']} food items, rejected {report['rejected']} rows "
+          f"in {report['seconds']:.2f}s ({report['rows_per_sec']:.0f} rows/sec).")
+    for error in report["errors"]:
+        print(f"  {error}")
+    if report["rejected"] > len(report["errors"]):
+        print(f"  ... and {report['rejected'] - len(report['errors'])} more rejected rows.")
+
+
+def print_export_report(report, path):
+    """
+    Prints the result of an export.
+
+    Args:
+        report: The dictionary returned by export_menu.
+        path: The file that was written.
+
+    """
+    print(f"Exported {report['exported']} food items to {path} "
+          f"in {report['seconds']:.2f}s ({report['rows_per_sec']:.0f} rows/sec).")
+
+
+def main():
+    """
+    Command line entry point for bulk menu import and export.
+    """
+    parser = argparse.ArgumentParser(description="Bulk import or export the food menu as CSV or JSONL.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="CSV or JSONL (.jsonl) file.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows validated and allocated together.")
+    args = parser.parse_args()
+
+    if args.action == "import":
+        print_import_report(import_menu(args.path, batch_size=args.batch_size))
+    else:
+        print_export_report(export_menu(args.path), args.path)
+
+
+if __name__ == "__main__":
+    main()
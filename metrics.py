@@ -0,0 +1,245 @@
+import bisect
+import functools
+import threading
+import time
+
+from constants.constant import metrics_enabled
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class OperationStats:
+    """
+    Counters, latency histogram and file I/O totals of one operation.
+    """
+    def __init__(self):
+        """
+        Initializes zeroed statistics.
+        """
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def to_dict(self):
+        """
+        Returns the statistics as a JSON-serialisable dictionary.
+
+        Returns:
+            A dictionary with the call and error counts, the total and mean latency, the cumulative latency
+            histogram keyed by upper bound in seconds, and the bytes read and written.
+
+        """
+        cumulative = 0
+        histogram = {}
+        for bound, count in zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], self.buckets):
+            cumulative += count
+            histogram[bound] = cumulative
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds_total": self.seconds,
+            "mean_ms": self.seconds / self.calls * 1000 if self.calls else 0.0,
+            "latency_buckets": histogram,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written
+        }
+
+
+class Metrics:
+    """
+    Registry of per-operation metrics for the admin and user entry points.
+
+    Operations are timed by the instrumented decorator. File I/O is reported by the storage layer through
+    count_io and added to every operation running on the current thread, so an operation's byte counts include
+    the operations it calls. When disabled, the decorator and count_io only check one attribute.
+    """
+    def __init__(self, enabled=False):
+        """
+        Initializes an empty registry.
+
+        Args:
+            enabled: Whether metrics are recorded.
+
+        """
+        self.enabled = enabled
+        self.operations = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.time()
+
+    def enable(self):
+        """
+        Starts recording metrics.
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stops recording metrics; the recorded values are kept.
+        """
+        self.enabled = False
+
+    def reset(self):
+        """
+        Discards every recorded value.
+        """
+        with self.lock:
+            self.operations = {}
+            self.started = time.time()
+
+    def stats(self, operation):
+        """
+        Returns the statistics of an operation, creating them on first use. The lock must be held.
+
+        Args:
+            operation: The operation name.
+
+        Returns:
+            The OperationStats.
+
+        """
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        return stats
+
+    def call(self, operation, function, args, kwargs):
+        """
+        Calls a function and records its latency, outcome and file I/O under an operation name.
+
+        Args:
+            operation: The operation name.
+            function: The function to call.
+            args: The positional arguments.
+            kwargs: The keyword arguments.
+
+        Returns:
+            The function's return value.
+
+        """
+        active = getattr(self.local, "operations", None)
+        if active is None:
+            active = self.local.operations = []
+        active.append(operation)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            active.pop()
+            bucket = bisect.bisect_left(LATENCY_BUCKETS, elapsed)
+            with self.lock:
+                stats = self.stats(operation)
+                stats.calls += 1
+                stats.errors += failed
+                stats.seconds += elapsed
+                stats.buckets[bucket] += 1
+
+    def count_io(self, read=0, written=0):
+        """
+        Adds file I/O to every operation running on the current thread.
+
+        Args:
+            read: The number of bytes read.
+            written: The number of bytes written.
+
+        """
+        if not self.enabled:
+            return
+        active = getattr(self.local, "operations", None)
+        if not active:
+            return
+        with self.lock:
+            for operation in set(active):
+                stats = self.stats(operation)
+                stats.bytes_read += read
+                stats.bytes_written += written
+
+    def snapshot(self):
+        """
+        Returns every recorded metric as a JSON-serialisable dictionary.
+
+        Returns:
+            A dictionary with the recording start time and the statistics of every operation.
+
+        """
+        with self.lock:
+            operations = {operation: stats.to_dict() for operation, stats in sorted(self.operations.items())}
+        return {"enabled": self.enabled, "started": self.started, "operations": operations}
+
+    def to_json(self):
+        """
+        Returns the metrics as a JSON dump.
+
+        Returns:
+            The JSON text.
+
+        """
+        import json
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The metrics text.
+
+        """
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP food_app_operations_total Completed calls of each operation.",
+            "# TYPE food_app_operations_total counter"
+        ]
+        operations = snapshot["operations"]
+        for operation, stats in operations.items():
+            lines.append(f'food_app_operations_total{{operation="{operation}"}} {stats["calls"]}')
+        lines += ["# HELP food_app_operation_errors_total Calls of each operation that raised an exception.",
+                  "# TYPE food_app_operation_errors_total counter"]
+        for operation, stats in operations.items():
+            lines.append(f'food_app_operation_errors_total{{operation="{operation}"}} {stats["errors"]}')
+        lines += ["# HELP food_app_operation_duration_seconds Latency of each operation.",
+                  "# TYPE food_app_operation_duration_seconds histogram"]
+        for operation, stats in operations.items():
+            for bound, count in stats["latency_buckets"].items():
+                lines.append(f'food_app_operation_duration_seconds_bucket{{operation="{operation}",le="{bound}"}} '
+                             f'{count}')
+            lines.append(f'food_app_operation_duration_seconds_sum{{operation="{operation}"}} '
+                         f'{stats["seconds_total"]:.6f}')
+            lines.append(f'food_app_operation_duration_seconds_count{{operation="{operation}"}} {stats["calls"]}')
+        for name, key, description in (("read", "bytes_read", "read from"), ("written", "bytes_written", "written to")):
+            lines += [f"# HELP food_app_io_{name}_bytes_total Bytes {description} data files by each operation.",
+                      f"# TYPE food_app_io_{name}_bytes_total counter"]
+            for operation, stats in operations.items():
+                lines.append(f'food_app_io_{name}_bytes_total{{operation="{operation}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+
+def instrumented(operation):
+    """
+    Decorates an entry point so that its calls are recorded under an operation name while metrics are enabled.
+
+    Args:
+        operation: The operation name, e.g. "user.verify_user".
+
+    Returns:
+        The decorator.
+
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            return metrics.call(operation, function, args, kwargs)
+        return wrapper
+    return decorate
+
+
+metrics = Metrics(metrics_enabled)
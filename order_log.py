@@ -0,0 +1,225 @@
+import csv
+import io
+import itertools
+import os
+import uuid
+
+from constants.constant import order_database
+from utils.file_lock import FileLock
+from utils.metrics import metrics
+from utils.paths import resource_path
+from utils.user_index import iter_record_offsets, parse_raw_record, read_raw_record
+
+ORDER_FIELDS = ["order_id", "email", "food_id", "quantity", "unit_price", "timestamp"]
+
+
+def encode_row(values):
+    """
+    Encode one CSV row the way csv.writer writes it to a file.
+
+    Parameters:
+        values (list): The field values of the row.
+
+    Returns:
+        bytes: The encoded row, including its line terminator.
+
+    """
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+
+class OrderLog:
+    """
+    Append-only log of placed orders, one structured record per ordered item.
+
+    Placing an order appends a single row and never rewrites existing data. An in-memory index maps each email to
+    the byte offsets of its records so a user's history is read without scanning other users' orders. The index is
+    rebuilt with a single scan only when the file was changed outside of this log.
+    """
+    def __init__(self, csv_path):
+        """
+        Initialize the log without reading the file; the index is built on first use.
+
+        Parameters:
+            csv_path (str): Path to the order log CSV file.
+
+        """
+        self.csv_path = csv_path
+        self.offsets = {}
+        self.signature = None
+        self.indexed = False
+        self.lock = FileLock(csv_path + ".lock")
+
+    def file_signature(self):
+        """
+        Return the (mtime, size) pair used to detect changes to the order log, or None if it does not exist yet.
+
+        Returns:
+            tuple: The file's modification time in nanoseconds and its size in bytes.
+
+        """
+        if not os.path.exists(self.csv_path):
+            return None
+        stat = os.stat(self.csv_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """
+        Rebuild the email index if the order log changed since it was last indexed.
+        """
+        signature = self.file_signature()
+        if not self.indexed or self.signature != signature:
+            self.rebuild(signature)
+
+    def rebuild(self, signature):
+        """
+        Scan the order log once and record the offset of every order by email.
+
+        Parameters:
+            signature (tuple): The file signature the index is being built for.
+
+        """
+        offsets = {}
+        if signature is not None:
+            records = iter_record_offsets(self.csv_path)
+            next(records)
+            for offset, fields in records:
+                offsets.setdefault(fields[1], []).append(offset)
+        self.offsets = offsets
+        self.signature = signature
+        self.indexed = True
+        if signature is not None:
+            metrics.count_io(read=signature[1])
+
+    def new_order_id(self):
+        """
+        Generate a unique order ID.
+
+        Returns:
+            str: The new order ID.
+
+        """
+        return uuid.uuid4().hex
+
+    def append(self, order):
+        """
+        Append an order record to the log and add it to the email index.
+
+        Parameters:
+            order (dict): The order record, keyed by ORDER_FIELDS.
+
+        """
+        self.append_many([order])
+
+    def append_many(self, orders, sync=False):
+        """
+        Append several order records to the log in one write and add them to the email index.
+
+        The records are written with a single write while holding the log's lock, and the log is never read. If
+        another process appended since the index was built, the index is only marked stale and is rebuilt on the
+        next read.
+
+        Parameters:
+            orders (list): The order records, keyed by ORDER_FIELDS.
+            sync (bool): Whether to fsync the log before returning.
+
+        """
+        with self.lock:
+            current = self.indexed and self.signature == self.file_signature()
+            offsets = []
+            chunks = []
+            with open(self.csv_path, 'ab') as file:
+                position = file.seek(0, os.SEEK_END)
+                if position == 0:
+                    chunks.append(encode_row(ORDER_FIELDS))
+                    position += len(chunks[-1])
+                for order in orders:
+                    offsets.append(position)
+                    chunks.append(encode_row([order[field] for field in ORDER_FIELDS]))
+                    position += len(chunks[-1])
+                data = b''.join(chunks)
+                file.write(data)
+                if sync:
+                    file.flush()
+                    os.fsync(file.fileno())
+            metrics.count_io(written=len(data))
+            if current:
+                for order, offset in zip(orders, offsets):
+                    self.offsets.setdefault(order["email"], []).append(offset)
+                self.signature = self.file_signature()
+            else:
+                self.indexed = False
+
+    def size(self):
+        """
+        Return the size of the order log file, for a later truncate.
+
+        Returns:
+            int: The size in bytes, 0 if the log does not exist yet.
+
+        """
+        return os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+
+    def truncate(self, size):
+        """
+        Remove the records appended after the log had the given size. Must be called with the lock held since size
+        was read, so no other writer appended in between.
+
+        Parameters:
+            size (int): The size returned by size before the records were appended.
+
+        """
+        with open(self.csv_path, 'r+b') as file:
+            file.truncate(size)
+        self.indexed = False
+
+    def iter_batches(self, batch_size):
+        """
+        Stream every order record of the log in batches, oldest first, without building the email index.
+
+        Parameters:
+            batch_size (int): The maximum number of records per batch.
+
+        Yields:
+            list: A batch of order records, each a list of values in ORDER_FIELDS order.
+
+        """
+        if not os.path.exists(self.csv_path):
+            return
+        with open(self.csv_path, 'r', newline='') as file:
+            metrics.count_io(read=os.fstat(file.fileno()).st_size)
+            reader = csv.reader(file)
+            next(reader, None)
+            while True:
+                batch = list(itertools.islice(reader, batch_size))
+                if not batch:
+                    return
+                yield batch
+
+    def orders_for(self, email):
+        """
+        Return the order records placed by the given user, oldest first.
+
+        Parameters:
+            email (str): The email of the user.
+
+        Returns:
+            list: The user's order records, keyed by ORDER_FIELDS.
+
+        """
+        self.refresh()
+        offsets = self.offsets.get(email, [])
+        if not offsets:
+            return []
+        orders = []
+        with open(self.csv_path, 'rb') as file:
+            for offset in offsets:
+                file.seek(offset)
+                raw = read_raw_record(file)
+                metrics.count_io(read=len(raw))
+                orders.append(dict(zip(ORDER_FIELDS, parse_raw_record(raw))))
+        return orders
+
+
+order_log = OrderLog(resource_path(order_database))
@@ -0,0 +1,23 @@
+import os
+
+from constants.constant import resources
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+resources_dir = os.path.join(root, resources)
+
+
+def resource_path(name):
+    """
+    Returns the path of a file in the resources directory.
+
+    The project root is resolved once, when this module is imported, with os.path rather than pathlib so that
+    importing the app stays cheap.
+
+    Args:
+        name: The file name, e.g. one of the names in constants/constant.py.
+
+    Returns:
+        The absolute path of the file.
+
+    """
+    return os.path.join(resources_dir, name)
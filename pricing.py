@@ -0,0 +1,60 @@
+def effective_price(price, discount, quantity=1):
+    """
+    Computes what a customer pays for a food item after its discount.
+
+    The discounted unit price is rounded to the nearest whole INR, half up, before it is multiplied by the
+    quantity, so every unit of an order costs the same.
+
+    Args:
+        price: The listed price in INR, as an integer.
+        discount: The discount in percent, as an integer; values outside 0-100 are clamped.
+        quantity: The number of units.
+
+    Returns:
+        The total price in INR.
+
+    """
+    discount = min(max(discount, 0), 100)
+    return (price * (100 - discount) + 50) // 100 * quantity
+
+
+def repriced(price, discount, new_discount=None, price_change=None):
+    """
+    Applies a bulk repricing rule to one food item.
+
+    Args:
+        price: The current price in INR.
+        discount: The current discount in percent.
+        new_discount: The discount to set in percent, or None to keep the current one.
+        price_change: The percentage to change the price by, e.g. -10 for 10% cheaper, or None to keep it.
+
+    Returns:
+        A (price, discount) tuple.
+
+    """
+    if price_change is not None:
+        price = (price * (100 + price_change) + 50) // 100
+    if new_discount is not None:
+        discount = new_discount
+    return price, discount
+
+
+def validate_reprice(new_discount, price_change):
+    """
+    Validates the changes of a bulk repricing.
+
+    Args:
+        new_discount: The discount to set in percent, or None.
+        price_change: The percentage to change prices by, or None.
+
+    Returns:
+        An error message, or None if the changes are valid.
+
+    """
+    if new_discount is None and price_change is None:
+        return "Enter a new discount or a price change."
+    if new_discount is not None and not 0 <= new_discount <= 100:
+        return "The discount must be between 0 and 100."
+    if price_change is not None and price_change <= -100:
+        return "The price change must be greater than -100%."
+    return None
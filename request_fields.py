@@ -0,0 +1,41 @@
+def text_fields(fields, names):
+    """
+    Checks that the given fields of a request or batch command are strings, when present.
+
+    Args:
+        fields: The parsed JSON object.
+        names: The names of the fields that must be strings.
+
+    Raises:
+        ValueError: If a field is not a string.
+
+    """
+    for name in names:
+        if name in fields and not isinstance(fields[name], str):
+            raise ValueError(f"{name} must be a string.")
+
+
+def read_cart(fields):
+    """
+    Reads the cart of an order request or batch command: either a single "food_id" and "quantity" or a list of
+    "items" with those fields. Quantities of the same food_id are added up.
+
+    Args:
+        fields: The parsed JSON object.
+
+    Returns:
+        The food_id to quantity mapping of the items to order.
+
+    Raises:
+        ValueError: If a quantity is not an integer.
+
+    """
+    items = fields.get("items", [{"food_id": fields.get("food_id", ""), "quantity": fields.get("quantity", 1)}])
+    cart = {}
+    for item in items if isinstance(items, list) else []:
+        quantity = item.get("quantity", 1) if isinstance(item, dict) else None
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError("Invalid quantity. Please enter a valid quantity.")
+        food_id = str(item.get("food_id", ""))
+        cart[food_id] = cart.get(food_id, 0) + quantity
+    return cart
@@ -0,0 +1,334 @@
+import argparse
+import gc
+import operator
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from constants.constant import legacy_order_rejects
+from utils.food_record import to_number
+from utils.history_migration import LEGACY_ORDER_PREFIX
+from utils.storage import get_storage
+
+BATCH_SIZE = 10000
+
+
+def to_ints(values):
+    """
+    Converts a batch of stored quantities or prices to integers, with a fast path for clean numbers.
+
+    Args:
+        values: A list of stored values.
+
+    Returns:
+        The list of integers.
+
+    """
+    try:
+        return list(map(int, values))
+    except (TypeError, ValueError):
+        return [to_number(value) for value in values]
+
+
+class OrderColumns:
+    """
+    Columnar copy of the order lines, built for aggregation.
+
+    Food IDs and days are dictionary-encoded: each column holds small integer codes into a list of distinct values.
+    Quantities and prices are kept in typed arrays, which numpy can read without copying. Order IDs are not stored;
+    since the lines of one order are stored together, a flag marks the first line of every order instead. Lines
+    migrated from the legacy "Order History" column are counted separately.
+    """
+    def __init__(self):
+        """
+        Initializes empty columns.
+        """
+        self.food_lookup = {}
+        self.day_lookup = {}
+        self.food_codes = array('q')
+        self.day_codes = array('q')
+        self.quantities = array('q')
+        self.unit_prices = array('q')
+        self.first_lines = array('q')
+        self.last_order_id = None
+        self.legacy_lines = 0
+
+    def extend(self, rows):
+        """
+        Appends a batch of order lines to the columns.
+
+        Args:
+            rows: A list of order lines, each a sequence of values in ORDER_FIELDS order.
+
+        """
+        if not rows:
+            return
+        order_ids, _, food_ids, quantities, unit_prices, timestamps = zip(*rows)
+        days = [timestamp[:10] for timestamp in timestamps]
+        self.food_codes.extend(map(self.encode(self.food_lookup, food_ids), food_ids))
+        self.day_codes.extend(map(self.encode(self.day_lookup, days), days))
+        self.quantities.extend(to_ints(quantities))
+        self.unit_prices.extend(to_ints(unit_prices))
+        self.first_lines.extend(map(operator.ne, order_ids, (self.last_order_id,) + order_ids[:-1]))
+        self.last_order_id = order_ids[-1]
+        self.legacy_lines += sum(order_id.startswith(LEGACY_ORDER_PREFIX) for order_id in order_ids)
+
+    def encode(self, lookup, values):
+        """
+        Adds the new distinct values of a batch to a dictionary encoding.
+
+        Args:
+            lookup: The dictionary mapping each distinct value to its code.
+            values: The values of the batch.
+
+        Returns:
+            The function mapping a value to its code.
+
+        """
+        for value in dict.fromkeys(values):
+            lookup.setdefault(value, len(lookup))
+        return lookup.__getitem__
+
+    def food_ids(self):
+        """
+        Returns the distinct food IDs, indexed by their code.
+
+        Returns:
+            A list of food IDs.
+
+        """
+        return list(self.food_lookup)
+
+    def days(self):
+        """
+        Returns the distinct order days, indexed by their code.
+
+        Returns:
+            A list of "YYYY-MM-DD" strings.
+
+        """
+        return list(self.day_lookup)
+
+    def line_count(self):
+        """
+        Returns the number of order lines in the columns.
+
+        Returns:
+            The number of order lines.
+
+        """
+        return len(self.quantities)
+
+
+def load_order_columns(storage=None, batch_size=BATCH_SIZE):
+    """
+    Reads every order line from the storage into columns, one batch at a time.
+
+    The cyclic garbage collector is paused while loading: the batches create millions of short-lived objects
+    without reference cycles, and collecting them repeatedly would roughly double the load time.
+
+    Args:
+        storage: The storage to read the orders from.
+        batch_size: The number of order lines converted together.
+
+    Returns:
+        The OrderColumns.
+
+    """
+    storage = get_storage() if storage is None else storage
+    columns = OrderColumns()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for batch in storage.iter_order_batches(batch_size):
+            columns.extend(batch)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return columns
+
+
+def group_sum(codes, values, groups):
+    """
+    Sums values per group code, like SUM(...) GROUP BY; vectorized with numpy when it is installed.
+
+    Args:
+        codes: An array of group codes, one per line.
+        values: An array of values, one per line.
+        groups: The number of distinct group codes.
+
+    Returns:
+        A list with the sum of every group, indexed by group code.
+
+    """
+    if numpy is not None:
+        sums = numpy.bincount(numpy.frombuffer(codes, dtype=numpy.int64),
+                              weights=numpy.frombuffer(values, dtype=numpy.int64), minlength=groups)
+        return numpy.rint(sums).astype(numpy.int64).tolist()
+    sums = [0] * groups
+    for code, value in zip(codes, values):
+        sums[code] += value
+    return sums
+
+
+def line_revenues(columns):
+    """
+    Computes the revenue of every order line, quantity times unit price.
+
+    Args:
+        columns: The OrderColumns.
+
+    Returns:
+        An array of line revenues.
+
+    """
+    if numpy is not None:
+        revenues = (numpy.frombuffer(columns.quantities, dtype=numpy.int64) *
+                    numpy.frombuffer(columns.unit_prices, dtype=numpy.int64))
+        return array('q', revenues.tobytes())
+    return array('q', map(int.__mul__, columns.quantities, columns.unit_prices))
+
+
+def revenue_per_item(columns, revenues=None):
+    """
+    Computes the units sold and the revenue of every food item, highest revenue first.
+
+    Args:
+        columns: The OrderColumns.
+        revenues: The line revenues, if already computed.
+
+    Returns:
+        A list of (food_id, units, revenue) tuples.
+
+    """
+    revenues = line_revenues(columns) if revenues is None else revenues
+    groups = len(columns.food_lookup)
+    units = group_sum(columns.food_codes, columns.quantities, groups)
+    totals = group_sum(columns.food_codes, revenues, groups)
+    items = zip(columns.food_ids(), units, totals)
+    return sorted(items, key=lambda item: (-item[2], item[0]))
+
+
+def orders_per_day(columns, revenues=None):
+    """
+    Computes the number of orders, order lines and revenue of every day, oldest first.
+
+    Args:
+        columns: The OrderColumns.
+        revenues: The line revenues, if already computed.
+
+    Returns:
+        A list of (day, orders, lines, revenue) tuples.
+
+    """
+    revenues = line_revenues(columns) if revenues is None else revenues
+    groups = len(columns.day_lookup)
+    orders = group_sum(columns.day_codes, columns.first_lines, groups)
+    lines = group_sum(columns.day_codes, array('q', [1]) * columns.line_count(), groups)
+    totals = group_sum(columns.day_codes, revenues, groups)
+    return sorted(zip(columns.days(), orders, lines, totals))
+
+
+def items_over(item_revenues, threshold):
+    """
+    Returns the food items whose total revenue exceeds a threshold, like HAVING SUM(revenue) > threshold.
+
+    Args:
+        item_revenues: The result of revenue_per_item.
+        threshold: The revenue threshold.
+
+    Returns:
+        The matching (food_id, units, revenue) tuples, highest revenue first.
+
+    """
+    return [item for item in item_revenues if item[2] > threshold]
+
+
+def sales_report(storage=None, threshold=0):
+    """
+    Loads the order lines and computes every sales aggregate.
+
+    Args:
+        storage: The storage to read the orders from.
+        threshold: The revenue threshold for items_over.
+
+    Returns:
+        A dictionary with the item revenues, the daily orders, the items over the threshold, the number of order
+        lines and of those migrated from the legacy history, the number of legacy orders that are not in the
+        order log, and the load and compute times in seconds.
+
+    """
+    storage = get_storage() if storage is None else storage
+    start = time.perf_counter()
+    columns = load_order_columns(storage)
+    loaded = time.perf_counter()
+    revenues = line_revenues(columns)
+    item_revenues = revenue_per_item(columns, revenues)
+    report = {
+        "items": item_revenues,
+        "days": orders_per_day(columns, revenues),
+        "items_over": items_over(item_revenues, threshold),
+        "threshold": threshold,
+        "lines": columns.line_count(),
+        "legacy_lines": columns.legacy_lines,
+        "load_seconds": loaded - start,
+        "compute_seconds": time.perf_counter() - loaded
+    }
+    report["legacy_pending"] = max(0, storage.legacy_entry_count() - columns.legacy_lines)
+    return report
+
+
+def print_sales_report(report, storage=None, top=10):
+    """
+    Prints a sales report.
+
+    Args:
+        report: The dictionary returned by sales_report.
+        storage: The storage used to look up food names.
+        top: The number of items and days to list.
+
+    """
+    storage = get_storage() if storage is None else storage
+
+    def food_name(food_id):
+        food_item = storage.get_food(food_id)
+        return food_item['name'] if food_item else f"FoodID {food_id}"
+
+    print(f"Analysed {report['lines']} order lines (loaded in {report['load_seconds']:.2f}s, "
+          f"aggregated in {report['compute_seconds']:.3f}s).")
+    if report["legacy_lines"]:
+        print(f"{report['legacy_lines']} of them were migrated from the legacy Order History column.")
+    if report["legacy_pending"]:
+        print(f"Warning: {report['legacy_pending']} orders in the legacy Order History column are not included. Run "
+              f"python -m utils.history_migration to add them to the order log; the entries it cannot migrate are "
+              f"listed in {legacy_order_rejects}.")
+    print(f"Revenue per item (top {top}):")
+    for food_id, units, revenue in report["items"][:top]:
+        print(f"  {food_name(food_id)} (FoodID {food_id}): {units} sold, INR {revenue}")
+    print(f"Orders per day (last {top} days):")
+    for day, orders, lines, revenue in report["days"][-top:]:
+        print(f"  {day}: {orders} orders, {lines} order lines, INR {revenue}")
+    print(f"Items with sales over INR {report['threshold']}: {len(report['items_over'])}")
+    for food_id, units, revenue in report["items_over"][:top]:
+        print(f"  {food_name(food_id)} (FoodID {food_id}): INR {revenue}")
+    if len(report["items_over"]) > top:
+        print(f"  ... and {len(report['items_over']) - top} more.")
+
+
+def main():
+    """
+    Command line entry point for the sales analytics report.
+    """
+    parser = argparse.ArgumentParser(description="Report revenue per item, orders per day and best-selling items.")
+    parser.add_argument("--threshold", type=int, default=0, help="List items whose total sales exceed this amount.")
+    parser.add_argument("--top", type=int, default=10, help="Number of items and days to list.")
+    args = parser.parse_args()
+    print_sales_report(sales_report(threshold=args.threshold), top=args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+import argparse
+import asyncio
+import collections
+import json
+import secrets
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from constants.constant import (group_commit_max_orders, group_commit_window_ms, menu_page_size,
+                                session_lifetime_seconds, session_limit)
+from utils.admin_functions import get_admin_functions
+from utils.food_id_allocator import FoodIdExhaustedError
+from utils.group_commit import GroupCommitter
+from utils.login_throttle import LOCAL_SOURCE, LoginThrottledError
+from utils.menu_search import MAX_QUERY_TERMS, tokenize
+from utils.metrics import metrics
+from utils.pricing import validate_reprice
+from utils.request_fields import read_cart, text_fields
+from utils.user_functions import get_user_functions
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_PAGE_SIZE = 100
+MAX_QUERY_LENGTH = 200
+
+
+class HttpError(Exception):
+    """
+    Error that is returned to the client as a JSON response with the given HTTP status.
+    """
+    def __init__(self, status, message):
+        """
+        Initializes the error.
+
+        Args:
+            status: The HTTPStatus to respond with.
+            message: The error message for the client.
+
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class FoodDeliveryService:
+    """
+    Headless HTTP/JSON front end to the Food Delivery App, served from one asyncio event loop.
+
+    Requests are parsed on the event loop. The admin and user logic runs on a single worker thread, so slow file
+    I/O never blocks other connections, and the shared catalog and index caches are only used from one thread.
+
+    Endpoints (send the token from a login as "Authorization: Bearer <token>"):
+        POST   /login               {"email", "password"}           -> {"token"}
+        POST   /register            {"full_name", "phone_number", "email", "address", "password"}
+        POST   /logout                                              ends the session of the token sent
+        GET    /menu?cursor=&limit=&min_price=&max_price=&in_stock=1 -> {"items", "next_cursor", "version"}
+        GET    /menu/changes?since=<version>                        -> {"version", "added", "edited", "removed"}
+                                    or 410 if the menu must be reloaded
+        GET    /menu/search?q=&limit=                               -> {"items"}
+        POST   /orders              {"food_id", "quantity"}         -> {"orders"}
+                                    or {"items": [{"food_id", "quantity"}, ...]} for a multi-item cart
+        GET    /orders                                              -> {"legacy_orders", "orders"}
+        POST   /admin/login         {"user_id", "password"}         -> {"token"}
+        GET    /admin/foods                                         -> {"items"}
+        POST   /admin/foods         {"Name", "Quantity", "Price", "Discount", "Stock"} -> {"item"}
+        GET    /admin/foods/<id>                                    -> {"item"}
+        PUT    /admin/foods/<id>    any of the POST fields          -> {"item"}
+        DELETE /admin/foods/<id>
+        POST   /admin/foods/reprice {"min_price", "max_price", "discount", "price_change"} -> {"updated"}
+        GET    /metrics[?format=json]   (admin)                     -> Prometheus text, or the JSON snapshot
+
+    Sessions expire after session_lifetime_seconds without a request, and at most session_limit are kept: a new
+    login beyond that ends the least recently used session.
+    """
+    def __init__(self, admin=None, user=None, group_commit=None, session_lifetime=session_lifetime_seconds,
+                 max_sessions=session_limit, clock=time.monotonic):
+        """
+        Initializes the service around the admin and user functions it exposes.
+
+        Args:
+            admin: The AdminFunctions instance; defaults to the shared one.
+            user: The UserFunctions instance; defaults to the shared one.
+            group_commit: A (window in ms, max orders) pair to commit orders in groups, or None to commit each order
+                on its own.
+            session_lifetime: The number of idle seconds after which a session expires.
+            max_sessions: The maximum number of sessions kept.
+            clock: The function returning the current time in seconds.
+
+        """
+        self.admin = get_admin_functions() if admin is None else admin
+        self.user = get_user_functions() if user is None else user
+        self.sessions = collections.OrderedDict()
+        self.session_lifetime = session_lifetime
+        self.max_sessions = max(1, max_sessions)
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="food-app")
+        self.committer = None
+        if group_commit is not None:
+            self.committer = GroupCommitter(self.user.storage, *group_commit, executor=self.executor)
+
+    async def call(self, function, *args):
+        """
+        Runs blocking app logic on the worker thread.
+
+        Args:
+            function: The function to call.
+            *args: Arguments for the function.
+
+        Returns:
+            The function's return value.
+
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def submit_cart(self, email, cart):
+        """
+        Places an order, through the group committer if group commit is enabled.
+
+        With group commit the cart is validated on the worker thread as usual, then the order joins the current
+        batch; the request waits for that batch to be committed.
+
+        Args:
+            email: The email of the user placing the order.
+            cart: The food_id to quantity mapping of the items to order.
+
+        Returns:
+            A tuple (orders, None) if the order was placed, or (None, error message) otherwise.
+
+        """
+        if self.committer is None:
+            return await self.call(self.user.submit_cart, email, cart)
+        error = await self.call(self.user.check_cart, cart)
+        if error:
+            return None, error
+        orders, shortages = await asyncio.wrap_future(
+            self.committer.submit(email, cart, self.user.order_timestamp()))
+        if shortages:
+            return None, await self.call(self.user.shortage_error, shortages)
+        return orders, None
+
+    def new_session(self, role, identity):
+        """
+        Creates a session token for a logged in user or admin.
+
+        Args:
+            role: "user" or "admin".
+            identity: The user's email or the admin's user ID.
+
+        Returns:
+            The session token.
+
+        """
+        token = secrets.token_urlsafe(24)
+        now = self.clock()
+        self.sessions[token] = (role, identity, now)
+        while self.sessions:
+            oldest_token, (_, _, last_used) = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and now - last_used <= self.session_lifetime:
+                break
+            del self.sessions[oldest_token]
+        return token
+
+    def session(self, headers, role):
+        """
+        Returns the identity of the session making the request and marks the session as used.
+
+        Args:
+            headers: The request headers, with lower-case names.
+            role: The role the endpoint requires.
+
+        Returns:
+            The user's email or the admin's user ID.
+
+        """
+        token = self.session_token(headers)
+        session = self.sessions.get(token)
+        now = self.clock()
+        if session is not None and now - session[2] > self.session_lifetime:
+            del self.sessions[token]
+            session = None
+        if session is None or session[0] != role:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Login required.")
+        self.sessions[token] = (session[0], session[1], now)
+        self.sessions.move_to_end(token)
+        return session[1]
+
+    def session_token(self, headers):
+        """
+        Returns the session token sent with a request.
+
+        Args:
+            headers: The request headers, with lower-case names.
+
+        Returns:
+            The token, or an empty string if there is none.
+
+        """
+        authorization = headers.get("authorization", "")
+        return authorization[len("Bearer "):] if authorization.startswith("Bearer ") else ""
+
+    async def dispatch(self, method, path, headers, body, query=None, source=LOCAL_SOURCE):
+        """
+        Routes a request to its handler.
+
+        Args:
+            method: The HTTP method.
+            path: The request path without the query string.
+            headers: The request headers, with lower-case names.
+            body: The parsed JSON body, or an empty dict.
+            query: The query string parameters, mapping each name to its last value.
+            source: The client's address, used to throttle failed logins.
+
+        Returns:
+            A tuple of (HTTP status, JSON-serialisable response).
+
+        """
+        parts = [part for part in path.split("/") if part]
+        query = query or {}
+
+        if parts == ["login"] and method == "POST":
+            try:
+                text_fields(body, ["email", "password"])
+            except ValueError as error:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(error))
+            try:
+                verified = await self.call(self.user.verify_user, body.get("email", ""), body.get("password", ""),
+                                           source)
+            except LoginThrottledError as error:
+                raise HttpError(HTTPStatus.TOO_MANY_REQUESTS, str(error))
+            if not verified:
+                raise HttpError(HTTPStatus.UNAUTHORIZED, "Invalid email or password.")
+            return HTTPStatus.OK, {"token": self.new_session("user", body["email"])}
+
+        if parts == ["logout"] and method == "POST":
+            self.sessions.pop(self.session_token(headers), None)
+            return HTTPStatus.OK, {"message": "Logged out."}
+
+        if parts == ["register"] and method == "POST":
+            try:
+                text_fields(body, ["full_name", "phone_number", "email", "address", "password"])
+            except ValueError as error:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(error))
+            user_data = {
+                "Full Name": body.get("full_name", ""),
+                "Phone Number": body.get("phone_number", ""),
+                "Email": body.get("email", ""),
+                "Address": body.get("address", ""),
+                "Password": body.get("password", "")
+            }
+            error = await self.call(self.user.register, user_data)
+            if error:
+                raise HttpError(HTTPStatus.BAD_REQUEST, error)
+            return HTTPStatus.CREATED, {"message": "Registration successful."}
+
+        if parts == ["menu"] and method == "GET":
+            numbers = {}
+            for name, default in (("limit", menu_page_size), ("min_price", None), ("max_price", None)):
+                value = query.get(name, "")
+                if value and not value.isdigit():
+                    raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number.")
+                numbers[name] = int(value) if value else default
+            if not 0 < numbers["limit"] <= MAX_PAGE_SIZE:
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+            version = await self.call(self.user.storage.catalog_version)
+            try:
+                items, next_cursor = await self.call(
+                    self.user.load_food_page, query.get("cursor") or None, numbers["min_price"],
+                    numbers["max_price"], query.get("in_stock", "") in ("1", "true"), numbers["limit"])
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid cursor.")
+            return HTTPStatus.OK, {"items": items, "next_cursor": next_cursor, "version": version}
+
+        if parts == ["menu", "changes"] and method == "GET":
+            since = query.get("since", "")
+            if not since.isdigit():
+                raise HttpError(HTTPStatus.BAD_REQUEST, "since must be a whole number.")
+            changes = await self.call(self.user.menu_changes, int(since))
+            if changes is None:
+                raise HttpError(HTTPStatus.GONE, "The changes since this version are no longer available. "
+                                                 "Reload the menu.")
+            return HTTPStatus.OK, changes
+
+        if parts == ["menu", "search"] and method == "GET":
+            limit = query.get("limit", "")
+            if limit and not (limit.isdigit() and 0 < int(limit) <= MAX_PAGE_SIZE):
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+            text = query.get("q", "")
+            if len(text) > MAX_QUERY_LENGTH or len(set(tokenize(text))) > MAX_QUERY_TERMS:
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"Search at most {MAX_QUERY_TERMS} words and "
+                                                        f"{MAX_QUERY_LENGTH} characters.")
+            items = await self.call(self.user.search_food_items, text, int(limit or menu_page_size))
+            return HTTPStatus.OK, {"items": items}
+
+        if parts == ["orders"]:
+            email = self.session(headers, "user")
+            if method == "POST":
+                try:
+                    cart = read_cart(body)
+                except ValueError as error:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, str(error))
+                orders, error = await self.submit_cart(email, cart)
+                if error:
+                    raise HttpError(HTTPStatus.CONFLICT, error)
+                return HTTPStatus.CREATED, {"orders": orders}
+            if method == "GET":
+                history = await self.call(self.user.get_order_history, email)
+                legacy_orders, orders = history if history is not None else ([], [])
+                return HTTPStatus.OK, {"legacy_orders": legacy_orders, "orders": orders}
+
+        if parts == ["metrics"] and method == "GET":
+            self.session(headers, "admin")
+            return HTTPStatus.OK, metrics.snapshot() if query.get("format") == "json" else metrics.to_prometheus()
+
+        if parts == ["admin", "login"] and method == "POST":
+            try:
+                text_fields(body, ["user_id", "password"])
+            except ValueError as error:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(error))
+            user_id = body.get("user_id", "")
+            try:
+                verified = await self.call(self.admin.verify_user, user_id, body.get("password", ""), source)
+            except LoginThrottledError as error:
+                raise HttpError(HTTPStatus.TOO_MANY_REQUESTS, str(error))
+            if not verified:
+                raise HttpError(HTTPStatus.UNAUTHORIZED, "Invalid user ID or password.")
+            return HTTPStatus.OK, {"token": self.new_session("admin", user_id)}
+
+        if parts[:2] == ["admin", "foods"]:
+            self.session(headers, "admin")
+            return await self.dispatch_admin_foods(method, parts[2:], body)
+
+        raise HttpError(HTTPStatus.NOT_FOUND, "Not found.")
+
+    async def dispatch_admin_foods(self, method, parts, body):
+        """
+        Handles the admin food item CRUD endpoints.
+
+        Args:
+            method: The HTTP method.
+            parts: The path segments after /admin/foods.
+            body: The parsed JSON body, or an empty dict.
+
+        Returns:
+            A tuple of (HTTP status, JSON-serialisable response).
+
+        """
+        fields = ["Name", "Quantity", "Price", "Discount", "Stock"]
+        if not parts:
+            if method == "GET":
+                records = await self.call(self.admin.storage.list_foods)
+                return HTTPStatus.OK, {"items": [self.admin.record_to_food_item(record) for record in records]}
+            if method == "POST":
+                missing = [field for field in fields if field not in body]
+                if missing:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, f"Missing fields: {', '.join(missing)}")
+                details = {field: str(body[field]) for field in fields}
+                try:
+                    food_item = await self.call(self.admin.create_food_item, details)
+                except FoodIdExhaustedError as error:
+                    raise HttpError(HTTPStatus.INSUFFICIENT_STORAGE, str(error))
+                except ValueError as error:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, str(error))
+                return HTTPStatus.CREATED, {"item": food_item}
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed.")
+
+        if parts == ["reprice"]:
+            if method != "POST":
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed.")
+            names = ["min_price", "max_price", "discount", "price_change"]
+            for name in names:
+                value = body.get(name)
+                if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number.")
+            error = validate_reprice(body.get("discount"), body.get("price_change"))
+            if error:
+                raise HttpError(HTTPStatus.BAD_REQUEST, error)
+            count = await self.call(self.admin.reprice, *[body.get(name) for name in names])
+            return HTTPStatus.OK, {"updated": count}
+
+        food_id = parts[0]
+        food_item = await self.call(self.admin.get_food_item, food_id)
+        if food_item is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Food item does not exist.")
+        if method == "GET":
+            return HTTPStatus.OK, {"item": food_item}
+        if method == "PUT":
+            food_item.update({field: str(body[field]) for field in fields if field in body})
+            try:
+                food_item = await self.call(self.admin.update_food_item, food_item)
+            except ValueError as error:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(error))
+            return HTTPStatus.OK, {"item": food_item}
+        if method == "DELETE":
+            await self.call(self.admin.delete_food_item, food_id)
+            return HTTPStatus.OK, {"message": "Food item removed."}
+        raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed.")
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves HTTP/1.1 requests on one client connection, keeping it open between requests.
+
+        Args:
+            reader: The connection's asyncio StreamReader.
+            writer: The connection's asyncio StreamWriter.
+
+        """
+        peer = writer.get_extra_info("peername")
+        source = peer[0] if isinstance(peer, tuple) else LOCAL_SOURCE
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_SIZE:
+                        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+                    raw_body = await reader.readexactly(length) if length else b""
+                    try:
+                        body = json.loads(raw_body) if raw_body else {}
+                    except ValueError:
+                        raise HttpError(HTTPStatus.BAD_REQUEST, "Request body must be JSON.")
+                    if not isinstance(body, dict):
+                        raise HttpError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+                    url = urlsplit(target)
+                    query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                    try:
+                        status, response = await self.dispatch(method.upper(), url.path, headers, body, query,
+                                                               source)
+                    except HttpError:
+                        raise
+                    except Exception:
+                        traceback.print_exc()
+                        raise HttpError(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error.")
+                except HttpError as error:
+                    status, response = error.status, {"error": error.message}
+                    keep_alive = keep_alive and error.status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+                if isinstance(response, str):
+                    payload, content_type = response.encode(), "text/plain; version=0.0.4"
+                else:
+                    payload, content_type = json.dumps(response).encode(), "application/json"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        """
+        Accepts client connections until the task is cancelled.
+
+        Args:
+            host: The interface to listen on.
+            port: The TCP port to listen on.
+
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"Food Delivery App service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """
+    Command line entry point for the service mode.
+    """
+    parser = argparse.ArgumentParser(description="Run the Food Delivery App as an HTTP/JSON service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record metrics and serve them to the admin at /metrics.")
+    parser.add_argument("--group-commit", action="store_true",
+                        help="Commit orders arriving close together as one write batch.")
+    parser.add_argument("--group-window-ms", type=float, default=group_commit_window_ms,
+                        help="How long an order waits for others to join its batch.")
+    parser.add_argument("--group-max-orders", type=int, default=group_commit_max_orders,
+                        help="Orders that commit a batch without waiting for the window to end.")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable()
+    group_commit = (args.group_window_ms, args.group_max_orders) if args.group_commit else None
+    try:
+        asyncio.run(FoodDeliveryService(group_commit=group_commit).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Service stopped.")
+
+
+if __name__ == "__main__":
+    main()
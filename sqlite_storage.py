@@ -0,0 +1,576 @@
+import argparse
+import csv
+import itertools
+import os
+import sqlite3
+
+from constants.constant import (catalog_change_limit, food_database, food_id_sequence, food_id_width,
+                                order_database, sqlite_database, user_database)
+from utils.change_log import summarize
+from utils.food_catalog import decode_cursor, encode_cursor
+from utils.food_id_allocator import next_food_ids, read_sequence
+from utils.food_record import FOOD_FIELDS, NUMERIC_FIELDS, FoodRecord, to_number, validate_number
+from utils.history_migration import count_legacy_entries
+from utils.menu_search import MenuSearchIndex
+from utils.order_log import ORDER_FIELDS
+from utils.paths import resource_path, resources_dir as default_resources_dir
+from utils.pricing import effective_price
+from utils.storage import Storage
+
+
+USER_COLUMNS = {
+    "Full Name": "full_name",
+    "Phone Number": "phone_number",
+    "Email": "email",
+    "Address": "address",
+    "Password": "password",
+    "Order History": "order_history"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT,
+    phone_number TEXT,
+    email TEXT NOT NULL,
+    address TEXT,
+    password TEXT,
+    order_history TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS foods (
+    food_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    quantity TEXT,
+    price INTEGER,
+    discount INTEGER,
+    stock INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_foods_price ON foods (price, food_id);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    order_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    food_id TEXT NOT NULL,
+    quantity INTEGER,
+    unit_price INTEGER,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_email ON orders (email);
+CREATE INDEX IF NOT EXISTS idx_orders_food_id ON orders (food_id);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    next_value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS food_changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    food_id TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS foods_added AFTER INSERT ON foods BEGIN
+    INSERT INTO food_changes (kind, food_id) VALUES ('add', NEW.food_id);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_edited AFTER UPDATE ON foods BEGIN
+    INSERT INTO food_changes (kind, food_id) VALUES (
+        CASE WHEN OLD.name IS NEW.name AND OLD.quantity IS NEW.quantity AND OLD.price IS NEW.price
+                  AND OLD.discount IS NEW.discount THEN 'stock' ELSE 'edit' END,
+        NEW.food_id);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_removed AFTER DELETE ON foods BEGIN
+    INSERT INTO food_changes (kind, food_id) VALUES ('remove', OLD.food_id);
+END;
+CREATE TRIGGER IF NOT EXISTS food_changes_pruned AFTER INSERT ON food_changes
+WHEN NEW.version % {prune_interval} = 0 BEGIN
+    DELETE FROM food_changes WHERE version <= NEW.version - {keep};
+END;
+""".format(prune_interval=max(1, catalog_change_limit // 10), keep=catalog_change_limit)
+
+
+def to_text(value):
+    """
+    Converts a column value back to the string form used in the CSV files.
+
+    Args:
+        value: The value read from SQLite.
+
+    Returns:
+        The value as a string, or None for NULL.
+
+    """
+    return None if value is None else str(value)
+
+
+def food_values(record, fields):
+    """
+    Converts the fields of a food item to the values stored in the foods table. Price, discount and stock are
+    checked with validate_number, as the admin functions do for the CSV backend, and stored as integers: a TEXT value
+    would compare greater than any INTEGER, so it would pass the stock check of every order.
+
+    Args:
+        record: The food item, as a FoodRecord or a dictionary of CSV text keyed by FOOD_FIELDS.
+        fields: The fields to convert, in column order.
+
+    Returns:
+        A list of the column values.
+
+    Raises:
+        ValueError: If a price or stock is not a whole non-negative number, or a discount not between 0 and 100.
+
+    """
+    values = []
+    for field in fields:
+        value = record[field]
+        if field in NUMERIC_FIELDS:
+            try:
+                values.append(validate_number(field, value))
+            except ValueError as error:
+                raise ValueError(f"Food item {record['food_id']}: {error}") from None
+        else:
+            values.append(str(value))
+    return values
+
+
+class SqliteStorage(Storage):
+    """
+    Storage backed by a single SQLite database in WAL mode, with indexed users, foods and orders tables.
+    """
+
+    def __init__(self, db_path, id_width=food_id_width):
+        """
+        Opens the database, switches it to WAL mode and creates the tables if needed.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            id_width: The number of digits of a food ID.
+
+        """
+        self.db_path = db_path
+        self.id_width = id_width
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.search_index = None
+        self.search_version = None
+        self.price_table = None
+        self.price_version = None
+
+    def food_record(self, row):
+        """
+        Converts a foods table row to a FoodRecord.
+
+        Args:
+            row: The sqlite3.Row to convert.
+
+        Returns:
+            The FoodRecord.
+
+        """
+        return FoodRecord(row["food_id"], to_text(row["name"]), to_text(row["quantity"]), row["price"],
+                          row["discount"], row["stock"])
+
+    def list_foods(self):
+        rows = self.connection.execute("SELECT * FROM foods ORDER BY rowid")
+        return [self.food_record(row) for row in rows]
+
+    def get_food(self, food_id):
+        row = self.connection.execute("SELECT * FROM foods WHERE food_id = ?", (str(food_id),)).fetchone()
+        return None if row is None else self.food_record(row)
+
+    def food_ids(self):
+        return {row[0] for row in self.connection.execute("SELECT food_id FROM foods")}
+
+    def allocate_food_ids(self, count, pending=()):
+        if self.connection.in_transaction:
+            return self.advance_food_id_sequence(count, pending)
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            return self.advance_food_id_sequence(count, pending)
+
+    def advance_food_id_sequence(self, count, pending=()):
+        """
+        Reserves a block of food IDs inside the caller's transaction.
+
+        Args:
+            count: The number of IDs to allocate.
+            pending: Ranges of food IDs allocated earlier but not saved yet, which the new block must not reuse.
+
+        Returns:
+            The range of allocated IDs.
+
+        """
+        rows = dict(self.connection.execute(
+            "SELECT name, next_value FROM sequences WHERE name IN ('food_id', 'food_id_limit')").fetchall())
+        sequence = None
+        if "food_id" in rows:
+            sequence = rows["food_id"], rows.get("food_id_limit", 10 ** self.id_width)
+        food_ids, sequence = next_food_ids(sequence, count, lambda: itertools.chain(self.food_ids(), *pending),
+                                           self.id_width)
+        self.connection.executemany("INSERT OR REPLACE INTO sequences (name, next_value) VALUES (?, ?)",
+                                    zip(("food_id", "food_id_limit"), sequence))
+        return food_ids
+
+    def add_food(self, record):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO foods (food_id, name, quantity, price, discount, stock) VALUES (?, ?, ?, ?, ?, ?)",
+                food_values(record, FOOD_FIELDS))
+        if self.search_index is not None:
+            self.search_index.add(record["food_id"], record["name"])
+        self.set_price_entry(record)
+
+    def add_foods(self, records):
+        with self.connection:
+            cursor = self.connection.executemany(
+                "INSERT INTO foods (food_id, name, quantity, price, discount, stock) VALUES (?, ?, ?, ?, ?, ?)",
+                (food_values(record, FOOD_FIELDS) for record in records))
+        self.search_index = None
+        self.price_table = None
+        return cursor.rowcount
+
+    def iter_foods(self):
+        for row in self.connection.execute("SELECT * FROM foods ORDER BY rowid"):
+            yield self.food_record(row)
+
+    def page_foods(self, cursor=None, limit=10, min_price=None, max_price=None, in_stock=False):
+        """
+        Returns one page of food items using keyset pagination over the (price, food_id) index.
+
+        The query seeks to the cursor in the index instead of using OFFSET, so its cost does not depend on the page
+        number.
+        """
+        conditions = []
+        parameters = []
+        if cursor is not None:
+            conditions.append("(price, food_id) > (?, ?)")
+            parameters.extend(decode_cursor(cursor))
+        if min_price is not None:
+            conditions.append("price >= ?")
+            parameters.append(min_price)
+        if max_price is not None:
+            conditions.append("price <= ?")
+            parameters.append(max_price)
+        if in_stock:
+            conditions.append("stock > 0")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT * FROM foods {where} ORDER BY price, food_id LIMIT ?", parameters + [limit + 1]).fetchall()
+        items = [self.food_record(row) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return items, None
+        return items, encode_cursor((rows[limit - 1]["price"], rows[limit - 1]["food_id"]))
+
+    def name_index(self):
+        """
+        Returns the name search index, rebuilding it when another connection has changed the database.
+
+        Writes through this connection update the index in place. PRAGMA data_version only changes when another
+        connection commits, so the index is rebuilt only after writes from other processes.
+
+        Returns:
+            The MenuSearchIndex.
+
+        """
+        version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        if self.search_index is None or version != self.search_version:
+            self.search_index = MenuSearchIndex()
+            for food_id, name in self.connection.execute("SELECT food_id, name FROM foods"):
+                self.search_index.add(food_id, name)
+            self.search_version = version
+        return self.search_index
+
+    def search_foods(self, query, limit=10):
+        food_ids = self.name_index().search(query, limit)
+        return [food for food in (self.get_food(food_id) for food_id in food_ids) if food is not None]
+
+    def catalog_version(self):
+        """
+        Returns the version of the last row of the food_changes table, which triggers on the foods table fill.
+        """
+        return self.connection.execute("SELECT COALESCE(MAX(version), 0) FROM food_changes").fetchone()[0]
+
+    def food_changes(self, since):
+        """
+        Reads the changes after a version from the food_changes table inside one read transaction, so the version
+        range and the rows agree.
+        """
+        with self.connection:
+            self.connection.execute("BEGIN")
+            oldest, newest = self.connection.execute(
+                "SELECT MIN(version), COALESCE(MAX(version), 0) FROM food_changes").fetchone()
+            rows = self.connection.execute("SELECT kind, food_id FROM food_changes WHERE version > ? ORDER BY version",
+                                           (since,)).fetchall()
+        if since > newest or (oldest is not None and since < oldest - 1) or (oldest is None and since != 0):
+            return None
+        return summarize(newest, [tuple(row) for row in rows], self.get_food)
+
+    def effective_prices(self):
+        """
+        Returns the effective unit prices, recomputing the table when another connection has changed the database.
+
+        Like the name index, the table is updated in place by writes through this connection.
+        """
+        version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        if self.price_table is None or version != self.price_version:
+            rows = self.connection.execute("SELECT food_id, price, discount FROM foods")
+            self.price_table = {food_id: effective_price(price or 0, discount or 0)
+                                for food_id, price, discount in rows}
+            self.price_version = version
+        return self.price_table
+
+    def set_price_entry(self, record):
+        """
+        Updates the effective price of a food item in the price table, if it has been built.
+
+        Args:
+            record: The food item dictionary written through this connection.
+
+        """
+        if self.price_table is not None:
+            self.price_table[str(record["food_id"])] = effective_price(to_number(record["price"]),
+                                                                       to_number(record["discount"]))
+
+    def reprice(self, min_price=None, max_price=None, discount=None, price_change=None):
+        """
+        Reprices a price range with a single UPDATE that uses the (price, food_id) index to find the rows.
+        """
+        new_price = "price" if price_change is None else "(price * (100 + :change) + 50) / 100"
+        new_discount = "discount" if discount is None else ":discount"
+        conditions = [f"(price <> {new_price} OR discount IS NOT {new_discount})"]
+        if min_price is not None:
+            conditions.append("price >= :min_price")
+        if max_price is not None:
+            conditions.append("price <= :max_price")
+        with self.connection:
+            cursor = self.connection.execute(
+                f"UPDATE foods SET price = {new_price}, discount = {new_discount} WHERE {' AND '.join(conditions)}",
+                {"change": price_change, "discount": discount, "min_price": min_price, "max_price": max_price})
+        if cursor.rowcount:
+            self.price_table = None
+        return cursor.rowcount
+
+    def update_food(self, record):
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE foods SET name = ?, quantity = ?, price = ?, discount = ?, stock = ? WHERE food_id = ?",
+                food_values(record, FOOD_FIELDS[1:]) + [str(record["food_id"])])
+        if cursor.rowcount > 0:
+            if self.search_index is not None:
+                self.search_index.add(record["food_id"], record["name"])
+            self.set_price_entry(record)
+        return cursor.rowcount > 0
+
+    def delete_food(self, food_id):
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM foods WHERE food_id = ?", (str(food_id),))
+        if self.search_index is not None:
+            self.search_index.remove(food_id)
+        if self.price_table is not None:
+            self.price_table.pop(str(food_id), None)
+        return cursor.rowcount > 0
+
+    def take_stock(self, quantities):
+        """
+        Takes the stock of several food items inside the caller's transaction.
+
+        Each decrement is a single guarded UPDATE, so it cannot oversell. The caller must roll back if any
+        shortages are returned.
+
+        Args:
+            quantities: A dictionary mapping each food_id to the number of units to take.
+
+        Returns:
+            A tuple (updated items, shortages), as returned by decrement_stocks.
+
+        """
+        shortages = {}
+        for food_id, quantity in quantities.items():
+            cursor = self.connection.execute(
+                "UPDATE foods SET stock = stock - ? WHERE food_id = ? AND stock >= ?",
+                (quantity, str(food_id), quantity))
+            if cursor.rowcount == 0:
+                row = self.connection.execute("SELECT stock FROM foods WHERE food_id = ?", (str(food_id),)).fetchone()
+                shortages[str(food_id)] = row[0] if row else 0
+        if shortages:
+            return None, shortages
+        placeholders = ", ".join("?" * len(quantities))
+        rows = self.connection.execute(f"SELECT * FROM foods WHERE food_id IN ({placeholders})",
+                                       [str(food_id) for food_id in quantities])
+        return {row["food_id"]: self.food_record(row) for row in rows}, {}
+
+    def decrement_stocks(self, quantities):
+        with self.connection:
+            updated_items, shortages = self.take_stock(quantities)
+            if shortages:
+                self.connection.rollback()
+        return updated_items, shortages
+
+    def commit_order(self, email, quantities, timestamp):
+        with self.connection:
+            updated_items, shortages = self.take_stock(quantities)
+            if shortages:
+                self.connection.rollback()
+                return None, shortages
+            orders = self.order_records(email, quantities, updated_items, timestamp)
+            self.insert_orders(orders)
+        return orders, {}
+
+    def commit_orders(self, requests):
+        """
+        Commits every order of the batch in a single transaction, with a savepoint per order so that an order short of
+        stock is rolled back on its own.
+        """
+        results = []
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for email, quantities, timestamp in requests:
+                self.connection.execute("SAVEPOINT order_request")
+                updated_items, shortages = self.take_stock(quantities)
+                if shortages:
+                    self.connection.execute("ROLLBACK TO order_request")
+                    results.append((None, shortages))
+                else:
+                    orders = self.order_records(email, quantities, updated_items, timestamp)
+                    self.insert_orders(orders)
+                    results.append((orders, {}))
+                self.connection.execute("RELEASE order_request")
+        return results
+
+    def find_users(self, email):
+        rows = self.connection.execute("SELECT * FROM users WHERE email = ? ORDER BY id", (email,))
+        return [{name: row[column] for name, column in USER_COLUMNS.items()} for row in rows]
+
+    def add_user(self, user_data):
+        columns = [USER_COLUMNS[name] for name in user_data]
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                list(user_data.values()))
+
+    def update_user(self, email, new_data):
+        assignments = ", ".join(f"{USER_COLUMNS[name]} = ?" for name in new_data)
+        with self.connection:
+            self.connection.execute(f"UPDATE users SET {assignments} WHERE email = ?",
+                                    list(new_data.values()) + [email])
+
+    def add_order(self, order):
+        self.add_orders([order])
+
+    def add_orders(self, orders):
+        with self.connection:
+            self.insert_orders(orders)
+
+    def insert_orders(self, orders):
+        """
+        Inserts order rows inside the caller's transaction.
+
+        Args:
+            orders: The order dictionaries, keyed by the order log fields.
+
+        """
+        self.connection.executemany(
+            f"INSERT INTO orders ({', '.join(ORDER_FIELDS)}) VALUES ({', '.join('?' * len(ORDER_FIELDS))})",
+            ([order[field] for field in ORDER_FIELDS] for order in orders))
+
+    def iter_order_batches(self, batch_size):
+        cursor = self.connection.execute(f"SELECT {', '.join(ORDER_FIELDS)} FROM orders ORDER BY id")
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            yield batch
+
+    def orders_for(self, email):
+        rows = self.connection.execute("SELECT * FROM orders WHERE email = ? ORDER BY id", (email,))
+        return [{field: to_text(row[field]) for field in ORDER_FIELDS} for row in rows]
+
+    def legacy_entry_count(self):
+        return count_legacy_entries(self.connection.execute(
+            "SELECT email, order_history FROM users WHERE TRIM(order_history, ' ' || char(9, 10, 13)) <> '' "
+            "ORDER BY id"))
+
+
+def read_csv_rows(csv_path):
+    """
+    Streams the rows of a CSV file as dictionaries, yielding nothing if the file does not exist.
+
+    Args:
+        csv_path: Path to the CSV file.
+
+    Yields:
+        Each row keyed by the CSV header.
+
+    """
+    if not os.path.exists(csv_path):
+        return
+    with open(csv_path, 'r', newline='') as file:
+        yield from csv.DictReader(file)
+
+
+def migrate_csv_to_sqlite(resources_dir, db_path):
+    """
+    Copies the users, food items and orders from the CSV files into an SQLite database in one transaction.
+
+    Existing rows in the database are replaced.
+
+    Args:
+        resources_dir: Directory containing the CSV files.
+        db_path: Path to the SQLite database file.
+
+    Returns:
+        A dictionary with the number of users, foods and orders migrated.
+
+    Raises:
+        ValueError: If a food item's price, discount or stock is not valid; nothing is migrated then.
+
+    """
+    target = SqliteStorage(db_path)
+    user_rows = read_csv_rows(os.path.join(resources_dir, user_database))
+    food_rows = read_csv_rows(os.path.join(resources_dir, food_database))
+    order_rows = read_csv_rows(os.path.join(resources_dir, order_database))
+    counts = {}
+    with target.connection:
+        for table in ("users", "foods", "orders", "sequences"):
+            target.connection.execute(f"DELETE FROM {table}")
+        target.connection.executemany(
+            f"INSERT INTO users ({', '.join(USER_COLUMNS.values())}) VALUES ({', '.join('?' * len(USER_COLUMNS))})",
+            ([row.get(name) for name in USER_COLUMNS] for row in user_rows))
+        target.connection.executemany(
+            "INSERT OR REPLACE INTO foods (food_id, name, quantity, price, discount, stock) VALUES (?, ?, ?, ?, ?, ?)",
+            (food_values(row, FOOD_FIELDS) for row in food_rows))
+        target.connection.executemany(
+            f"INSERT INTO orders ({', '.join(ORDER_FIELDS)}) VALUES ({', '.join('?' * len(ORDER_FIELDS))})",
+            ([row[field] for field in ORDER_FIELDS] for row in order_rows))
+        sequence = read_sequence(os.path.join(resources_dir, food_id_sequence), target.id_width)
+        if sequence is not None:
+            target.connection.executemany("INSERT OR REPLACE INTO sequences (name, next_value) VALUES (?, ?)",
+                                          zip(("food_id", "food_id_limit"), sequence))
+        for table in ("users", "foods", "orders"):
+            counts[table] = target.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    target.connection.close()
+    return counts
+
+
+def main():
+    """
+    Command line entry point for the one-shot CSV to SQLite migration.
+    """
+    parser = argparse.ArgumentParser(description="Migrate the Food Delivery App CSV files to SQLite.")
+    parser.add_argument("--resources", default=default_resources_dir, help="Directory containing the CSV files.")
+    parser.add_argument("--database", default=resource_path(sqlite_database),
+                        help="Path of the SQLite database to create.")
+    args = parser.parse_args()
+
+    counts = migrate_csv_to_sqlite(args.resources, args.database)
+    print(f"Migrated {counts['users']} users, {counts['foods']} food items and {counts['orders']} orders "
+          f"to {args.database}.")
+    print('Set storage_backend = "sqlite" in constants/constant.py to use it.')
+
+
+if __name__ == "__main__":
+    main()
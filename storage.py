@@ -0,0 +1,659 @@
+import contextlib
+import itertools
+import os
+import threading
+
+from constants.constant import (food_id_sequence, food_id_width, sqlite_database, storage_backend, user_layout,
+                                user_shard_directory)
+from utils.food_catalog import food_catalog
+from utils.food_id_allocator import FoodIdAllocator
+from utils.history_migration import count_legacy_entries, iter_histories
+from utils.order_log import order_log
+from utils.paths import resource_path
+from utils.pricing import effective_price
+from utils.user_index import user_index
+
+
+class Storage:
+    """
+    Interface to the persisted users, food items and orders of the Food Delivery App.
+
+    Records are exchanged as dictionaries keyed by the column names of the CSV files: food items use the
+    food_database.csv header, users the user_database.csv header and orders the order log fields. Food items are
+    returned as FoodRecords, which hold price, discount and stock as integers and read like those dictionaries.
+    """
+
+    def list_foods(self):
+        """
+        Returns all food items in insertion order.
+
+        Returns:
+            A list of FoodRecords.
+
+        """
+        raise NotImplementedError
+
+    def get_food(self, food_id):
+        """
+        Retrieves a food item by its ID.
+
+        Args:
+            food_id: The food_id of the food item.
+
+        Returns:
+            The FoodRecord, or None if not found.
+
+        """
+        raise NotImplementedError
+
+    def food_exists(self, food_id):
+        """
+        Checks if a food item with the given ID exists.
+
+        Args:
+            food_id: The food_id to check.
+
+        Returns:
+            True if the food item exists, False otherwise.
+
+        """
+        return self.get_food(food_id) is not None
+
+    def food_ids(self):
+        """
+        Returns the set of existing food IDs.
+
+        Returns:
+            A set of food_id strings.
+
+        """
+        raise NotImplementedError
+
+    def allocate_food_ids(self, count, pending=()):
+        """
+        Allocates a block of unused food IDs.
+
+        Args:
+            count: The number of IDs to allocate.
+            pending: Ranges of food IDs allocated earlier but not saved yet, which the new block must not reuse.
+
+        Returns:
+            The range of allocated IDs.
+
+        Raises:
+            FoodIdExhaustedError: If not enough IDs of the configured width are left.
+
+        """
+        raise NotImplementedError
+
+    def add_food(self, record):
+        """
+        Adds a new food item.
+
+        Args:
+            record: The food item dictionary.
+
+        """
+        raise NotImplementedError
+
+    def add_foods(self, records):
+        """
+        Adds food items streamed from an iterable in one write pass.
+
+        Args:
+            records: An iterable of food item dictionaries.
+
+        Returns:
+            The number of food items added.
+
+        """
+        raise NotImplementedError
+
+    def iter_foods(self):
+        """
+        Streams all food items in insertion order.
+
+        Yields:
+            Each FoodRecord.
+
+        """
+        yield from self.list_foods()
+
+    def page_foods(self, cursor=None, limit=10, min_price=None, max_price=None, in_stock=False):
+        """
+        Returns one page of food items ordered by price, then food_id.
+
+        Args:
+            cursor: The cursor returned with the previous page, or None for the first page.
+            limit: The maximum number of items on the page.
+            min_price: The lowest price to include, or None.
+            max_price: The highest price to include, or None.
+            in_stock: Whether to include only items with stock left.
+
+        Returns:
+            A tuple (items, next cursor); the cursor is None when there are no more items.
+
+        """
+        raise NotImplementedError
+
+    def search_foods(self, query, limit=10):
+        """
+        Returns the food items whose names best match a query, allowing prefixes and typos.
+
+        Args:
+            query: The search text.
+            limit: The maximum number of results.
+
+        Returns:
+            The list of matching FoodRecords, best match first.
+
+        """
+        raise NotImplementedError
+
+    def update_food(self, record):
+        """
+        Replaces an existing food item.
+
+        Args:
+            record: The updated food item dictionary.
+
+        Returns:
+            True if the food item existed and was updated, False otherwise.
+
+        """
+        raise NotImplementedError
+
+    def delete_food(self, food_id):
+        """
+        Deletes a food item.
+
+        Args:
+            food_id: The food_id of the food item to delete.
+
+        Returns:
+            True if the food item existed and was deleted, False otherwise.
+
+        """
+        raise NotImplementedError
+
+    def catalog_version(self):
+        """
+        Returns the catalog version, which increases with every change to the food items, including stock changes.
+
+        Read the version before loading the catalog, then pass it to food_changes to fetch later changes.
+
+        Returns:
+            The current version.
+
+        """
+        raise NotImplementedError
+
+    def food_changes(self, since):
+        """
+        Returns the food items added, edited and removed since a catalog version. Items changed several times are
+        reported once, with their current values.
+
+        Args:
+            since: The catalog version the client has.
+
+        Returns:
+            A dictionary with the new "version", the "added" and "edited" FoodRecords and the "removed" food_ids,
+            or None if the changes are no longer known and the client must reload the whole catalog.
+
+        """
+        raise NotImplementedError
+
+    def effective_prices(self):
+        """
+        Returns the price a customer pays for one unit of every food item, after its discount.
+
+        Returns:
+            A dictionary mapping each food_id to its effective unit price in INR.
+
+        """
+        raise NotImplementedError
+
+    def reprice(self, min_price=None, max_price=None, discount=None, price_change=None):
+        """
+        Sets the discount or changes the price of every food item in a price range, as one update.
+
+        Args:
+            min_price: The lowest current price to include, or None.
+            max_price: The highest current price to include, or None.
+            discount: The discount to set in percent, or None to keep each item's discount.
+            price_change: The percentage to change each price by, e.g. -10, or None to keep the prices.
+
+        Returns:
+            The number of food items changed.
+
+        """
+        raise NotImplementedError
+
+    def decrement_stock(self, food_id, quantity):
+        """
+        Atomically takes the given quantity out of a food item's stock if enough is available.
+
+        Args:
+            food_id: The food_id of the food item.
+            quantity: The number of units to take.
+
+        Returns:
+            The updated FoodRecord, or None if the item does not exist or has insufficient stock.
+
+        """
+        updated_items, shortages = self.decrement_stocks({str(food_id): quantity})
+        return None if shortages else updated_items[str(food_id)]
+
+    def decrement_stocks(self, quantities):
+        """
+        Atomically takes the given quantities out of several food items' stock, only if all are available.
+
+        Args:
+            quantities: A dictionary mapping each food_id to the number of units to take.
+
+        Returns:
+            A tuple (updated items, shortages). On success, updated items maps each food_id to its updated
+            FoodRecord and shortages is empty. Otherwise nothing is changed, updated items is None and
+            shortages maps each food_id that cannot be served to its available stock.
+
+        """
+        raise NotImplementedError
+
+    def batch(self):
+        """
+        Returns a context manager grouping many updates, letting the storage delay costly writes to its end.
+
+        Every food update is still applied and visible immediately in this process, while a storage may hold back
+        the order lines until they are written together with the stock they took; call flush to persist the delayed
+        writes before the block ends.
+
+        Returns:
+            The context manager.
+
+        """
+        return contextlib.nullcontext()
+
+    def flush(self):
+        """
+        Persists the writes delayed by an open batch.
+        """
+
+    def find_users(self, email):
+        """
+        Returns every user registered with the given email.
+
+        Args:
+            email: The user's email address.
+
+        Returns:
+            A list of user dictionaries, in registration order.
+
+        """
+        raise NotImplementedError
+
+    def add_user(self, user_data):
+        """
+        Registers a new user.
+
+        Args:
+            user_data: The user dictionary, in user_database.csv column order.
+
+        """
+        raise NotImplementedError
+
+    def update_user(self, email, new_data):
+        """
+        Updates the profile fields of every user registered with the given email.
+
+        Args:
+            email: The user's email address.
+            new_data: The columns to update and their new values.
+
+        """
+        raise NotImplementedError
+
+    def new_order_id(self):
+        """
+        Generates a unique order ID.
+
+        Returns:
+            The new order ID.
+
+        """
+        return order_log.new_order_id()
+
+    def add_order(self, order):
+        """
+        Records an ordered item.
+
+        Args:
+            order: The order dictionary, keyed by the order log fields.
+
+        """
+        raise NotImplementedError
+
+    def add_orders(self, orders):
+        """
+        Records several ordered items together.
+
+        Args:
+            orders: The order dictionaries, keyed by the order log fields.
+
+        """
+        for order in orders:
+            self.add_order(order)
+
+    def commit_order(self, email, quantities, timestamp):
+        """
+        Places a multi-item order: takes the stock of every line item and records them under one order ID.
+
+        Either every line item is committed or none is.
+
+        Args:
+            email: The email of the user placing the order.
+            quantities: A dictionary mapping each food_id to the number of units ordered.
+            timestamp: The order time, formatted as "%Y-%m-%d %H:%M:%S".
+
+        Returns:
+            A tuple (orders, shortages): the recorded order dictionaries and an empty dictionary on success, or
+            None and a dictionary mapping each food_id that cannot be served to its available stock.
+
+        """
+        updated_items, shortages = self.decrement_stocks(quantities)
+        if shortages:
+            return None, shortages
+        orders = self.order_records(email, quantities, updated_items, timestamp)
+        self.add_orders(orders)
+        return orders, {}
+
+    def commit_orders(self, requests):
+        """
+        Commits several independent orders as one write batch, for group commit.
+
+        Each order is validated and either committed or rejected on its own, exactly as by commit_order, but the
+        storage persists the whole batch together and syncs it to disk once.
+
+        Args:
+            requests: A list of (email, quantities, timestamp) tuples, one per order, as taken by commit_order.
+
+        Returns:
+            A list with the (orders, shortages) result of commit_order for each request, in request order.
+
+        """
+        with self.batch():
+            return [self.commit_order(*request) for request in requests]
+
+    def order_records(self, email, quantities, food_items, timestamp):
+        """
+        Builds the order dictionaries for the line items of one order, sharing a new order ID. Each line records the
+        unit price after the item's discount.
+
+        Args:
+            email: The email of the user placing the order.
+            quantities: A dictionary mapping each food_id to the number of units ordered.
+            food_items: A dictionary mapping each food_id to its FoodRecord.
+            timestamp: The order time.
+
+        Returns:
+            A list of order dictionaries.
+
+        """
+        order_id = self.new_order_id()
+        return [{
+            "order_id": order_id,
+            "email": email,
+            "food_id": food_id,
+            "quantity": quantity,
+            "unit_price": effective_price(food_items[food_id].price, food_items[food_id].discount),
+            "timestamp": timestamp
+        } for food_id, quantity in quantities.items()]
+
+    def iter_order_batches(self, batch_size):
+        """
+        Streams every order line in batches, oldest first. The lines of one order are stored next to each other.
+
+        Args:
+            batch_size: The maximum number of order lines per batch.
+
+        Yields:
+            A list of order lines, each a sequence of values in ORDER_FIELDS order.
+
+        """
+        raise NotImplementedError
+
+    def orders_for(self, email):
+        """
+        Returns the orders placed by a user, oldest first.
+
+        Args:
+            email: The user's email address.
+
+        Returns:
+            A list of order dictionaries.
+
+        """
+        raise NotImplementedError
+
+    def legacy_entry_count(self):
+        """
+        Counts the orders in the legacy "Order History" column, whether migrated or not, reading every user.
+
+        Returns:
+            The number of legacy entries, counting only the first row with a history for each email.
+
+        """
+        raise NotImplementedError
+
+
+class CsvStorage(Storage):
+    """
+    Storage backed by the CSV files in the resources directory.
+    """
+
+    def __init__(self, catalog, users, orders, allocator=None):
+        """
+        Initializes the CSV storage from its food catalog, user index and order log.
+
+        Args:
+            catalog: The FoodCatalog caching the food CSV file.
+            users: The UserIndex over the user CSV file, or the ShardedUserStore.
+            orders: The OrderLog holding placed orders.
+            allocator: The FoodIdAllocator; defaults to a sequence file next to the food CSV file.
+
+        """
+        self.catalog = catalog
+        self.users = users
+        self.orders = orders
+        if allocator is None:
+            allocator = FoodIdAllocator(os.path.join(os.path.dirname(catalog.csv_path), food_id_sequence),
+                                        food_id_width)
+        self.allocator = allocator
+        self.batched = threading.local()
+
+    def list_foods(self):
+        return self.catalog.all_items()
+
+    def get_food(self, food_id):
+        return self.catalog.get(food_id)
+
+    def food_exists(self, food_id):
+        return self.catalog.contains(food_id)
+
+    def food_ids(self):
+        return self.catalog.ids()
+
+    def allocate_food_ids(self, count, pending=()):
+        return self.allocator.allocate(count, lambda: itertools.chain(self.catalog.ids(), *pending))
+
+    def add_food(self, record):
+        self.catalog.append(record)
+
+    def add_foods(self, records):
+        return self.catalog.append_many(records)
+
+    def page_foods(self, cursor=None, limit=10, min_price=None, max_price=None, in_stock=False):
+        return self.catalog.page(cursor, limit, min_price, max_price, in_stock)
+
+    def search_foods(self, query, limit=10):
+        return self.catalog.search(query, limit)
+
+    def update_food(self, record):
+        return self.catalog.replace(record)
+
+    def delete_food(self, food_id):
+        return self.catalog.remove(food_id)
+
+    def catalog_version(self):
+        return self.catalog.version()
+
+    def food_changes(self, since):
+        return self.catalog.changes_since(since)
+
+    def effective_prices(self):
+        return self.catalog.effective_prices()
+
+    def reprice(self, min_price=None, max_price=None, discount=None, price_change=None):
+        return self.catalog.reprice(min_price, max_price, discount, price_change)
+
+    def decrement_stocks(self, quantities):
+        return self.catalog.decrement_stocks(quantities)
+
+    def commit_orders(self, requests):
+        """
+        Takes the stock of every order in the cache, then appends all order lines with one write and rewrites the
+        food file once, syncing each file once for the whole batch, as write_orders does.
+        """
+        results = []
+        batch_orders = []
+        with self.catalog.deferred_writes():
+            for email, quantities, timestamp in requests:
+                updated_items, shortages = self.catalog.decrement_stocks(quantities)
+                if shortages:
+                    results.append((None, shortages))
+                    continue
+                orders = self.order_records(email, quantities, updated_items, timestamp)
+                batch_orders.extend(orders)
+                results.append((orders, {}))
+            if batch_orders:
+                self.write_orders(batch_orders, sync=True)
+        return results
+
+    def write_orders(self, orders, sync=False):
+        """
+        Appends order lines and writes the deferred stock updates, holding both locks. If appending the order lines
+        fails, the stock updates are left unwritten, and if rewriting the food file fails, the order lines are removed
+        again, so either both writes are kept or neither is. Must be called inside deferred_writes.
+
+        Args:
+            orders: The order dictionaries, keyed by the order log fields.
+            sync: Whether to fsync both files.
+
+        """
+        with self.catalog.lock, self.orders.lock:
+            size = self.orders.size()
+            self.orders.append_many(orders, sync=sync)
+            try:
+                self.catalog.flush(sync=sync)
+            except BaseException:
+                self.orders.truncate(size)
+                raise
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defers the food file rewrites and holds back the order lines recorded by this thread until flush or the end
+        of the block, so that the order lines and the stock they took are always persisted together. If the block
+        raises, both are discarded.
+        """
+        with self.catalog.deferred_writes():
+            if getattr(self.batched, "orders", None) is not None:
+                yield
+                return
+            self.batched.orders = []
+            try:
+                yield
+                self.flush()
+            finally:
+                self.batched.orders = None
+
+    def flush(self):
+        orders = getattr(self.batched, "orders", None)
+        if orders:
+            self.write_orders(orders)
+            orders.clear()
+        else:
+            self.catalog.flush()
+
+    def find_users(self, email):
+        return self.users.find(email)
+
+    def add_user(self, user_data):
+        self.users.append(user_data)
+
+    def update_user(self, email, new_data):
+        self.users.update(email, new_data)
+
+    def add_order(self, order):
+        self.add_orders([order])
+
+    def add_orders(self, orders):
+        batched = getattr(self.batched, "orders", None)
+        if batched is not None:
+            batched.extend(orders)
+        else:
+            self.orders.append_many(orders)
+
+    def iter_order_batches(self, batch_size):
+        return self.orders.iter_batches(batch_size)
+
+    def orders_for(self, email):
+        return self.orders.orders_for(email)
+
+    def legacy_entry_count(self):
+        return count_legacy_entries(itertools.chain.from_iterable(map(iter_histories, self.users.paths())))
+
+
+def create_storage(backend):
+    """
+    Creates the storage for the configured backend; the CSV backend keeps its users in the configured user_layout.
+
+    Args:
+        backend: "csv" or "sqlite".
+
+    Returns:
+        The Storage instance.
+
+    """
+    if backend == "csv":
+        users = user_index
+        if user_layout == "sharded":
+            from utils.user_shards import ShardedUserStore
+            users = ShardedUserStore(resource_path(user_shard_directory))
+        return CsvStorage(food_catalog, users, order_log)
+    if backend == "sqlite":
+        from utils.sqlite_storage import SqliteStorage
+        return SqliteStorage(resource_path(sqlite_database))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+shared_storage = None
+shared_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    Returns the storage of the configured backend, creating it on first use.
+
+    Importing this module does no I/O; the storage (and, for SQLite, the database connection) is only created
+    when the app first needs it.
+
+    Returns:
+        The shared Storage instance.
+
+    """
+    global shared_storage
+    if shared_storage is None:
+        with shared_storage_lock:
+            if shared_storage is None:
+                shared_storage = create_storage(storage_backend)
+    return shared_storage
@@ -0,0 +1,139 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import tempfile
+import time
+
+from utils.food_catalog import FoodCatalog
+from utils.order_log import OrderLog
+from utils.storage import CsvStorage
+from utils.user_index import UserIndex
+
+FOOD_ID = "10001"
+
+
+def open_storage(backend, directory):
+    """
+    Opens a storage over the stress test's private data directory.
+
+    Args:
+        backend: "csv" or "sqlite".
+        directory: The directory holding the test data.
+
+    Returns:
+        The Storage instance.
+
+    """
+    if backend == "sqlite":
+        from utils.sqlite_storage import SqliteStorage
+        return SqliteStorage(os.path.join(directory, "stress.db"))
+    return CsvStorage(FoodCatalog(os.path.join(directory, "food.csv")),
+                      UserIndex(os.path.join(directory, "users.csv")),
+                      OrderLog(os.path.join(directory, "orders.csv")))
+
+
+def prepare(backend, directory, stock):
+    """
+    Creates a catalog holding a single food item with the given stock.
+
+    Args:
+        backend: "csv" or "sqlite".
+        directory: The directory to create the test data in.
+        stock: The initial stock of the food item.
+
+    """
+    with open(os.path.join(directory, "food.csv"), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["food_id", "name", "quantity", "price", "discount", "stock"])
+    with open(os.path.join(directory, "users.csv"), 'w', newline='') as file:
+        csv.writer(file).writerow(["Full Name", "Phone Number", "Email", "Address", "Password", "Order History"])
+    open_storage(backend, directory).add_food({
+        "food_id": FOOD_ID, "name": "Stress Test Thali", "quantity": "1 plate",
+        "price": "100", "discount": "0", "stock": str(stock)
+    })
+
+
+def worker(backend, directory, worker_id, results):
+    """
+    Orders one unit at a time until the item is sold out, recording each successful order.
+
+    Args:
+        backend: "csv" or "sqlite".
+        directory: The directory holding the test data.
+        worker_id: Number of this worker, used in its customer email.
+        results: Queue receiving the number of units this worker sold.
+
+    """
+    storage = open_storage(backend, directory)
+    email = f"worker{worker_id}@stress.test"
+    sold = 0
+    while True:
+        food_item = storage.decrement_stock(FOOD_ID, 1)
+        if food_item is None:
+            break
+        storage.add_order({
+            "order_id": storage.new_order_id(), "email": email, "food_id": FOOD_ID,
+            "quantity": 1, "unit_price": food_item["price"], "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
+        sold += 1
+    results.put(sold)
+
+
+def run(backend, workers, stock):
+    """
+    Runs one round of concurrent ordering and checks that exactly the initial stock was sold.
+
+    Args:
+        backend: "csv" or "sqlite".
+        workers: Number of worker processes.
+        stock: The initial stock of the food item.
+
+    Returns:
+        A tuple of (units sold, final stock, orders recorded, orders per second).
+
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        prepare(backend, directory, stock)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(backend, directory, worker_id, results))
+                     for worker_id in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        sold = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        storage = open_storage(backend, directory)
+        final_stock = int(storage.get_food(FOOD_ID)["stock"])
+        recorded = sum(len(storage.orders_for(f"worker{worker_id}@stress.test")) for worker_id in range(workers))
+    return sold, final_stock, recorded, sold / elapsed
+
+
+def main():
+    """
+    Command line entry point: stress the stock decrement with a growing number of worker processes.
+    """
+    parser = argparse.ArgumentParser(description="Multi-process oversell stress test for stock decrements.")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--stock", type=int, default=500, help="Initial stock of the contended item.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Worker process counts to run.")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'workers':>8} {'sold':>8} {'stock':>8} {'orders':>8} {'orders/sec':>12}")
+    for workers in args.workers:
+        sold, final_stock, recorded, rate = run(args.backend, workers, args.stock)
+        oversold = sold != args.stock or final_stock != 0 or recorded != sold
+        failed = failed or oversold
+        print(f"{workers:>8} {sold:>8} {final_stock:>8} {recorded:>8} {rate:>12.1f}{'  OVERSOLD' if oversold else ''}")
+    if failed:
+        raise SystemExit("Stock accounting mismatch detected.")
+    print("No oversell: every run sold exactly the initial stock.")
+
+
+if __name__ == "__main__":
+    main()
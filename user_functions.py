@@ -1,10 +1,13 @@
-import csv
-import os
 import re
-from pathlib import Path
 import datetime
 
-from constants.constant import user_database, food_database, resources
+from constants.constant import menu_page_size
+from utils.food_record import to_number
+from utils.history_migration import history_lines, legacy_entry_number
+from utils.login_throttle import LOCAL_SOURCE, LoginThrottledError, login_keys, login_throttle
+from utils.metrics import instrumented
+from utils.pricing import effective_price
+from utils.storage import get_storage
 
 
 class UserFunctions:
@@ -12,13 +15,17 @@ class UserFunctions:
     This class handles user-related functionality, including user registration, login, placing orders,
     updating user profile, and managing order history.
     """
-    def __init__(self):
+    def __init__(self, storage=None):
         """
-        Initialize the UserFunctions class by setting the paths to user and food databases.
+        Initialize the UserFunctions class with the storage that persists users, food items and orders.
+
+        Parameters:
+            storage (Storage): The storage to use; defaults to the configured shared storage.
+
         """
-        self.root = Path(__file__).parent.parent
-        self.user_csv_path = os.path.join(self.root, resources, user_database)
-        self.food_csv_path = os.path.join(self.root, resources, food_database)
+        self.storage = get_storage() if storage is None else storage
+        self.menu = None
+        self.menu_version = None
 
     def user(self, app):
         """
@@ -27,6 +34,9 @@ class UserFunctions:
         Parameters:
             app (object): An instance of the main application class.
 
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
         """
         print("***User login screen***")
         print("1. Login")
@@ -36,14 +46,14 @@ class UserFunctions:
         choice = input("Please enter your choice: ")
 
         if choice == "1":
-            self.login_user(app)
+            return self.login_user, app
         elif choice == "2":
-            self.register_user(app)
+            return self.register_user, app
         elif choice == "3":
-            app.welcome_screen()
+            return (app.welcome_screen,)
         else:
             print("Invalid choice. Please try again.")
-            self.user(app)
+            return self.user, app
 
     def register_user(self, app):
         """
@@ -52,6 +62,9 @@ class UserFunctions:
         Parameters:
             app (object): An instance of the main application class.
 
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
         """
         print("***User Registration***")
         full_name = input("Enter your full name: ")
@@ -60,21 +73,6 @@ class UserFunctions:
         address = input("Enter your address: ")
         password = input("Enter your password: ")
 
-        if not self.validate_phone_number(phone_number):
-            print("Invalid phone number. Please enter a 10-digit phone number.")
-            self.user(app)
-            return
-
-        if not self.validate_email(email):
-            print("Invalid email address. Please enter a valid email.")
-            self.user(app)
-            return
-
-        if not self.validate_password(password):
-            print("Invalid password. Please enter a password with at least 8 characters.")
-            self.user(app)
-            return
-
         user_data = {
             "Full Name": full_name,
             "Phone Number": phone_number,
@@ -82,10 +80,37 @@ class UserFunctions:
             "Address": address,
             "Password": password
         }
-        self.save_user_data(user_data)
+        error = self.register(user_data)
+        if error:
+            print(error)
+            return self.user, app
 
         print("Registration successful! Please proceed to login.")
-        self.user(app)
+        return self.user, app
+
+    @instrumented("user.register")
+    def register(self, user_data):
+        """
+        Validate a new user's details and save them to the user database, without prompting.
+
+        Parameters:
+            user_data (dict): A dictionary containing user information, in user database column order.
+
+        Returns:
+            str: An error message if the details are invalid, None if the user was registered.
+
+        """
+        if not self.validate_phone_number(user_data["Phone Number"]):
+            return "Invalid phone number. Please enter a 10-digit phone number."
+
+        if not self.validate_email(user_data["Email"]):
+            return "Invalid email address. Please enter a valid email."
+
+        if not self.validate_password(user_data["Password"]):
+            return "Invalid password. Please enter a password with at least 8 characters."
+
+        self.save_user_data(user_data)
+        return None
 
     def save_user_data(self, user_data):
         """
@@ -95,9 +120,7 @@ class UserFunctions:
             user_data (dict): A dictionary containing user information.
 
         """
-        with open(self.user_csv_path, 'a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(user_data.values())
+        self.storage.add_user(user_data)
 
     def login_user(self, app):
         """
@@ -106,36 +129,52 @@ class UserFunctions:
         Parameters:
             app (object): An instance of the main application class.
 
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
         """
         print("***User Login***")
         email = input("Enter your email: ")
         password = input("Enter your password: ")
 
-        if self.verify_user(email, password):
+        try:
+            verified = self.verify_user(email, password)
+        except LoginThrottledError as error:
+            print(error)
+            return self.user, app
+        if verified:
             print("Login successful!")
-            self.user_menu(app, email)
+            return self.user_menu, app, email
         else:
             print("Invalid email or password. Please try again.")
-            self.user(app)
+            return self.user, app
 
-    def verify_user(self, email, password):
+    @instrumented("user.verify_user")
+    def verify_user(self, email, password, source=LOCAL_SOURCE):
         """
-        Verify the user's credentials by checking if they exist in the user database.
+        Verify the user's credentials by looking up the email in the user index.
+
+        Attempts for an email or from a source with too many recent failures are refused before the user index is
+        read.
 
         Parameters:
             email (str): User's email address.
             password (str): User's password.
+            source (str): The address the attempt comes from.
 
         Returns:
             bool: True if the user's credentials are valid, False otherwise.
 
+        Raises:
+            LoginThrottledError: If the email or the source has no attempts left.
+
         """
-        with open(self.user_csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Email"] == email and row["Password"] == password:
-                    return True
-        return False
+        keys = login_keys("user", email, source)
+        login_throttle.check(keys)
+        verified = any(row["Password"] == password for row in self.storage.find_users(email))
+        if not verified:
+            login_throttle.record_failure(keys)
+        return verified
 
     def validate_phone_number(self, phone_number):
         """
@@ -185,6 +224,9 @@ class UserFunctions:
             app (object): An instance of the main application class.
             :param email: email of the user
 
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
         """
         print("***User Menu***")
         print("1. Place New Order")
@@ -195,62 +237,178 @@ class UserFunctions:
         choice = input("Please enter your choice: ")
 
         if choice == "1":
-            self.place_order(app, email)
+            return self.place_order, app, email
         elif choice == "2":
-            self.order_history(app, email)
+            return self.order_history, app, email
         elif choice == "3":
-            self.update_profile(app)
+            return self.update_profile, app
         elif choice == "4":
-            app.welcome_screen()
+            return (app.welcome_screen,)
         else:
             print("Invalid choice. Please try again.")
-            self.user_menu(app, email)
+            return self.user_menu, app, email
 
-    def place_order(self, app, email):
+    def place_order(self, app, email, cart=None, browse=None):
         """
-        Place a food order by selecting items from the menu and saving the order details.
+        Place a food order by adding items from the menu to a cart and checking the cart out as one order.
+
+        The menu is shown one page at a time, ordered by price, and can be filtered by price range and stock.
 
         Parameters:
             app (object): An instance of the main application class.
             :param email: email of the user
+            cart (dict): The food_id to quantity mapping of the items added so far.
+            browse (dict): The menu filters and the cursors of the pages visited so far.
+
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
 
         """
         print("*Place New Order*")
-        food_list = self.load_food_items()
-        print("Food List:")
+        cart = cart or {}
+        browse = browse or {"cursors": [None], "min_price": None, "max_price": None, "in_stock": False,
+                            "query": None}
+        if browse["query"]:
+            food_list, next_cursor = self.search_food_items(browse["query"]), None
+            print(f"Search results for '{browse['query']}':")
+        else:
+            food_list, next_cursor = self.load_food_page(browse["cursors"][-1], browse["min_price"],
+                                                         browse["max_price"], browse["in_stock"])
+            print(f"Food List (page {len(browse['cursors'])}):")
 
+        prices = self.storage.effective_prices()
         for index, food_item in enumerate(food_list, start=1):
-            print(
-                f"{index}.  {food_item['name']} ({food_item['stock']}/{food_item['quantity']}) [INR {food_item['price']}]")
-
-        choice = input("Enter the index of the food item to order (or enter '0' to go back): ")
+            print(f"{index}.  {food_item['name']} ({food_item['stock']}/{food_item['quantity']}) "
+                  f"[{self.format_price(food_item, prices)}]")
+        if not food_list:
+            print("No food items match the filters.")
+
+        if cart:
+            print(f"Cart (total INR {self.cart_total(cart, prices)}):")
+            for food_id, quantity in cart.items():
+                food_item = self.storage.get_food(food_id)
+                food_name = food_item['name'] if food_item else f"FoodID {food_id}"
+                print(f"  {quantity} x {food_name}")
+
+        options = ["'c' to check out", "'s' to search", "'f' to filter"]
+        if next_cursor is not None:
+            options.append("'n' for the next page")
+        if len(browse["cursors"]) > 1:
+            options.append("'p' for the previous page")
+        choice = input(f"Enter the index of the food item to add to the cart, {', '.join(options)} "
+                       "(or enter '0' to go back): ")
 
         if choice == "0":
-            self.user_menu(app, email)
-            return
+            return self.user_menu, app, email
+
+        if choice.lower() == "c":
+            if not cart:
+                print("Your cart is empty. Please add a food item first.")
+                return self.place_order, app, email, cart, browse
+            return self.confirm_order, app, email, cart
+
+        if choice.lower() == "n" and next_cursor is not None:
+            return self.place_order, app, email, cart, dict(browse, cursors=browse["cursors"] + [next_cursor])
+
+        if choice.lower() == "p" and len(browse["cursors"]) > 1:
+            return self.place_order, app, email, cart, dict(browse, cursors=browse["cursors"][:-1])
+
+        if choice.lower() == "f":
+            return self.place_order, app, email, cart, self.read_menu_filters()
+
+        if choice.lower() == "s":
+            query = input("Enter a food name to search for (or press Enter to show the full menu): ").strip()
+            return self.place_order, app, email, cart, dict(browse, cursors=[None], query=query or None)
 
         if not choice.isdigit() or int(choice) <= 0 or int(choice) > len(food_list):
             print("Invalid choice. Please enter a valid index.")
-            self.place_order(app, email)
-            return
+            return self.place_order, app, email, cart, browse
 
         chosen_food = food_list[int(choice) - 1]
-        max_quantity = int(chosen_food['stock'])
+        max_quantity = int(chosen_food['stock'] or 0) - cart.get(chosen_food['food_id'], 0)
+        if max_quantity <= 0:
+            print(f"Insufficient stock. The available stock for {chosen_food['name']} is {chosen_food['stock']}.")
+            return self.place_order, app, email, cart, browse
 
         quantity = input(f"Enter the quantity you want to order (1-{max_quantity}): ")
         if not quantity.isdigit() or int(quantity) <= 0 or int(quantity) > max_quantity:
             print("Invalid quantity. Please enter a valid quantity.")
-            self.place_order(app, email)
-            return
+            return self.place_order, app, email, cart, browse
 
-        print(f"You have chosen {quantity} {chosen_food['name']}.")
+        cart = dict(cart)
+        cart[chosen_food['food_id']] = cart.get(chosen_food['food_id'], 0) + int(quantity)
+        print(f"Added {quantity} {chosen_food['name']} to the cart.")
+        return self.place_order, app, email, cart, browse
 
-        if int(quantity) > int(chosen_food['stock']):
-            print(f"Insufficient stock. The available stock for {chosen_food['name']} is {chosen_food['stock']}. "
-                  f"Please choose a lower quantity.")
-            self.place_order(app, email)
-            return
+    def format_price(self, food_item, prices):
+        """
+        Format the price of a menu item, showing the listed price next to the discounted one.
 
+        Parameters:
+            food_item (dict): The food item.
+            prices (dict): The effective unit price of every food_id.
+
+        Returns:
+            str: The price text, e.g. "INR 180, 10% off INR 200".
+
+        """
+        discount = to_number(food_item['discount'] or 0)
+        price = prices.get(food_item['food_id'], to_number(food_item['price'] or 0))
+        if discount <= 0:
+            return f"INR {price}"
+        return f"INR {price}, {discount}% off INR {food_item['price']}"
+
+    def cart_total(self, cart, prices=None):
+        """
+        Compute what the items in a cart cost after their discounts.
+
+        Parameters:
+            cart (dict): The food_id to quantity mapping of the items.
+            prices (dict): The effective unit price of every food_id; loaded from storage if not given.
+
+        Returns:
+            int: The total price in INR; items no longer on the menu are not counted.
+
+        """
+        prices = self.storage.effective_prices() if prices is None else prices
+        return sum(prices.get(food_id, 0) * quantity for food_id, quantity in cart.items())
+
+    def read_menu_filters(self):
+        """
+        Prompt for the menu filters; an empty answer leaves a filter unset.
+
+        Returns:
+            dict: The browse state for the first page of the filtered menu.
+
+        """
+        min_price = input("Enter the minimum price (or press Enter for none): ").strip()
+        max_price = input("Enter the maximum price (or press Enter for none): ").strip()
+        in_stock = input("Show only items in stock? (y/n): ").strip().lower() == "y"
+        if (min_price and not min_price.isdigit()) or (max_price and not max_price.isdigit()):
+            print("Invalid price. Showing the menu without a price range.")
+            min_price = max_price = ""
+        return {
+            "cursors": [None],
+            "min_price": int(min_price) if min_price else None,
+            "max_price": int(max_price) if max_price else None,
+            "in_stock": in_stock,
+            "query": None
+        }
+
+    def confirm_order(self, app, email, cart):
+        """
+        Ask the user to confirm the items in the cart before placing the order.
+
+        Parameters:
+            app (object): An instance of the main application class.
+            email (str): email of the user
+            cart (dict): The food_id to quantity mapping of the items to order.
+
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
+        """
+        print(f"You have chosen {sum(cart.values())} item(s) for INR {self.cart_total(cart)}.")
         print("1. Confirm Order")
         print("2. Go Back")
 
@@ -258,29 +416,90 @@ class UserFunctions:
 
         if confirm_choice == "1":
             email = input("Enter your email: ")
-            self.order_food(app, chosen_food, email, quantity)
+            return self.order_food, app, cart, email
         elif confirm_choice == "2":
-            self.place_order(app, email)
+            return self.place_order, app, email, cart
         else:
             print("Invalid choice. Please try again.")
-            self.place_order(app, email)
+            return self.confirm_order, app, email, cart
 
+    @instrumented("user.load_food_items")
     def load_food_items(self):
         """
-        Loads the food items from a CSV file and returns a list of dictionaries representing the food items.
+        Loads the food items from the shared food catalog and returns a list of dictionaries representing the
+        food items.
+
+        The menu is kept between calls together with its catalog version. Later calls only fetch the items changed
+        since that version, and reload the whole catalog only when the changes are no longer known.
 
         Returns:
             list: A list of dictionaries representing the food items.
         """
-        food_items = []
-        with open(self.food_csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                stock_value = row['stock']
-                stock_value = ''.join(filter(str.isdigit, stock_value))
-                row['stock'] = stock_value
-                food_items.append(row)
-        return food_items
+        changes = None if self.menu is None else self.menu_changes(self.menu_version)
+        if changes is None:
+            version = self.storage.catalog_version()
+            self.menu = {record.food_id: record.to_dict() for record in self.storage.list_foods()}
+        else:
+            version = changes["version"]
+            for food_item in changes["added"] + changes["edited"]:
+                self.menu[food_item['food_id']] = food_item
+            for food_id in changes["removed"]:
+                self.menu.pop(food_id, None)
+        self.menu_version = version
+        return list(self.menu.values())
+
+    def menu_changes(self, version):
+        """
+        Loads the food items added, edited and removed since a catalog version.
+
+        Parameters:
+            version (int): The catalog version the caller's menu was loaded at.
+
+        Returns:
+            dict: The new "version", the "added" and "edited" food item dictionaries and the "removed" food_ids, or
+            None if the caller must reload the whole menu.
+
+        """
+        changes = self.storage.food_changes(version)
+        if changes is None:
+            return None
+        return dict(changes, added=[record.to_dict() for record in changes["added"]],
+                    edited=[record.to_dict() for record in changes["edited"]])
+
+    @instrumented("user.load_food_page")
+    def load_food_page(self, cursor=None, min_price=None, max_price=None, in_stock=False, limit=menu_page_size):
+        """
+        Loads one page of the menu, ordered by price, with the same stock formatting as load_food_items.
+
+        Parameters:
+            cursor (str): The cursor returned with the previous page, or None for the first page.
+            min_price (int): The lowest price to include, or None.
+            max_price (int): The highest price to include, or None.
+            in_stock (bool): Whether to include only items with stock left.
+            limit (int): The maximum number of items on the page.
+
+        Returns:
+            tuple: (food items, next cursor); the cursor is None on the last page.
+
+        """
+        records, next_cursor = self.storage.page_foods(cursor, limit, min_price, max_price, in_stock)
+        return [record.to_dict() for record in records], next_cursor
+
+    @instrumented("user.search_food_items")
+    def search_food_items(self, query, limit=menu_page_size):
+        """
+        Searches the menu by food name, tolerating prefixes and typos, with the same stock formatting as
+        load_food_items.
+
+        Parameters:
+            query (str): The search text.
+            limit (int): The maximum number of results.
+
+        Returns:
+            list: The matching food items, best match first.
+
+        """
+        return [record.to_dict() for record in self.storage.search_foods(query, limit)]
 
     def update_food_item(self, food_item):
         """
@@ -290,103 +509,200 @@ class UserFunctions:
             food_item (dict): The updated food item data.
 
         """
-        food_items = self.load_food_items()
+        self.storage.update_food(food_item)
+
+    def order_food(self, app, cart, email):
+        """
+        Places an order for every item in the cart and adds it to the order history.
+
+        All items are validated against the stock together and committed in one write pass, so an order either
+        takes the stock of every item or of none, and concurrent sessions cannot oversell.
 
-        index = None
-        for i, item in enumerate(food_items):
-            if item['food_id'] == food_item['food_id']:
-                index = i
-                break
+        Args:
+            app (object): An instance of the main application class.
+            cart (dict): The food_id to quantity mapping of the items to order.
+            email (str): The email of the user placing the order.
 
-        if index is not None:
-            food_items[index] = food_item
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
 
-            with open(self.food_csv_path, 'w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=food_items[0].keys())
-                writer.writeheader()
-                writer.writerows(food_items)
+        """
+        orders, error = self.submit_cart(email, cart)
+        if error:
+            print(error)
+            return self.user_menu, app, email
 
-    def order_food(self, app, food_item, email, quantity):
+        for order in orders:
+            food_item = self.storage.get_food(order['food_id'])
+            food_name = food_item['name'] if food_item else f"FoodID {order['food_id']}"
+            print(f"Order confirmed for {order['quantity']} {food_name} INR {order['unit_price']} each.")
+        print("Order placed successfully!")
+        return self.user_menu, app, email
+
+    def submit_order(self, email, food_id, quantity):
         """
-        Places an order for the specified food item and adds it to the order history.
+        Places an order for a single food item without prompting.
 
         Args:
-            app (object): An instance of the main application class.
-            food_item (dict): The food item to order.
             email (str): The email of the user placing the order.
-            :param quantity: The quantity of the user placing order
+            food_id (str): The food_id of the food item to order.
+            quantity (int): The number of units to order.
+
+        Returns:
+            tuple: (order, None) with the recorded order if it was placed, or (None, error message) otherwise.
 
         """
-        available_stock = int(food_item['stock'])
-        if available_stock < int(quantity):
-            print(f"Insufficient stock. The available stock for {food_item['name']} is {available_stock}. "
-                  f"Please choose a lower quantity.")
-            return
+        orders, error = self.submit_cart(email, {str(food_id): quantity})
+        return (None, error) if error else (orders[0], None)
 
-        print(f"Order confirmed for {quantity} {food_item['name']} INR {food_item['price']} each.")
-        food_item['stock'] = str(available_stock - int(quantity))
-        self.update_food_item(food_item)
-        self.add_order_to_history(food_item, email)
-        print("Order placed successfully!")
-        self.user_menu(app, email)
+    @instrumented("user.submit_cart")
+    def submit_cart(self, email, cart):
+        """
+        Places a multi-item order without prompting: takes the stock of every item and records the order in one
+        commit.
+
+        Args:
+            email (str): The email of the user placing the order.
+            cart (dict): The food_id to quantity mapping of the items to order.
+
+        Returns:
+            tuple: (orders, None) with the recorded order lines if it was placed, or (None, error message) otherwise.
 
-    def add_order_to_history(self, food_item, email):
         """
-        Adds an order to the user's order history in the CSV file.
+        error = self.check_cart(cart)
+        if error:
+            return None, error
+
+        orders, shortages = self.storage.commit_order(email, cart, self.order_timestamp())
+        if shortages:
+            return None, self.shortage_error(shortages)
+        return orders, None
+
+    def check_cart(self, cart):
+        """
+        Validates the quantities and food items of a cart before it is committed.
+
+        Args:
+            cart (dict): The food_id to quantity mapping of the items to order.
+
+        Returns:
+            str: The error message, or None if the cart can be committed.
+
+        """
+        if not cart:
+            return "Your cart is empty. Please add a food item first."
+        for food_id, quantity in cart.items():
+            if not isinstance(quantity, int) or quantity <= 0:
+                return "Invalid quantity. Please enter a valid quantity."
+            if not self.storage.food_exists(food_id):
+                return "Food item does not exist."
+        return None
+
+    def order_timestamp(self):
+        """
+        Returns the current time in the format stored with orders.
+
+        Returns:
+            str: The time, formatted as "%Y-%m-%d %H:%M:%S".
+
+        """
+        return str(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    def shortage_error(self, shortages):
+        """
+        Builds the error message for an order that was rejected for lack of stock.
+
+        Args:
+            shortages (dict): The food_id to available stock mapping of the items that cannot be served.
+
+        Returns:
+            str: The error message.
+
+        """
+        messages = []
+        for food_id, available_stock in shortages.items():
+            food_item = self.storage.get_food(food_id)
+            food_name = food_item['name'] if food_item else f"FoodID {food_id}"
+            messages.append(f"The available stock for {food_name} is {available_stock}.")
+        return f"Insufficient stock. {' '.join(messages)} Please choose a lower quantity."
+
+    @instrumented("user.add_order_to_history")
+    def add_order_to_history(self, food_item, email, quantity=1):
+        """
+        Appends an order record for the user to the order log.
 
         Args:
             food_item (dict): The food item that was ordered.
             email (str): The email of the user placing the order.
+            quantity: The quantity of the food item ordered.
+
+        Returns:
+            dict: The recorded order.
 
         """
         now = datetime.datetime.now()
-        order_data = {
-            "Food Name": food_item['name'],
-            "Price": food_item['price'],
-            "Order Date": str(now.strftime("%Y-%m-%d %H:%M:%S"))
+        order = {
+            "order_id": self.storage.new_order_id(),
+            "email": email,
+            "food_id": food_item['food_id'],
+            "quantity": quantity,
+            "unit_price": effective_price(to_number(food_item['price']), to_number(food_item['discount'])),
+            "timestamp": str(now.strftime("%Y-%m-%d %H:%M:%S"))
         }
-
-        with open(self.user_csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            rows = list(reader)
-
-        for row in rows:
-            if row["Email"] == email:
-                if row.get("Order History"):
-                    row[
-                        "Order History"] += f"\n Food: {order_data['Food Name']} - INR {order_data['Price']} - Order date: {order_data['Order Date']}"
-                else:
-                    row[
-                        "Order History"] = f"Food: {order_data['Food Name']} - INR {order_data['Price']} - Order date: {order_data['Order Date']}"
-                break
-
-        with open(self.user_csv_path, 'w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
+        self.storage.add_order(order)
+        return order
 
     def order_history(self, app, email):
         """
         Displays the order history for a user based on their email.
 
+        Orders placed before the order log existed are still shown from the user's "Order History" column.
+
         Args:
             app: The application or context in which the order history is being displayed.
             email (str): The email of the user.
+
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
         """
         print("*Order History*")
-        with open(self.user_csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Email"] == email:
-                    if "Order History" in row:
-                        order_history = row["Order History"]
-                        orders = order_history.split("\n")
-                        for order in orders:
-                            print(order)
-                    else:
-                        print("No order history found.")
-                    break
-        self.user_menu(app, email)
+        history = self.get_order_history(email)
+        if history is not None:
+            legacy_orders, orders = history
+            for order in legacy_orders:
+                print(order)
+            for order in orders:
+                food_item = self.storage.get_food(order['food_id'])
+                food_name = food_item['name'] if food_item else f"FoodID {order['food_id']}"
+                print(f" Food: {food_name} x{order['quantity']} - INR {order['unit_price']} - "
+                      f"Order date: {order['timestamp']}")
+            if not legacy_orders and not orders:
+                print("No order history found.")
+        return self.user_menu, app, email
+
+    @instrumented("user.get_order_history")
+    def get_order_history(self, email):
+        """
+        Returns the order history of a user without printing it.
+
+        Args:
+            email (str): The email of the user.
+
+        Returns:
+            tuple: (legacy orders, orders), where legacy orders are the lines of the user's "Order History" column
+            that were not migrated into the order log and orders are the user's order log records, oldest first;
+            None if the user does not exist.
+
+        """
+        users = self.storage.find_users(email)
+        if not users:
+            return None
+        orders = sorted(self.storage.orders_for(email), key=lambda order: order['timestamp'])
+        migrated = {legacy_entry_number(order['order_id']) for order in orders}
+        legacy_orders = [line for number, line in enumerate(history_lines(users[0].get("Order History")))
+                         if number not in migrated]
+        return legacy_orders, orders
 
     def update_profile(self, app):
         """
@@ -395,38 +711,49 @@ class UserFunctions:
         Parameters:
             app (object): An instance of the main application class.
 
+        Returns:
+            tuple: The next screen to show, as a (method, *args) tuple.
+
         """
         print("Update Profile")
         email = input("Enter your email: ")
         new_data = {}
 
-        with open(self.user_csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Email"] == email:
-                    new_data = self.get_updated_user_data(row)
-                    break
+        for row in self.storage.find_users(email)[:1]:
+            new_data = self.get_updated_user_data(row)
 
         if not new_data:
             print("User not found. Please try again.")
-            self.user_menu(app, email)
-            return
-
-        updated_rows = []
-        with open(self.user_csv_path, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["Email"] == email:
-                    row.update(new_data)
-                updated_rows.append(row)
-
-        with open(self.user_csv_path, 'w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=updated_rows[0].keys())
-            writer.writeheader()
-            writer.writerows(updated_rows)
+            return self.user_menu, app, email
+
+        error = self.update_user_profile(email, new_data)
+        if error:
+            print(error)
+            return self.user_menu, app, email
 
         print("Profile updated successfully!")
-        self.user_menu(app, email)
+        return self.user_menu, app, email
+
+    @instrumented("user.update_user_profile")
+    def update_user_profile(self, email, new_data):
+        """
+        Validate and save a user's new profile information, without prompting.
+
+        Parameters:
+            email (str): The email of the user.
+            new_data (dict): The profile columns to change ("Full Name", "Phone Number", "Address") and their values.
+
+        Returns:
+            str: An error message if the user does not exist or the details are invalid, None if the profile was
+            updated.
+
+        """
+        if not self.storage.find_users(email):
+            return "User not found. Please try again."
+        if "Phone Number" in new_data and not self.validate_phone_number(new_data["Phone Number"]):
+            return "Invalid phone number. Profile update failed."
+        self.storage.update_user(email, new_data)
+        return None
 
     def get_updated_user_data(self, user_data):
         """
@@ -461,4 +788,18 @@ class UserFunctions:
         return new_data
 
 
-user_functions = UserFunctions()
+user_functions = None
+
+
+def get_user_functions():
+    """
+    Return the shared UserFunctions, creating it on first use of the user path.
+
+    Returns:
+        UserFunctions: The UserFunctions instance.
+
+    """
+    global user_functions
+    if user_functions is None:
+        user_functions = UserFunctions()
+    return user_functions
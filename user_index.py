@@ -0,0 +1,270 @@
+import bisect
+import csv
+import io
+import itertools
+import os
+import shutil
+
+from constants.constant import user_database
+from utils.file_lock import FileLock
+from utils.metrics import metrics
+from utils.paths import resource_path
+
+
+def read_raw_record(file):
+    """
+    Reads one CSV record from a binary file, following quoted fields that span several lines.
+
+    Args:
+        file: A file opened in binary mode, positioned at the start of a record.
+
+    Returns:
+        bytes: The raw record, or an empty bytes object at the end of the file.
+
+    """
+    lines = []
+    quotes = 0
+    while True:
+        line = file.readline()
+        if not line:
+            break
+        lines.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            break
+    return b''.join(lines)
+
+
+def parse_raw_record(raw):
+    """
+    Parses a raw CSV record into a list of field values.
+
+    Args:
+        raw (bytes): The raw record as returned by read_raw_record.
+
+    Returns:
+        list: The field values of the record.
+
+    """
+    return next(csv.reader(io.StringIO(raw.decode('utf-8'), newline='')), [])
+
+
+def iter_record_offsets(csv_path):
+    """
+    Streams the data records of a CSV file together with the byte offset each one starts at.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+
+    Yields:
+        tuple: The header fields, then (offset, fields) for every data record.
+
+    """
+    with open(csv_path, 'rb') as file:
+        yield parse_raw_record(read_raw_record(file))
+        while True:
+            offset = file.tell()
+            raw = read_raw_record(file)
+            if not raw:
+                break
+            if raw.strip():
+                yield offset, parse_raw_record(raw)
+
+
+class UserIndex:
+    """
+    Rebuildable index of the user database mapping each email to the byte offsets of its rows.
+
+    A lookup seeks straight to the user's row and parses only that record, so its cost does not depend on the
+    number of users or on the size of their order history. The index is rebuilt with a single scan whenever the
+    file's modification time or size changes outside of this index. Writes hold a cross-process lock on the file.
+    """
+    def __init__(self, csv_path):
+        """
+        Initialize the index without reading the file; it is built on first use.
+
+        Parameters:
+            csv_path (str): Path to the user CSV file.
+
+        """
+        self.csv_path = csv_path
+        self.fieldnames = []
+        self.offsets = {}
+        self.signature = None
+        self.lock = FileLock(csv_path + ".lock")
+
+    def file_signature(self):
+        """
+        Return the (mtime, size) pair used to detect changes to the user CSV file.
+
+        Returns:
+            tuple: The file's modification time in nanoseconds and its size in bytes.
+
+        """
+        stat = os.stat(self.csv_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """
+        Rebuild the index if the user CSV file changed since it was last indexed.
+        """
+        if self.signature != self.file_signature():
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Scan the user CSV file once and record the offset of every row by email.
+        """
+        signature = self.file_signature()
+        records = iter_record_offsets(self.csv_path)
+        self.fieldnames = next(records)
+        email_column = self.fieldnames.index("Email")
+        offsets = {}
+        for offset, fields in records:
+            if len(fields) > email_column:
+                offsets.setdefault(fields[email_column], []).append(offset)
+        self.offsets = offsets
+        self.signature = signature
+        metrics.count_io(read=signature[1])
+
+    def row_at(self, offset):
+        """
+        Read and parse the user row starting at the given byte offset.
+
+        Parameters:
+            offset (int): Byte offset of the row in the user CSV file.
+
+        Returns:
+            dict: The user row keyed by the CSV column names; missing columns are None.
+
+        """
+        with open(self.csv_path, 'rb') as file:
+            file.seek(offset)
+            raw = read_raw_record(file)
+        metrics.count_io(read=len(raw))
+        fields = parse_raw_record(raw)
+        return {name: fields[i] if i < len(fields) else None for i, name in enumerate(self.fieldnames)}
+
+    def find(self, email):
+        """
+        Return every row registered with the given email.
+
+        Parameters:
+            email (str): User's email address.
+
+        Returns:
+            list: The matching user rows, in file order.
+
+        """
+        self.refresh()
+        return [self.row_at(offset) for offset in self.offsets.get(email, [])]
+
+    def contains(self, email):
+        """
+        Check whether a user with the given email exists.
+
+        Parameters:
+            email (str): User's email address.
+
+        Returns:
+            bool: True if the email is registered, False otherwise.
+
+        """
+        self.refresh()
+        return email in self.offsets
+
+    def paths(self):
+        """
+        Return the path of the user CSV file, in the same form as ShardedUserStore.paths.
+
+        Returns:
+            list: The path of the user CSV file.
+
+        """
+        return [self.csv_path]
+
+    def append(self, user_data):
+        """
+        Append a user row to the user CSV file and add it to the index.
+
+        Parameters:
+            user_data (dict): A dictionary containing user information, in column order.
+
+        """
+        with self.lock:
+            self.refresh()
+            with open(self.csv_path, 'a', newline='') as file:
+                offset = file.seek(0, os.SEEK_END)
+                writer = csv.writer(file)
+                writer.writerow(user_data.values())
+                metrics.count_io(written=file.tell() - offset)
+            self.offsets.setdefault(user_data["Email"], []).append(offset)
+            self.signature = self.file_signature()
+
+    def update(self, email, new_data):
+        """
+        Update columns of every row registered with the given email and atomically replace the file.
+
+        Only the user's rows are parsed and re-encoded; the bytes of every other row are copied unchanged, and the
+        offsets of the rows after them are shifted instead of rebuilding the index.
+
+        Parameters:
+            email (str): User's email address.
+            new_data (dict): The columns to update and their new values.
+
+        Returns:
+            int: The number of rows updated.
+
+        """
+        with self.lock:
+            self.refresh()
+            row_offsets = self.offsets.get(email, [])
+            if not row_offsets:
+                return 0
+            changed_offsets = []
+            shifts = [0]
+            temp_csv_path = self.csv_path + ".tmp"
+            with open(self.csv_path, 'rb') as source, open(temp_csv_path, 'wb') as target:
+                position = 0
+                for offset in row_offsets:
+                    copy_bytes(source, target, offset - position)
+                    raw = read_raw_record(source)
+                    row = dict(itertools.zip_longest(self.fieldnames, parse_raw_record(raw), fillvalue=""))
+                    row.update(new_data)
+                    encoded = io.StringIO(newline='')
+                    csv.writer(encoded).writerow([row[name] for name in self.fieldnames])
+                    data = encoded.getvalue().encode('utf-8')
+                    target.write(data)
+                    changed_offsets.append(offset)
+                    shifts.append(shifts[-1] + len(data) - len(raw))
+                    position = offset + len(raw)
+                shutil.copyfileobj(source, target)
+                metrics.count_io(read=source.tell(), written=target.tell())
+            os.replace(temp_csv_path, self.csv_path)
+            if shifts[-1]:
+                for key, offsets in self.offsets.items():
+                    self.offsets[key] = [offset + shifts[bisect.bisect_left(changed_offsets, offset)]
+                                         for offset in offsets]
+            self.signature = self.file_signature()
+        return len(row_offsets)
+
+
+def copy_bytes(source, target, count):
+    """
+    Copy a number of bytes from one binary file to another in bounded memory.
+
+    Parameters:
+        source: The file to read from, at its current position.
+        target: The file to write to.
+        count (int): The number of bytes to copy.
+
+    """
+    while count > 0:
+        chunk = source.read(min(count, 1024 * 1024))
+        if not chunk:
+            break
+        target.write(chunk)
+        count -= len(chunk)
+
+
+user_index = UserIndex(resource_path(user_database))
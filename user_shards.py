@@ -0,0 +1,238 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import shutil
+import time
+import zlib
+
+from constants.constant import user_database, user_shard_directory
+from utils.paths import resource_path
+from utils.user_index import UserIndex, iter_record_offsets
+
+MANIFEST_FILE = "manifest.json"
+
+
+def shard_number(email, shard_count):
+    """
+    Return the shard a user belongs to, from a stable hash of the email.
+
+    Parameters:
+        email (str): User's email address.
+        shard_count (int): The number of shards.
+
+    Returns:
+        int: The shard number, from 0 to shard_count - 1.
+
+    """
+    return zlib.crc32(email.encode('utf-8')) % shard_count
+
+
+def shard_file(number):
+    """
+    Return the file name of a shard.
+
+    Parameters:
+        number (int): The shard number.
+
+    Returns:
+        str: The file name.
+
+    """
+    return f"users_{number:03d}.csv"
+
+
+class ShardedUserStore:
+    """
+    User database partitioned by email hash across several CSV files in one directory.
+
+    Every shard is a UserIndex with its own file and lock, so a registration or profile update reads and writes only
+    the user's shard, and writes to different shards proceed in parallel. All rows of one email live in the same
+    shard, in registration order. The directory's manifest.json records the shard count; it is checked on every
+    access, so a store notices when reshard replaced the directory.
+    """
+    def __init__(self, directory):
+        """
+        Initialize the store without reading the directory; the manifest is read on first use.
+
+        Parameters:
+            directory (str): The directory holding the shard files and manifest.json.
+
+        """
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.signature = None
+        self.shards = []
+
+    def refresh(self):
+        """
+        Reload the manifest and reopen the shards if the directory was replaced since it was last read.
+        """
+        stat = os.stat(self.manifest_path)
+        signature = stat.st_mtime_ns, stat.st_size, stat.st_ino
+        if signature != self.signature:
+            with open(self.manifest_path, 'r') as file:
+                manifest = json.load(file)
+            self.shards = [UserIndex(os.path.join(self.directory, shard_file(number)))
+                           for number in range(manifest["shards"])]
+            self.signature = signature
+
+    def shard_for(self, email):
+        """
+        Return the shard holding the rows of an email.
+
+        Parameters:
+            email (str): User's email address.
+
+        Returns:
+            UserIndex: The user's shard.
+
+        """
+        self.refresh()
+        return self.shards[shard_number(email, len(self.shards))]
+
+    def find(self, email):
+        """
+        Return every row registered with the given email.
+
+        Parameters:
+            email (str): User's email address.
+
+        Returns:
+            list: The matching user rows, in registration order.
+
+        """
+        return self.shard_for(email).find(email)
+
+    def contains(self, email):
+        """
+        Check whether a user with the given email exists.
+
+        Parameters:
+            email (str): User's email address.
+
+        Returns:
+            bool: True if the email is registered, False otherwise.
+
+        """
+        return self.shard_for(email).contains(email)
+
+    def append(self, user_data):
+        """
+        Append a user row to the user's shard.
+
+        Parameters:
+            user_data (dict): A dictionary containing user information, in column order.
+
+        """
+        self.shard_for(user_data["Email"]).append(user_data)
+
+    def update(self, email, new_data):
+        """
+        Update columns of every row registered with the given email, rewriting only the user's shard.
+
+        Parameters:
+            email (str): User's email address.
+            new_data (dict): The columns to update and their new values.
+
+        Returns:
+            int: The number of rows updated.
+
+        """
+        return self.shard_for(email).update(email, new_data)
+
+    def paths(self):
+        """
+        Return the paths of the shard files.
+
+        Returns:
+            list: One path per shard, in shard order.
+
+        """
+        self.refresh()
+        return [shard.csv_path for shard in self.shards]
+
+
+def reshard(source_paths, directory, shard_count):
+    """
+    Stream user rows into a new set of shard files and atomically replace the shard directory.
+
+    The rows are written to a temporary directory next to the target, which is then swapped in with renames, so a
+    store never sees a half-written layout. Memory use does not depend on the number of users. Run it while the
+    app is stopped: writes made by a running app during the copy would be lost.
+
+    Parameters:
+        source_paths (list): The user CSV files to read, e.g. user_database.csv or the current shard files.
+        directory (str): The shard directory to create or replace.
+        shard_count (int): The number of shards to create.
+
+    Returns:
+        dict: The number of users written to each shard, and the elapsed seconds.
+
+    """
+    start = time.perf_counter()
+    temp_directory = directory + ".tmp"
+    shutil.rmtree(temp_directory, ignore_errors=True)
+    os.makedirs(temp_directory)
+    counts = [0] * shard_count
+    fieldnames = None
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(open(os.path.join(temp_directory, shard_file(number)), 'w', newline=''))
+                 for number in range(shard_count)]
+        writers = [csv.writer(file) for file in files]
+        for source_path in source_paths:
+            records = iter_record_offsets(source_path)
+            header = next(records)
+            if fieldnames is None:
+                fieldnames = header
+                for writer in writers:
+                    writer.writerow(fieldnames)
+            elif header != fieldnames:
+                raise ValueError(f"{source_path} has different columns than {source_paths[0]}.")
+            email_column = fieldnames.index("Email")
+            for _, fields in records:
+                number = shard_number(fields[email_column] if len(fields) > email_column else "", shard_count)
+                writers[number].writerow(fields)
+                counts[number] += 1
+    with open(os.path.join(temp_directory, MANIFEST_FILE), 'w') as file:
+        json.dump({"shards": shard_count, "fieldnames": fieldnames}, file)
+
+    old_directory = directory + ".old"
+    if os.path.exists(directory):
+        shutil.rmtree(old_directory, ignore_errors=True)
+        os.rename(directory, old_directory)
+    os.rename(temp_directory, directory)
+    shutil.rmtree(old_directory, ignore_errors=True)
+    return {"users": counts, "seconds": time.perf_counter() - start}
+
+
+def main():
+    """
+    Command line entry point for creating or resharding the sharded user store.
+    """
+    default_directory = resource_path(user_shard_directory)
+    parser = argparse.ArgumentParser(description="Split the user database into shards by email hash, or change "
+                                                 "the number of shards.")
+    parser.add_argument("--shards", type=int, required=True, help="Number of shards to create.")
+    parser.add_argument("--directory", default=default_directory, help="The shard directory.")
+    parser.add_argument("--source", help="User CSV file to split; defaults to the current shards if the directory "
+                                         "exists, otherwise to the user database.")
+    args = parser.parse_args()
+    if args.shards < 1:
+        parser.error("--shards must be at least 1.")
+
+    if args.source:
+        source_paths = [args.source]
+    elif os.path.exists(os.path.join(args.directory, MANIFEST_FILE)):
+        source_paths = ShardedUserStore(args.directory).paths()
+    else:
+        source_paths = [resource_path(user_database)]
+    report = reshard(source_paths, args.directory, args.shards)
+    print(f"Wrote {sum(report['users'])} users to {args.shards} shards in {args.directory} "
+          f"in {report['seconds']:.1f}s (smallest {min(report['users'])}, largest {max(report['users'])}).")
+    print('Set user_layout = "sharded" in constants/constant.py to use them.')
+
+
+if __name__ == "__main__":
+    main()